@@ -0,0 +1,62 @@
+"""
+Benchmark de escalado de la cotización por lotes con 1, 2, 4 y 8 procesos.
+
+Comprueba además que la salida es idéntica (mismo orden y mismos valores)
+con cualquier número de procesos.
+
+Uso: python benchmarks/bench_parallel.py [piezas] [tamaño de bloque]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.parallel_pricing import ParallelQuoter, default_workers
+from utils.pricing_engine import PricingEngine, np
+
+
+def make_rows(count):
+    """Genera filas de lista de piezas reproducibles, como las de `read_parts`."""
+    rng = random.Random(42)
+    filaments = ["PLA", "PETG", "ABS", "TPU"]
+    return [
+        (line, {
+            "name": f"Pieza {line}",
+            "weight_g": f"{rng.uniform(5, 500):.2f}",
+            "hours": f"{rng.uniform(0.5, 30):.2f}",
+            "filament": rng.choice(filaments),
+            "margin": rng.choice(["", "20", "50"]),
+        })
+        for line in range(2, count + 2)
+    ]
+
+
+def run(engine, rows, workers, chunk_size):
+    quoter = ParallelQuoter(engine, chunk_size=chunk_size, workers=workers)
+    start = time.perf_counter()
+    quotes = [quote for chunk, _ in quoter.quote_parts(rows) for quote in chunk]
+    return time.perf_counter() - start, quotes
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    engine = PricingEngine(0.50, 0.15, 150, {"PLA": 25.0, "PETG": 30.0, "ABS": 28.0, "TPU": 40.0})
+    rows = make_rows(count)
+
+    print(f"Piezas: {count}, bloque: {chunk_size}, núcleos: {default_workers()} "
+          f"(NumPy: {'sí' if np is not None else 'no'})")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        elapsed, quotes = run(engine, rows, workers, chunk_size)
+        if baseline is None:
+            baseline, reference = elapsed, quotes
+        same = "idéntica" if quotes == reference else "DISTINTA"
+        print(f"  {workers} proceso(s): {elapsed:7.3f} s  x{baseline / elapsed:4.2f}  salida {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark de guardados por segundo del escritor atómico compartido.
+
+Compara la escritura directa (modo 'w', sin fsync) con la escritura atómica
+con fsync y con la confirmación en grupo cuando varios hilos guardan a la vez.
+
+Uso: python benchmarks/bench_persistence.py [registros] [guardados] [hilos]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.persistence import GroupCommitWriter, atomic_write_bytes
+
+
+def make_payload(records):
+    """Genera un JSON parecido al de clients.json."""
+    data = [{"id": str(i), "name": f"Cliente {i}", "total_spent": i * 1.5} for i in range(records)]
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def bench_direct(path, payload, saves):
+    start = time.perf_counter()
+    for _ in range(saves):
+        with open(path, 'wb') as f:
+            f.write(payload)
+    return saves / (time.perf_counter() - start)
+
+
+def bench_atomic(path, payload, saves, fsync):
+    start = time.perf_counter()
+    for _ in range(saves):
+        atomic_write_bytes(path, payload, fsync=fsync)
+    return saves / (time.perf_counter() - start)
+
+
+def bench_group_commit(path, payload, saves, threads, window):
+    writer = GroupCommitWriter(window=window, fsync=True)
+    per_thread = max(saves // threads, 1)
+
+    def worker():
+        for _ in range(per_thread):
+            writer.commit(path, payload)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return writer.commit_count / elapsed, writer.write_count
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    payload = make_payload(records)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store.json")
+        print(f"Registros: {records} ({len(payload) / 1024:.0f} KB), guardados: {saves}, hilos: {threads}")
+        print(f"Directo sin fsync:        {bench_direct(path, payload, saves):10.1f} guardados/s")
+        print(f"Atómico sin fsync:        {bench_atomic(path, payload, saves, False):10.1f} guardados/s")
+        print(f"Atómico con fsync:        {bench_atomic(path, payload, saves, True):10.1f} guardados/s")
+        for window in (0.0, 0.005, 0.02):
+            rate, writes = bench_group_commit(path, payload, saves, threads, window)
+            print(f"Grupo (ventana {window * 1000:4.0f} ms): {rate:10.1f} guardados/s ({writes} escrituras)")
+
+
+if __name__ == "__main__":
+    main()
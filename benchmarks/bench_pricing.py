@@ -0,0 +1,63 @@
+"""
+Benchmark del motor de precios: costo por cotización en el cálculo
+individual frente al cálculo por lotes (vectorizado si NumPy está instalado).
+
+Uso: python benchmarks/bench_pricing.py [piezas]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.pricing_engine import PricingEngine, np
+
+
+def make_parts(count):
+    """Genera piezas aleatorias reproducibles."""
+    rng = random.Random(42)
+    filaments = ["PLA", "PETG", "ABS", "TPU"]
+    weights = [rng.uniform(5, 500) for _ in range(count)]
+    hours = [rng.uniform(0.5, 30) for _ in range(count)]
+    types = [rng.choice(filaments) for _ in range(count)]
+    margins = [rng.choice([20.0, 30.0, 50.0]) for _ in range(count)]
+    return weights, hours, types, margins
+
+
+def bench_single(engine, weights, hours, types, margins):
+    start = time.perf_counter()
+    for weight, hour, filament, margin in zip(weights, hours, types, margins):
+        engine.price(weight, hour, filament, margin)
+    return time.perf_counter() - start
+
+
+def bench_batch(engine, weights, hours, types, margins):
+    # Los filamentos se pasan como códigos, igual que en la tabla columnar
+    categories = sorted(set(types))
+    codes = {name: code for code, name in enumerate(categories)}
+    types = [codes[name] for name in types]
+    if np is not None:
+        weights, hours, types, margins = (np.asarray(weights), np.asarray(hours),
+                                          np.asarray(types), np.asarray(margins))
+    start = time.perf_counter()
+    engine.price_batch(weights, hours, types, margins, filament_categories=categories)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    engine = PricingEngine(0.50, 0.15, 150, {"PLA": 25.0, "PETG": 30.0, "ABS": 28.0, "TPU": 40.0})
+    parts = make_parts(count)
+
+    print(f"Piezas: {count} (NumPy: {'sí' if np is not None else 'no'})")
+    single_count = min(count, 100_000)
+    single = bench_single(engine, *(column[:single_count] for column in parts))
+    print(f"  individual: {single / single_count * 1e9:10.1f} ns/cotización")
+    batch = bench_batch(engine, *parts)
+    print(f"  por lotes:  {batch / count * 1e9:10.1f} ns/cotización")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ from utils.printer_manager import PrinterManager
 from utils.task_manager import TaskManager
 from utils.budget_manager import BudgetManager
 from utils.analytics import Analytics
+from models.settings_manager import SettingsManager
 
 
 class Gestion3DPro:
@@ -31,7 +32,8 @@ class Gestion3DPro:
         self.material_manager = MaterialManager()
         self.printer_manager = PrinterManager()
         self.task_manager = TaskManager()
-        self.budget_manager = BudgetManager()
+        self.settings_manager = SettingsManager()
+        self.budget_manager = BudgetManager(settings_manager=self.settings_manager)
         self.analytics = Analytics()
         
         print("Sistema de Gestión 3D Pro inicializado correctamente.")
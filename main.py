@@ -6,9 +6,11 @@ from views.settings_view import SettingsView
 from views.projects_view import ProjectsView
 from views.clients_view import ClientsView
 from models.settings_manager import SettingsManager
-from models.database_mobile import DatabaseManager
+from models.database_mobile import get_db
 from models.user_preferences import UserPreferences
 from utils.themes import CustomThemes
+from utils.analytics import Analytics
+from utils.quote_cache import get_quote_cache
 
 def main(page: ft.Page):
     page.title = "Calculadora 3D Pro"
@@ -20,8 +22,13 @@ def main(page: ft.Page):
     
     # Instancia única de los gestores
     settings_manager = SettingsManager()
-    db_manager = DatabaseManager()
+    db_manager = get_db(settings_manager.get('storage_backend', 'json'))
     user_preferences = UserPreferences()
+    analytics = Analytics()
+    # La caché de cálculos compartida informa sus aciertos a Analytics
+    quote_cache = get_quote_cache(settings_manager, analytics)
+    # Enviar los contadores pendientes de la caché al cerrar la sesión
+    page.on_disconnect = lambda _: quote_cache.report()
 
     # Aplicar tema guardado al inicio
     theme = settings_manager.get('theme_mode')
@@ -37,7 +44,7 @@ def main(page: ft.Page):
         if page.route == "/":
             page.views.append(HomeView(page))
         elif page.route == "/calculator":
-            page.views.append(CalculatorView(page, settings_manager, db_manager))
+            page.views.append(CalculatorView(page, settings_manager, db_manager, analytics))
         elif page.route == "/history":
             page.views.append(HistoryView(page, db_manager, file_picker))
         elif page.route == "/settings":
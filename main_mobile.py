@@ -7,6 +7,8 @@ from models.settings_manager import SettingsManager
 from models.database_simple import DatabaseManager
 from models.user_preferences import UserPreferences
 from utils.themes import CustomThemes
+from utils.analytics import Analytics
+from utils.quote_cache import get_quote_cache
 
 def main(page: ft.Page):
     page.title = "Calculadora 3D Pro"
@@ -23,6 +25,11 @@ def main(page: ft.Page):
     settings_manager = SettingsManager()
     db_manager = DatabaseManager()
     user_preferences = UserPreferences()
+    analytics = Analytics()
+    # La caché de cálculos compartida informa sus aciertos a Analytics
+    quote_cache = get_quote_cache(settings_manager, analytics)
+    # Enviar los contadores pendientes de la caché al cerrar la sesión
+    page.on_disconnect = lambda _: quote_cache.report()
     themes = CustomThemes()
     
     # Aplicar tema guardado
@@ -36,7 +43,7 @@ def main(page: ft.Page):
     
     # --- Vistas ---
     home_view = HomeView(page)
-    calculator_view = CalculatorViewMobile(page, settings_manager, db_manager)
+    calculator_view = CalculatorViewMobile(page, settings_manager, db_manager, analytics)
     history_view = HistoryViewMobile(page, db_manager)
     settings_view = SettingsView(page, settings_manager)
     
@@ -1,9 +1,12 @@
 import flet as ft
+import heapq
 import json
 import os
 from datetime import datetime
 import uuid
 
+from utils.pricing_engine import PricingEngine, QUOTE_DATA_FIELDS
+
 # Clase Quote simplificada
 class Quote:
     def __init__(self, piece_name, weight_g, total_hours, filament_type, 
@@ -109,7 +112,7 @@ class DatabaseManager:
             return False
     
     def get_recent_quotes(self, limit=10):
-        return sorted(self.quotes, key=lambda q: q.timestamp, reverse=True)[:limit]
+        return heapq.nlargest(limit, self.quotes, key=lambda q: q.timestamp)
     
     def delete_quote(self, quote_id):
         try:
@@ -212,10 +215,7 @@ def main(page: ft.Page):
             nonlocal current_quote_data
             try:
                 settings = settings_manager.load_settings()
-                machine_cost_per_hour = float(settings['machine_cost_per_hour'])
-                electricity_kwh_price = float(settings['electricity_kwh_price'])
-                printer_power_watts = int(settings['printer_power_watts'])
-                filament_prices = settings['filaments']
+                engine = PricingEngine.from_settings(settings)
 
                 weight = float(weight_g.value)
                 hours = float(time_h.value or 0)
@@ -228,14 +228,14 @@ def main(page: ft.Page):
                     show_snack_bar("Por favor, completa todos los campos.", "error")
                     return
 
-                filament_price_per_kg = float(filament_prices[selected_filament]['price_per_kg'])
-                material_cost = (weight / 1000) * filament_price_per_kg
-                print_time_cost = total_hours * machine_cost_per_hour
-                electricity_cost = (printer_power_watts / 1000) * total_hours * electricity_kwh_price
-                
-                subtotal = material_cost + print_time_cost + electricity_cost
-                margin_amount = subtotal * (profit_margin_percent / 100)
-                final_price = subtotal + margin_amount
+                result = engine.price(weight, total_hours, selected_filament, profit_margin_percent,
+                                      piece_name=piece_name.value or "Sin nombre")
+                material_cost = result["material_cost"]
+                print_time_cost = result["print_time_cost"]
+                electricity_cost = result["electricity_cost"]
+                subtotal = result["subtotal"]
+                margin_amount = result["margin_amount"]
+                final_price = result["final_price"]
 
                 currency_symbol = settings_manager.get('currency_symbol', '$')
                 
@@ -249,17 +249,7 @@ PRECIO FINAL: {currency_symbol}{final_price:.2f}"""
                 result_card.content.content.controls[2].value = result_text
                 result_card.visible = True
                 
-                current_quote_data = {
-                    "piece_name": piece_name.value or "Sin nombre",
-                    "weight_g": weight,
-                    "total_hours": total_hours,
-                    "filament_type": selected_filament,
-                    "material_cost": material_cost,
-                    "print_time_cost": print_time_cost,
-                    "electricity_cost": electricity_cost,
-                    "profit_margin_percent": profit_margin_percent,
-                    "final_price": final_price
-                }
+                current_quote_data = {field: result[field] for field in QUOTE_DATA_FIELDS}
 
                 page.update()
 
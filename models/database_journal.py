@@ -0,0 +1,105 @@
+import json
+import os
+from typing import List
+
+from models.database_mobile import Quote, DatabaseManager as JsonDatabaseManager
+from models.journal_store import JournalStore
+from utils.money import MONEY_FIELDS, records_from_minor
+
+
+class DatabaseManager(JsonDatabaseManager):
+    """Gestor de cotizaciones respaldado por un diario de solo-anexado.
+
+    Mantiene la misma API que `models.database_mobile.DatabaseManager`, pero
+    cada guardado o borrado escribe una única línea en lugar de reescribir
+    todo el archivo. Si el diario no existe todavía, se importan las
+    cotizaciones del archivo JSON heredado.
+    """
+    rewrites_on_save = False
+
+    def __init__(self, db_filename="quotes_mobile.journal", legacy_filename="quotes_mobile.json",
+                 compact_threshold: int = 1000):
+        self.legacy_filename = legacy_filename
+        self.journal = JournalStore(db_filename, compact_threshold=compact_threshold)
+        super().__init__(db_filename)
+
+    def load_quotes(self) -> List[Quote]:
+        """Reproduce el diario (o importa el JSON heredado) en memoria."""
+        try:
+            if not self.journal.exists() and self.legacy_filename and os.path.exists(self.legacy_filename):
+                return self._import_legacy_file()
+            records = self.journal.replay()
+            return [Quote.from_dict(record) for record in records.values()]
+        except (IOError, KeyError) as e:
+            print(f"Error al cargar cotizaciones: {e}")
+            return []
+
+    def _import_legacy_file(self) -> List[Quote]:
+        """Convierte el archivo JSON heredado en el primer diario."""
+        with open(self.legacy_filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # El JSON puede estar en unidades menores; el diario guarda importes float
+        records_from_minor(data, MONEY_FIELDS["quotes"])
+        quotes = [Quote.from_dict(quote_data) for quote_data in data]
+        self.journal.compact(lambda: [quote.to_dict() for quote in quotes])
+        return quotes
+
+    def save_quotes(self):
+        """Compacta el diario con el estado actual en memoria."""
+        return self.journal.compact(lambda: [quote.to_dict() for quote in self.quotes])
+
+    def save_quote(self, quote_data: dict) -> bool:
+        """Guarda una nueva cotización anexando una línea al diario"""
+        try:
+            quote = Quote(
+                piece_name=quote_data['piece_name'],
+                weight_g=quote_data['weight_g'],
+                total_hours=quote_data['total_hours'],
+                filament_type=quote_data['filament_type'],
+                material_cost=quote_data['material_cost'],
+                print_time_cost=quote_data['print_time_cost'],
+                electricity_cost=quote_data['electricity_cost'],
+                profit_margin_percent=quote_data['profit_margin_percent'],
+                final_price=quote_data['final_price']
+            )
+
+            self.quotes.append(quote)
+            self._index_add(quote)
+            saved = self.journal.append_put(quote.to_dict())
+            self._maybe_compact()
+            return saved
+        except Exception as e:
+            print(f"Error al guardar cotización: {e}")
+            return False
+
+    def delete_quote(self, quote_id: str) -> bool:
+        """Elimina una cotización anexando un borrado al diario"""
+        try:
+            removed = [q for q in self.quotes if q.id == quote_id]
+            if removed:
+                self.quotes = [q for q in self.quotes if q.id != quote_id]
+                for quote in removed:
+                    self._index_remove(quote)
+                deleted = self.journal.append_delete(quote_id)
+                self._maybe_compact()
+                return deleted
+            return False
+        except Exception as e:
+            print(f"Error al eliminar cotización: {e}")
+            return False
+
+    def _persist_batch(self, created: List[Quote] = (), updated: List[Quote] = (),
+                       deleted_ids: List[str] = ()) -> bool:
+        """Anexa el lote completo al diario en una sola escritura"""
+        saved = self.journal.append_many(
+            puts=[quote.to_dict() for quote in list(created) + list(updated)],
+            deletes=deleted_ids,
+            replaced=len(updated)
+        )
+        self._maybe_compact()
+        return saved
+
+    def _maybe_compact(self):
+        """Lanza la compactación en segundo plano si el diario creció demasiado."""
+        if self.journal.needs_compaction():
+            self.journal.compact_in_background(lambda: [quote.to_dict() for quote in self.quotes])
@@ -1,11 +1,34 @@
+import heapq
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import uuid
 
+from utils.money import MONEY_FIELDS, detect_minor_units, records_from_minor, records_to_minor
+from utils.persistence import atomic_write_json
+from utils.quote_columns import get_quote_columns
+from utils.prefix_index import DEFAULT_COMPLETIONS, get_quote_prefix_index
+from utils.query_planner import get_quote_indexes
+from utils.record_index import intern_value
+from utils.search_filter import SearchFilter
+from utils.text_index import get_quote_text_index
+from utils.trigram_index import DEFAULT_THRESHOLD, get_quote_trigram_index
+
+# Campos que un lote puede modificar en una cotización existente
+EDITABLE_QUOTE_FIELDS = (
+    'piece_name', 'weight_g', 'total_hours', 'filament_type', 'material_cost',
+    'print_time_cost', 'electricity_cost', 'profit_margin_percent', 'final_price'
+)
+
 class Quote:
     """Modelo simplificado para cotizaciones usando JSON"""
+    __slots__ = (
+        'id', 'piece_name', 'weight_g', 'total_hours', 'filament_type',
+        'material_cost', 'print_time_cost', 'electricity_cost',
+        'profit_margin_percent', 'final_price', 'created_at'
+    )
+    
     def __init__(self, piece_name: str, weight_g: float, total_hours: float, 
                  filament_type: str, material_cost: float, print_time_cost: float,
                  electricity_cost: float, profit_margin_percent: float, final_price: float):
@@ -13,7 +36,7 @@ class Quote:
         self.piece_name = piece_name
         self.weight_g = weight_g
         self.total_hours = total_hours
-        self.filament_type = filament_type
+        self.filament_type = intern_value(filament_type)
         self.material_cost = material_cost
         self.print_time_cost = print_time_cost
         self.electricity_cost = electricity_cost
@@ -43,35 +66,65 @@ class Quote:
     
     @classmethod
     def from_dict(cls, data: dict):
-        """Crea una cotización desde un diccionario"""
-        quote = cls(
-            piece_name=data['piece_name'],
-            weight_g=data['weight_g'],
-            total_hours=data['total_hours'],
-            filament_type=data['filament_type'],
-            material_cost=data['material_cost'],
-            print_time_cost=data['print_time_cost'],
-            electricity_cost=data['electricity_cost'],
-            profit_margin_percent=data['profit_margin_percent'],
-            final_price=data['final_price']
-        )
-        quote.id = data.get('id', quote.id)
-        quote.created_at = data.get('created_at', quote.created_at)
+        """Crea una cotización desde un diccionario sin pasar por el constructor"""
+        quote = cls.__new__(cls)
+        quote.id = data['id'] if 'id' in data else quote._generate_id()
+        quote.piece_name = data['piece_name']
+        quote.weight_g = data['weight_g']
+        quote.total_hours = data['total_hours']
+        quote.filament_type = intern_value(data['filament_type'])
+        quote.material_cost = data['material_cost']
+        quote.print_time_cost = data['print_time_cost']
+        quote.electricity_cost = data['electricity_cost']
+        quote.profit_margin_percent = data['profit_margin_percent']
+        quote.final_price = data['final_price']
+        quote.created_at = data['created_at'] if 'created_at' in data else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         return quote
 
 class DatabaseManager:
     """Gestor de base de datos compatible con móvil usando JSON"""
+    # Decimales si el archivo guarda importes en unidades menores (ver utils.money)
+    minor_units = None
+    # Cada lote reescribe el archivo completo: conviene agrupar las altas masivas
+    rewrites_on_save = True
     
     def __init__(self, db_filename="quotes_mobile.json"):
         self.db_filename = db_filename
+        self.indexes = []
         self.quotes = self.load_quotes()
     
+    def register_index(self, index):
+        """Registra un índice secundario que se mantiene en cada alta, cambio y baja.
+        
+        El índice debe ofrecer `rebuild(quotes)`, `add(quote)` y `remove(quote)`.
+        """
+        index.rebuild(self.get_all_quotes())
+        self.indexes.append(index)
+        return index
+    
+    def unregister_index(self, index):
+        """Deja de mantener un índice secundario"""
+        if index in self.indexes:
+            self.indexes.remove(index)
+    
+    def _index_add(self, quote: Quote):
+        """Añade una cotización a los índices registrados"""
+        for index in self.indexes:
+            index.add(quote)
+    
+    def _index_remove(self, quote: Quote):
+        """Quita una cotización de los índices registrados"""
+        for index in self.indexes:
+            index.remove(quote)
+    
     def load_quotes(self) -> List[Quote]:
         """Carga las cotizaciones desde el archivo JSON"""
         if os.path.exists(self.db_filename):
             try:
                 with open(self.db_filename, 'r', encoding='utf-8') as f:
                     data = json.load(f)
+                    self.minor_units = detect_minor_units(data)
+                    records_from_minor(data, MONEY_FIELDS["quotes"])
                     return [Quote.from_dict(quote_data) for quote_data in data]
             except (json.JSONDecodeError, IOError, KeyError) as e:
                 print(f"Error al cargar cotizaciones: {e}")
@@ -81,8 +134,8 @@ class DatabaseManager:
     def save_quotes(self):
         """Guarda las cotizaciones en el archivo JSON"""
         try:
-            with open(self.db_filename, 'w', encoding='utf-8') as f:
-                json.dump([quote.to_dict() for quote in self.quotes], f, indent=2, ensure_ascii=False)
+            data = records_to_minor([quote.to_dict() for quote in self.quotes], MONEY_FIELDS["quotes"], self.minor_units)
+            atomic_write_json(self.db_filename, data, ensure_ascii=False)
             return True
         except IOError as e:
             print(f"Error al guardar cotizaciones: {e}")
@@ -104,43 +157,128 @@ class DatabaseManager:
             )
             
             self.quotes.append(quote)
+            self._index_add(quote)
             return self.save_quotes()
         except Exception as e:
             print(f"Error al guardar cotización: {e}")
             return False
     
+    def save_many(self, quotes_data: Iterable[dict]) -> Tuple[List[Quote], List[str]]:
+        """Guarda varias cotizaciones nuevas escribiendo una sola vez"""
+        created, errors = [], []
+        for position, quote_data in enumerate(quotes_data, start=1):
+            try:
+                created.append(Quote(**{field: quote_data[field] for field in EDITABLE_QUOTE_FIELDS}))
+            except KeyError as e:
+                errors.append(f"Fila {position}: falta el campo {e}")
+        
+        if created:
+            self.quotes.extend(created)
+            for quote in created:
+                self._index_add(quote)
+            self._persist_batch(created=created)
+        return created, errors
+    
+    def update_many(self, updates: Dict[str, dict]) -> Tuple[int, List[str]]:
+        """Modifica varias cotizaciones (id -> campos) escribiendo una sola vez"""
+        by_id = {quote.id: quote for quote in self.quotes}
+        updated, errors = [], []
+        for quote_id, fields in updates.items():
+            quote = by_id.get(quote_id)
+            if quote is None:
+                errors.append(f"{quote_id}: no encontrada")
+                continue
+            self._index_remove(quote)
+            for field, value in fields.items():
+                if field in EDITABLE_QUOTE_FIELDS:
+                    setattr(quote, field, value)
+            self._index_add(quote)
+            updated.append(quote)
+        
+        if updated:
+            self._persist_batch(updated=updated)
+        return len(updated), errors
+    
+    def delete_many(self, quote_ids: Iterable[str]) -> Tuple[int, List[str]]:
+        """Elimina varias cotizaciones por ID escribiendo una sola vez"""
+        existing = {quote.id for quote in self.quotes}
+        to_delete, errors = set(), []
+        for quote_id in quote_ids:
+            if quote_id in existing:
+                to_delete.add(quote_id)
+            else:
+                errors.append(f"{quote_id}: no encontrada")
+        
+        if to_delete:
+            for quote in self.quotes:
+                if quote.id in to_delete:
+                    self._index_remove(quote)
+            self.quotes = [q for q in self.quotes if q.id not in to_delete]
+            self._persist_batch(deleted_ids=list(to_delete))
+        return len(to_delete), errors
+    
+    def _persist_batch(self, created: List[Quote] = (), updated: List[Quote] = (),
+                       deleted_ids: List[str] = ()) -> bool:
+        """Persiste un lote de cambios; el gestor JSON reescribe el archivo"""
+        return self.save_quotes()
+    
     def get_all_quotes(self) -> List[Quote]:
         """Obtiene todas las cotizaciones"""
         return self.quotes
     
     def get_recent_quotes(self, limit: int = 10) -> List[Quote]:
-        """Obtiene las cotizaciones más recientes"""
-        sorted_quotes = sorted(self.quotes, key=lambda q: q.created_at, reverse=True)
-        return sorted_quotes[:limit]
+        """Obtiene las cotizaciones más recientes leyendo el final del índice de fechas"""
+        by_date = get_quote_indexes(self).by_date
+        if len(by_date) != len(self.quotes):
+            # Hay fechas que no se pueden leer: ordenar como texto
+            return heapq.nlargest(limit, self.quotes, key=lambda q: q.created_at)
+        return by_date.largest(limit)
+    
+    def get_quotes_in_range(self, field: str, low=None, high=None) -> List[Quote]:
+        """Cotizaciones con `field` (created_at, final_price o total_hours) entre `low` y `high`, de menor a mayor
+        
+        Los límites son opcionales e inclusivos; las fechas pueden ser texto ISO.
+        """
+        indexes = get_quote_indexes(self)
+        index = indexes.index_for(field)
+        return index.range(*indexes.range_bounds(field, low, high))
+    
+    def get_filter_options(self) -> Dict[str, Any]:
+        """Rangos de fecha, precio y horas de las cotizaciones, desde los extremos de los índices"""
+        return SearchFilter.get_filter_options(self.quotes, get_quote_indexes(self))
     
     def delete_quote(self, quote_id: str) -> bool:
         """Elimina una cotización por ID"""
         try:
-            original_count = len(self.quotes)
-            self.quotes = [q for q in self.quotes if q.id != quote_id]
-            if len(self.quotes) < original_count:
+            removed = [q for q in self.quotes if q.id == quote_id]
+            if removed:
+                self.quotes = [q for q in self.quotes if q.id != quote_id]
+                for quote in removed:
+                    self._index_remove(quote)
                 return self.save_quotes()
             return False
         except Exception as e:
             print(f"Error al eliminar cotización: {e}")
             return False
     
-    def search_quotes(self, search_term: str) -> List[Quote]:
-        """Busca cotizaciones por nombre de pieza"""
-        search_term = search_term.lower()
-        return [
-            quote for quote in self.quotes 
-            if search_term in quote.piece_name.lower() or search_term in quote.filament_type.lower()
-        ]
+    def search_quotes(self, search_term: str, mode: str = "and") -> List[Quote]:
+        """Busca cotizaciones por nombre de pieza o filamento, de la más a la menos relevante"""
+        if not search_term.strip():
+            return list(self.quotes)
+        return get_quote_text_index(self).search(search_term, mode)
+    
+    def fuzzy_search_quotes(self, search_term: str, threshold: float = DEFAULT_THRESHOLD) -> List[Quote]:
+        """Busca cotizaciones por nombre de pieza tolerando errores de tipeo, de la más a la menos parecida"""
+        return get_quote_trigram_index(self).search(search_term, threshold)
+    
+    def complete_quotes(self, prefix: str, limit: int = DEFAULT_COMPLETIONS) -> List[Quote]:
+        """Cotizaciones cuyo nombre de pieza tiene una palabra que empieza por `prefix` (autocompletado)"""
+        return get_quote_prefix_index(self).complete(prefix, limit)
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Obtiene estadísticas básicas"""
-        if not self.quotes:
+        """Obtiene estadísticas básicas sobre la tabla columnar de cotizaciones"""
+        columns = get_quote_columns(self)
+        if not len(columns):
             return {
                 'total_quotes': 0,
                 'total_revenue': 0,
@@ -148,27 +286,25 @@ class DatabaseManager:
                 'most_used_filament': 'N/A'
             }
         
-        total_revenue = sum(quote.final_price for quote in self.quotes)
-        avg_price = total_revenue / len(self.quotes)
-        
-        # Filamento más usado
-        filament_counts = {}
-        for quote in self.quotes:
-            filament = quote.filament_type
-            filament_counts[filament] = filament_counts.get(filament, 0) + 1
-        
-        most_used_filament = max(filament_counts.items(), key=lambda x: x[1])[0] if filament_counts else 'N/A'
+        total_quotes = len(columns)
+        total_revenue = columns.sum('final_price')
         
         return {
-            'total_quotes': len(self.quotes),
+            'total_quotes': total_quotes,
             'total_revenue': total_revenue,
-            'avg_price': avg_price,
-            'most_used_filament': most_used_filament
+            'avg_price': total_revenue / total_quotes,
+            'most_used_filament': columns.most_common_category() or 'N/A'
         }
 
 # Mantener compatibilidad con el código existente
-def get_db():
-    """Función para mantener compatibilidad"""
+def get_db(backend: str = "json"):
+    """Devuelve el gestor de cotizaciones del backend indicado ("json", "journal" o "sqlite")"""
+    if backend == "sqlite":
+        from models.database_sqlite import DatabaseManager as SqliteDatabaseManager
+        return SqliteDatabaseManager()
+    if backend == "journal":
+        from models.database_journal import DatabaseManager as JournalDatabaseManager
+        return JournalDatabaseManager()
     return DatabaseManager()
 
 def create_tables():
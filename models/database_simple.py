@@ -3,6 +3,8 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any
 
+from utils.persistence import atomic_write_json
+
 class Quote:
     """Modelo simple para una cotización"""
     def __init__(self, piece_name: str, weight_g: float, total_hours: float, 
@@ -81,8 +83,7 @@ class DatabaseManager:
     def save_quotes(self):
         """Guarda las cotizaciones en el archivo JSON"""
         try:
-            with open(self.db_filename, 'w', encoding='utf-8') as f:
-                json.dump([quote.to_dict() for quote in self.quotes], f, indent=2, ensure_ascii=False)
+            atomic_write_json(self.db_filename, [quote.to_dict() for quote in self.quotes], ensure_ascii=False)
             return True
         except IOError as e:
             print(f"Error al guardar cotizaciones: {e}")
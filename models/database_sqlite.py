@@ -0,0 +1,460 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Tuple
+
+from models.database_mobile import EDITABLE_QUOTE_FIELDS, Quote
+from utils.money import MONEY_FIELDS, records_from_minor
+from utils.prefix_index import DEFAULT_COMPLETIONS, get_quote_prefix_index
+from utils.query_planner import parse_timestamp
+from utils.text_index import QUOTE_SEARCH_FIELDS, TextIndex, record_terms, tokenize
+from utils.trigram_index import DEFAULT_THRESHOLD, get_quote_trigram_index
+
+QUOTE_COLUMNS = [
+    'id', 'piece_name', 'weight_g', 'total_hours', 'filament_type',
+    'material_cost', 'print_time_cost', 'electricity_cost',
+    'profit_margin_percent', 'final_price', 'created_at'
+]
+
+# Columna con índice de cada campo por el que se consultan rangos
+RANGE_COLUMNS = {
+    'created_at': 'created_at', 'final_price': 'final_price',
+    'total_hours': 'total_hours', 'print_time': 'total_hours'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    id TEXT PRIMARY KEY,
+    piece_name TEXT NOT NULL,
+    weight_g REAL NOT NULL,
+    total_hours REAL NOT NULL,
+    filament_type TEXT NOT NULL,
+    material_cost REAL NOT NULL,
+    print_time_cost REAL NOT NULL,
+    electricity_cost REAL NOT NULL,
+    profit_margin_percent REAL NOT NULL,
+    final_price REAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_created_at ON quotes (created_at);
+CREATE INDEX IF NOT EXISTS idx_quotes_filament_type ON quotes (filament_type);
+DROP INDEX IF EXISTS idx_quotes_piece_name;
+CREATE INDEX IF NOT EXISTS idx_quotes_final_price ON quotes (final_price);
+CREATE INDEX IF NOT EXISTS idx_quotes_total_hours ON quotes (total_hours);
+CREATE TABLE IF NOT EXISTS quote_terms (
+    term TEXT NOT NULL,
+    quote_id TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, quote_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_quote_terms_quote_id ON quote_terms (quote_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Clave de `meta` que indica que `quote_terms` está al día con `quotes`
+TERMS_META_KEY = "quote_terms"
+
+# Mayor que cualquier carácter: `term < prefijo + _MAX_CHAR` acota los que empiezan por el prefijo
+_MAX_CHAR = "\U0010ffff"
+
+# Parámetros por consulta `IN (...)` (el mínimo que admite SQLite es 999)
+_IN_CHUNK = 900
+
+
+class DatabaseManager:
+    """Gestor de cotizaciones sobre SQLite (modo WAL) con la API de database_mobile"""
+
+    def __init__(self, db_filename="quotes_mobile.db", legacy_filename="quotes_mobile.json"):
+        self.db_filename = db_filename
+        self.legacy_filename = legacy_filename
+        self._lock = threading.RLock()
+        self.indexes = []
+        self.connection = sqlite3.connect(db_filename, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        if self.connection.execute("SELECT 1 FROM meta WHERE key = ?", (TERMS_META_KEY,)).fetchone() is None:
+            # Base creada antes de la tabla de términos: indexar el historial una vez
+            self._rebuild_terms()
+        if legacy_filename and os.path.exists(legacy_filename):
+            migrate_json_to_sqlite(legacy_filename, self)
+
+    @property
+    def quotes(self) -> List[Quote]:
+        """Compatibilidad con el atributo `quotes` del gestor JSON."""
+        return self.get_all_quotes()
+
+    def register_index(self, index):
+        """Registra un índice secundario que se mantiene en cada alta, cambio y baja.
+
+        El índice debe ofrecer `rebuild(quotes)`, `add(quote)` y `remove(quote)`.
+        """
+        with self._lock:
+            index.rebuild(self.get_all_quotes())
+            self.indexes.append(index)
+        return index
+
+    def unregister_index(self, index):
+        """Deja de mantener un índice secundario"""
+        with self._lock:
+            if index in self.indexes:
+                self.indexes.remove(index)
+
+    def _index_add(self, quote: Quote):
+        """Añade una cotización a los índices registrados"""
+        for index in self.indexes:
+            index.add(quote)
+
+    def _index_remove(self, quote: Quote):
+        """Quita una cotización de los índices registrados"""
+        for index in self.indexes:
+            index.remove(quote)
+
+    def _index_rebuild(self):
+        """Reconstruye los índices registrados desde la tabla"""
+        if self.indexes:
+            quotes = self.get_all_quotes()
+            for index in self.indexes:
+                index.rebuild(quotes)
+
+    def _write_terms(self, quotes: Iterable[Quote]):
+        """Reescribe los términos de búsqueda de las cotizaciones sin confirmar la transacción.
+
+        Los términos son las palabras normalizadas (sin acentos ni mayúsculas)
+        de `QUOTE_SEARCH_FIELDS`, las mismas que indexa `TextIndex`.
+        """
+        quotes = list(quotes)
+        self.connection.executemany(
+            "DELETE FROM quote_terms WHERE quote_id = ?", [(quote.id,) for quote in quotes]
+        )
+        self.connection.executemany(
+            "INSERT INTO quote_terms (term, quote_id, count) VALUES (?, ?, ?)",
+            [(term, quote.id, count) for quote in quotes
+             for term, count in record_terms(quote, QUOTE_SEARCH_FIELDS).items()]
+        )
+
+    def _rebuild_terms(self):
+        """Recalcula la tabla de términos desde la tabla de cotizaciones."""
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM quote_terms")
+            self._write_terms(self.get_all_quotes())
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (TERMS_META_KEY, "1")
+            )
+
+    def _get_quote(self, quote_id: str):
+        """Obtiene una cotización por ID o None"""
+        row = self.connection.execute("SELECT * FROM quotes WHERE id = ?", (quote_id,)).fetchone()
+        return self._row_to_quote(row) if row else None
+
+    def _row_to_quote(self, row) -> Quote:
+        """Convierte una fila de la tabla en una cotización."""
+        return Quote.from_dict(dict(row))
+
+    def _insert(self, quote: Quote):
+        """Inserta una cotización sin confirmar la transacción."""
+        data = quote.to_dict()
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO quotes ({', '.join(QUOTE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in QUOTE_COLUMNS)})",
+            [data[column] for column in QUOTE_COLUMNS]
+        )
+        self._write_terms([quote])
+
+    def save_quote(self, quote_data: dict) -> bool:
+        """Guarda una nueva cotización"""
+        try:
+            quote = Quote(
+                piece_name=quote_data['piece_name'],
+                weight_g=quote_data['weight_g'],
+                total_hours=quote_data['total_hours'],
+                filament_type=quote_data['filament_type'],
+                material_cost=quote_data['material_cost'],
+                print_time_cost=quote_data['print_time_cost'],
+                electricity_cost=quote_data['electricity_cost'],
+                profit_margin_percent=quote_data['profit_margin_percent'],
+                final_price=quote_data['final_price']
+            )
+            with self._lock:
+                with self.connection:
+                    self._insert(quote)
+                self._index_add(quote)
+            return True
+        except Exception as e:
+            print(f"Error al guardar cotización: {e}")
+            return False
+
+    def save_many(self, quotes_data: Iterable[dict]) -> Tuple[List[Quote], List[str]]:
+        """Guarda varias cotizaciones nuevas en una sola transacción"""
+        created, errors = [], []
+        for position, quote_data in enumerate(quotes_data, start=1):
+            try:
+                created.append(Quote(**{field: quote_data[field] for field in EDITABLE_QUOTE_FIELDS}))
+            except KeyError as e:
+                errors.append(f"Fila {position}: falta el campo {e}")
+
+        if created:
+            rows = [[quote.to_dict()[column] for column in QUOTE_COLUMNS] for quote in created]
+            with self._lock:
+                with self.connection:
+                    self.connection.executemany(
+                        f"INSERT OR REPLACE INTO quotes ({', '.join(QUOTE_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' for _ in QUOTE_COLUMNS)})",
+                        rows
+                    )
+                    self._write_terms(created)
+                for quote in created:
+                    self._index_add(quote)
+        return created, errors
+
+    def update_many(self, updates: Dict[str, dict]) -> Tuple[int, List[str]]:
+        """Modifica varias cotizaciones (id -> campos) en una sola transacción"""
+        updated, errors = 0, []
+        changed = []
+        retexted = []
+        with self._lock, self.connection:
+            for quote_id, fields in updates.items():
+                columns = [field for field in fields if field in EDITABLE_QUOTE_FIELDS]
+                if not columns:
+                    exists = self.connection.execute(
+                        "SELECT 1 FROM quotes WHERE id = ?", (quote_id,)
+                    ).fetchone()
+                    if exists:
+                        updated += 1
+                    else:
+                        errors.append(f"{quote_id}: no encontrada")
+                    continue
+                old_quote = self._get_quote(quote_id) if self.indexes else None
+                cursor = self.connection.execute(
+                    f"UPDATE quotes SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                    [fields[column] for column in columns] + [quote_id]
+                )
+                if cursor.rowcount:
+                    updated += 1
+                    if old_quote is not None:
+                        changed.append((old_quote, self._get_quote(quote_id)))
+                    if any(column in QUOTE_SEARCH_FIELDS for column in columns):
+                        retexted.append(quote_id)
+                else:
+                    errors.append(f"{quote_id}: no encontrada")
+            if retexted:
+                new_quotes = {new_quote.id: new_quote for _, new_quote in changed}
+                self._write_terms(new_quotes.get(quote_id) or self._get_quote(quote_id)
+                                  for quote_id in retexted)
+            for old_quote, new_quote in changed:
+                self._index_remove(old_quote)
+                self._index_add(new_quote)
+        return updated, errors
+
+    def delete_many(self, quote_ids: Iterable[str]) -> Tuple[int, List[str]]:
+        """Elimina varias cotizaciones por ID en una sola transacción"""
+        deleted, errors = 0, []
+        with self._lock, self.connection:
+            for quote_id in dict.fromkeys(quote_ids):
+                old_quote = self._get_quote(quote_id) if self.indexes else None
+                cursor = self.connection.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
+                if cursor.rowcount:
+                    self.connection.execute("DELETE FROM quote_terms WHERE quote_id = ?", (quote_id,))
+                    deleted += 1
+                    if old_quote is not None:
+                        self._index_remove(old_quote)
+                else:
+                    errors.append(f"{quote_id}: no encontrada")
+        return deleted, errors
+
+    def get_all_quotes(self) -> List[Quote]:
+        """Obtiene todas las cotizaciones en orden de inserción"""
+        with self._lock:
+            rows = self.connection.execute("SELECT * FROM quotes ORDER BY rowid").fetchall()
+        return [self._row_to_quote(row) for row in rows]
+
+    def get_recent_quotes(self, limit: int = 10) -> List[Quote]:
+        """Obtiene las cotizaciones más recientes usando el índice de fecha"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT * FROM quotes ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_quote(row) for row in rows]
+
+    def get_quotes_in_range(self, field: str, low=None, high=None) -> List[Quote]:
+        """Cotizaciones con `field` (created_at, final_price o total_hours) entre `low` y `high`, de menor a mayor
+
+        Los límites son opcionales e inclusivos; las fechas pueden ser texto ISO.
+        """
+        if field not in RANGE_COLUMNS:
+            raise ValueError(f"Campo sin índice ordenado: {field}")
+        column = RANGE_COLUMNS[field]
+        conditions, params = [], []
+        for operator, bound in ((">=", low), ("<=", high)):
+            if column == 'created_at' and bound is not None:
+                # Las fechas se guardan como "AAAA-MM-DD HH:MM:SS"; comparar con el mismo formato
+                bound = parse_timestamp(bound)
+                bound = bound.isoformat(sep=" ") if bound is not None else None
+            if bound is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(bound)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT * FROM quotes {where}ORDER BY {column}, rowid", params
+            ).fetchall()
+        return [self._row_to_quote(row) for row in rows]
+
+    def get_filter_options(self) -> Dict[str, Any]:
+        """Rangos de fecha, precio y horas con MIN/MAX sobre los índices de la tabla"""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT (SELECT MIN(created_at) FROM quotes), (SELECT MAX(created_at) FROM quotes), "
+                "(SELECT MIN(final_price) FROM quotes), (SELECT MAX(final_price) FROM quotes), "
+                "(SELECT MIN(total_hours) FROM quotes), (SELECT MAX(total_hours) FROM quotes)"
+            ).fetchone()
+        min_date, max_date = parse_timestamp(row[0]), parse_timestamp(row[1])
+        return {
+            "date_range": {
+                "min": min_date.isoformat() if min_date else None,
+                "max": max_date.isoformat() if max_date else None
+            },
+            "price_range": {"min": row[2] or 0, "max": row[3] or 0},
+            "time_range": {"min": row[4] or 0, "max": row[5] or 0}
+        }
+
+    def delete_quote(self, quote_id: str) -> bool:
+        """Elimina una cotización por ID"""
+        try:
+            with self._lock:
+                old_quote = self._get_quote(quote_id) if self.indexes else None
+                with self.connection:
+                    cursor = self.connection.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
+                    self.connection.execute("DELETE FROM quote_terms WHERE quote_id = ?", (quote_id,))
+                if cursor.rowcount and old_quote is not None:
+                    self._index_remove(old_quote)
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error al eliminar cotización: {e}")
+            return False
+
+    def search_quotes(self, search_term: str, mode: str = "and") -> List[Quote]:
+        """Busca cotizaciones por nombre de pieza o filamento, de la más a la menos relevante
+
+        Mismo significado que el gestor JSON: cada término coincide con las
+        palabras que empiezan por él, sin acentos ni mayúsculas, y con
+        `mode="or"` basta con uno. Cada término es una consulta por rango
+        sobre la clave primaria de `quote_terms`; el orden lo calcula
+        `TextIndex` con esos postings.
+        """
+        terms = list(dict.fromkeys(tokenize(search_term)))
+        if not terms:
+            return self.get_all_quotes()
+        postings: Dict[str, Dict[str, int]] = {}
+        order: Dict[str, int] = {}
+        with self._lock:
+            total = self.connection.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
+            for term in terms:
+                rows = self.connection.execute(
+                    "SELECT t.term, t.quote_id, t.count, q.rowid FROM quote_terms t "
+                    "JOIN quotes q ON q.id = t.quote_id WHERE t.term >= ? AND t.term < ?",
+                    (term, term + _MAX_CHAR)
+                )
+                for token, quote_id, count, rowid in rows:
+                    postings.setdefault(token, {})[quote_id] = count
+                    order[quote_id] = rowid
+            index = TextIndex.from_postings(QUOTE_SEARCH_FIELDS, postings, order, total)
+            ids = index.search_ids(search_term, mode)
+            quotes = self._get_quotes(ids)
+        return [quotes[quote_id] for quote_id in ids]
+
+    def _get_quotes(self, quote_ids: List[str]) -> Dict[str, Quote]:
+        """Cotizaciones por ID (id -> cotización), consultando por bloques"""
+        quotes = {}
+        for start in range(0, len(quote_ids), _IN_CHUNK):
+            chunk = quote_ids[start:start + _IN_CHUNK]
+            rows = self.connection.execute(
+                f"SELECT * FROM quotes WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+            ).fetchall()
+            for row in rows:
+                quote = self._row_to_quote(row)
+                quotes[quote.id] = quote
+        return quotes
+
+    def fuzzy_search_quotes(self, search_term: str, threshold: float = DEFAULT_THRESHOLD) -> List[Quote]:
+        """Busca cotizaciones por nombre de pieza tolerando errores de tipeo, de la más a la menos parecida"""
+        return get_quote_trigram_index(self).search(search_term, threshold)
+
+    def complete_quotes(self, prefix: str, limit: int = DEFAULT_COMPLETIONS) -> List[Quote]:
+        """Cotizaciones cuyo nombre de pieza tiene una palabra que empieza por `prefix` (autocompletado)"""
+        return get_quote_prefix_index(self).complete(prefix, limit)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Obtiene estadísticas básicas con agregados SQL"""
+        with self._lock:
+            total_quotes, total_revenue = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(final_price), 0) FROM quotes"
+            ).fetchone()
+            most_used = self.connection.execute(
+                "SELECT filament_type FROM quotes GROUP BY filament_type "
+                "ORDER BY COUNT(*) DESC, MIN(rowid) ASC LIMIT 1"
+            ).fetchone()
+
+        if not total_quotes:
+            return {
+                'total_quotes': 0,
+                'total_revenue': 0,
+                'avg_price': 0,
+                'most_used_filament': 'N/A'
+            }
+
+        return {
+            'total_quotes': total_quotes,
+            'total_revenue': total_revenue,
+            'avg_price': total_revenue / total_quotes,
+            'most_used_filament': most_used[0] if most_used else 'N/A'
+        }
+
+    def close(self):
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            self.connection.close()
+
+
+def migrate_json_to_sqlite(json_filename: str, db_manager: DatabaseManager, force: bool = False) -> int:
+    """Importa una sola vez las cotizaciones de un archivo JSON a SQLite.
+
+    Devuelve el número de cotizaciones importadas (0 si ya se migró antes).
+    """
+    migration_key = f"migrated:{os.path.abspath(json_filename)}"
+    connection = db_manager.connection
+    with db_manager._lock:
+        already_migrated = connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (migration_key,)
+        ).fetchone()
+        if already_migrated and not force:
+            return 0
+
+        try:
+            with open(json_filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error al leer cotizaciones para migrar: {e}")
+            return 0
+        # El JSON puede estar en unidades menores; SQLite guarda importes float
+        records_from_minor(data, MONEY_FIELDS["quotes"])
+
+        imported = 0
+        with connection:
+            for quote_data in data:
+                try:
+                    db_manager._insert(Quote.from_dict(quote_data))
+                    imported += 1
+                except KeyError as e:
+                    print(f"Cotización omitida en la migración, falta el campo {e}")
+            connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (migration_key, str(imported))
+            )
+        db_manager._index_rebuild()
+        return imported
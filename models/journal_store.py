@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+from typing import Dict, Any, Callable, Iterable, Optional
+
+
+class JournalStore:
+    """Almacén de solo-anexado: una línea JSON por inserción o borrado.
+
+    El estado vivo se reconstruye reproduciendo el diario al cargar. Cuando
+    el diario acumula demasiadas operaciones obsoletas se compacta en un
+    hilo en segundo plano sin bloquear las escrituras.
+    """
+
+    def __init__(self, journal_filename: str, compact_threshold: int = 1000):
+        self.journal_filename = journal_filename
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        # Una sola compactación a la vez (síncrona o en segundo plano)
+        self._compaction_lock = threading.Lock()
+        self._op_count = 0
+        self._live_count = 0
+        self._pending_ops = None  # Operaciones anexadas durante una compactación
+        self._compaction_thread = None
+
+    def exists(self) -> bool:
+        """Indica si el archivo de diario existe."""
+        return os.path.exists(self.journal_filename)
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Reproduce el diario y devuelve los registros vivos en orden de inserción."""
+        records: Dict[str, Dict[str, Any]] = {}
+        op_count = 0
+        if not self.exists():
+            return records
+
+        with open(self.journal_filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Una línea truncada por un cierre abrupto se descarta
+                    continue
+                op_count += 1
+                if entry.get('op') == 'put':
+                    record = entry['record']
+                    records.pop(record['id'], None)
+                    records[record['id']] = record
+                elif entry.get('op') == 'del':
+                    records.pop(entry['id'], None)
+
+        with self._lock:
+            self._op_count = op_count
+            self._live_count = len(records)
+        return records
+
+    def append_put(self, record: Dict[str, Any]) -> bool:
+        """Anexa la inserción (o reemplazo) de un registro."""
+        with self._lock:
+            self._live_count += 1
+        return self._append({'op': 'put', 'record': record})
+
+    def append_delete(self, record_id: str) -> bool:
+        """Anexa el borrado de un registro."""
+        with self._lock:
+            self._live_count = max(self._live_count - 1, 0)
+        return self._append({'op': 'del', 'id': record_id})
+
+    def append_many(self, puts: Iterable[Dict[str, Any]] = (), deletes: Iterable[str] = (),
+                    replaced: int = 0) -> bool:
+        """Anexa varias operaciones con una sola escritura.
+
+        `replaced` indica cuántos de los registros de `puts` ya existían.
+        """
+        entries = [{'op': 'put', 'record': record} for record in puts]
+        put_count = len(entries)
+        entries.extend({'op': 'del', 'id': record_id} for record_id in deletes)
+        if not entries:
+            return True
+        with self._lock:
+            delta = put_count - replaced - (len(entries) - put_count)
+            self._live_count = max(self._live_count + delta, 0)
+        return self._append(*entries)
+
+    def _append(self, *entries: Dict[str, Any]) -> bool:
+        """Escribe una o varias operaciones al final del diario."""
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries]
+        try:
+            with self._lock:
+                with open(self.journal_filename, 'a', encoding='utf-8') as f:
+                    f.write("".join(lines))
+                self._op_count += len(lines)
+                if self._pending_ops is not None:
+                    self._pending_ops.extend(lines)
+            return True
+        except IOError as e:
+            print(f"Error al escribir en el diario: {e}")
+            return False
+
+    def needs_compaction(self) -> bool:
+        """Indica si el diario supera el umbral de operaciones obsoletas."""
+        with self._lock:
+            stale_ops = self._op_count - self._live_count
+            return stale_ops >= self.compact_threshold and stale_ops > self._live_count
+
+    def compact(self, records_provider: Callable[[], Iterable[Dict[str, Any]]]) -> bool:
+        """Reescribe el diario con una inserción por registro vivo.
+
+        `records_provider` se invoca bajo el candado del diario y debe devolver
+        los registros vivos como diccionarios. Si ya hay otra compactación en
+        curso, espera a que termine antes de empezar.
+        """
+        with self._compaction_lock:
+            return self._compact(records_provider)
+
+    def _compact(self, records_provider: Callable[[], Iterable[Dict[str, Any]]]) -> bool:
+        """Compacta el diario; se llama con el candado de compactación tomado."""
+        temp_filename = f"{self.journal_filename}.{os.getpid()}.{threading.get_ident()}.compact"
+        with self._lock:
+            snapshot = list(records_provider())
+            self._live_count = len(snapshot)
+            self._pending_ops = []
+        try:
+            with open(temp_filename, 'w', encoding='utf-8') as f:
+                for record in snapshot:
+                    f.write(json.dumps({'op': 'put', 'record': record}, ensure_ascii=False) + "\n")
+            with self._lock:
+                # Copiar las operaciones que llegaron mientras se escribía la instantánea
+                with open(temp_filename, 'a', encoding='utf-8') as f:
+                    f.writelines(self._pending_ops)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_filename, self.journal_filename)
+                self._op_count = len(snapshot) + len(self._pending_ops)
+                self._pending_ops = None
+            return True
+        except (IOError, OSError) as e:
+            print(f"Error al compactar el diario: {e}")
+            with self._lock:
+                self._pending_ops = None
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            return False
+
+    def compact_in_background(self, records_provider) -> Optional[threading.Thread]:
+        """Lanza una compactación en segundo plano si no hay otra en curso."""
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return None
+            self._compaction_thread = threading.Thread(
+                target=self.compact,
+                args=(records_provider,),
+                name="journal-compaction",
+                daemon=True
+            )
+            self._compaction_thread.start()
+            return self._compaction_thread
+
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        """Espera a que termine la compactación en curso, si la hay."""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
@@ -1,21 +1,105 @@
 import json
 import os
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
+
+from utils.persistence import atomic_write_json
+from utils.pricing_engine import PricingEngine
+
+
+def _freeze(value):
+    """Copia profunda de solo lectura: dicts como MappingProxyType, listas como tuplas."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """Inverso de `_freeze`: devuelve dicts y listas modificables."""
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class SettingsSnapshot:
+    """Configuración vigente congelada, con su número de versión.
+
+    Es inmutable: un cambio de configuración publica una instantánea nueva
+    con versión mayor, así que la versión sirve como clave de caché. Los
+    precios de filamento ya vienen resueltos a float y el `PricingEngine`
+    se crea una sola vez por versión.
+    """
+
+    __slots__ = ("version", "values", "filament_prices", "_pricing_engine")
+
+    def __init__(self, version: int, settings: Dict[str, Any]):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "values", _freeze(settings))
+        object.__setattr__(self, "filament_prices", MappingProxyType({
+            name: float(info['price_per_kg'])
+            for name, info in settings.get('filaments', {}).items()
+            if isinstance(info, dict) and 'price_per_kg' in info
+        }))
+        object.__setattr__(self, "_pricing_engine", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("La instantánea de configuración es de solo lectura")
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copia modificable de la configuración (para editarla y guardarla)."""
+        return _thaw(self.values)
+
+    @property
+    def pricing_engine(self) -> PricingEngine:
+        """Motor de precios con los valores de esta versión (se crea una vez)."""
+        if self._pricing_engine is None:
+            engine = PricingEngine(
+                float(self.values['machine_cost_per_hour']),
+                float(self.values['electricity_kwh_price']),
+                int(self.values['printer_power_watts']),
+                self.filament_prices
+            )
+            object.__setattr__(self, "_pricing_engine", engine)
+        return self._pricing_engine
+
 
 class SettingsManager:
-    def __init__(self, settings_file='settings.json'):
+    def __init__(self, settings_file='settings.json', check_interval=1.0):
         self.settings_file = settings_file
+        # Cada cuánto (segundos) `snapshot` vuelve a mirar si el archivo cambió
+        self.check_interval = check_interval
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._version = 0
+        self._last_check = 0.0
         
         # Definir monedas disponibles
         self.currencies = {
             "USD": {
                 "symbol": "$",
                 "name": "Dólares (USD)",
-                "code": "USD"
+                "code": "USD",
+                "decimals": 2
             },
             "ARS": {
                 "symbol": "$",
                 "name": "Pesos Argentinos (ARS)", 
-                "code": "ARS"
+                "code": "ARS",
+                "decimals": 2
             }
         }
         
@@ -27,6 +111,7 @@ class SettingsManager:
             "machine_cost_per_hour": 0.50,
             "electricity_kwh_price": 0.15,
             "printer_power_watts": 150,
+            "storage_backend": "json",  # json, journal, sqlite
             "filaments": {
                 "PLA": {"price_per_kg": 25.00},
                 "PETG": {"price_per_kg": 30.00},
@@ -37,6 +122,8 @@ class SettingsManager:
             }
         }
         self.settings = self.load_settings()
+        if self._snapshot is None:
+            self._publish(self._file_signature())
 
     def load_settings(self):
         if os.path.exists(self.settings_file):
@@ -50,11 +137,49 @@ class SettingsManager:
             return self.default_settings
 
     def save_settings(self, settings_data):
-        with open(self.settings_file, 'w') as f:
-            json.dump(settings_data, f, indent=4)
+        atomic_write_json(self.settings_file, settings_data, indent=4)
         self.settings = settings_data
+        self._publish(self._file_signature())
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        """(mtime en ns, tamaño) del archivo de configuración; None si no existe."""
+        try:
+            stat = os.stat(self.settings_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _publish(self, signature):
+        """Publica una instantánea nueva de `self.settings`."""
+        self._version += 1
+        self._snapshot = SettingsSnapshot(self._version, self.settings)
+        self._signature = signature
+        self._last_check = time.monotonic()
+
+    @property
+    def version(self) -> int:
+        """Versión de la configuración vigente; aumenta con cada cambio."""
+        return self.snapshot().version
+
+    def snapshot(self) -> SettingsSnapshot:
+        """Devuelve la configuración vigente sin leer el archivo si no cambió.
+
+        Como mucho una vez cada `check_interval` segundos se compara el mtime
+        y el tamaño de `settings.json`; solo si difieren se vuelve a leer.
+        Los cambios hechos con `set` o `save_settings` se publican al momento.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return self._snapshot
+        self._last_check = now
+        signature = self._file_signature()
+        if signature != self._signature:
+            self.settings = self.load_settings()
+            self._publish(self._file_signature())
+        return self._snapshot
 
     def get(self, key, default=None):
+        self.snapshot()
         return self.settings.get(key, default)
     
     def set(self, key, value):
@@ -78,6 +203,11 @@ class SettingsManager:
         currency_code = self.settings.get("currency", "USD")
         return self.currencies.get(currency_code, self.currencies["USD"])
     
+    def get_currency_decimals(self, currency_code=None):
+        """Decimales de la unidad menor de una moneda (por defecto, la actual)"""
+        currency_code = currency_code or self.settings.get("currency", "USD")
+        return self.currencies.get(currency_code, self.currencies["USD"]).get("decimals", 2)
+    
     def get_available_currencies(self):
         """Obtiene lista de monedas disponibles"""
         return self.currencies
@@ -8,8 +8,11 @@ import os
 def test_module_import(module_name):
     """Prueba la importación de un módulo específico"""
     try:
-        # Añadir el directorio utils al path
-        utils_path = os.path.join(os.path.dirname(__file__), '..', 'utils')
+        # Añadir la raíz del proyecto y el directorio utils al path
+        root_path = os.path.join(os.path.dirname(__file__), '..')
+        if root_path not in sys.path:
+            sys.path.insert(0, root_path)
+        utils_path = os.path.join(root_path, 'utils')
         if utils_path not in sys.path:
             sys.path.insert(0, utils_path)
         
@@ -34,7 +37,25 @@ def main():
         'printer_manager',
         'task_manager',
         'budget_manager',
-        'analytics'
+        'analytics',
+        'record_index',
+        'persistence',
+        'bulk_operations',
+        'unit_of_work',
+        'quote_columns',
+        'pricing_engine',
+        'bulk_quote',
+        'parallel_pricing',
+        'repricing',
+        'sensitivity',
+        'pricing_solver',
+        'quote_cache',
+        'money',
+        'text_index',
+        'trigram_index',
+        'prefix_index',
+        'debounce',
+        'query_planner'
     ]
     
     passed = 0
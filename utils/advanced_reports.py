@@ -3,53 +3,49 @@ import csv
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
+from utils.money import from_minor, to_minor
+from utils.quote_columns import get_quote_columns
+
 class AdvancedReports:
     def __init__(self, db_manager):
         self.db_manager = db_manager
     
     def generate_profitability_analysis(self, start_date=None, end_date=None):
         """Genera un análisis de rentabilidad detallado."""
-        quotes = self.db_manager.get_all_quotes()
+        columns = get_quote_columns(self.db_manager)
         
         # Filtrar por fechas si se proporcionan
-        if start_date:
-            quotes = [q for q in quotes if q.created_at >= start_date]
-        if end_date:
-            quotes = [q for q in quotes if q.created_at <= end_date]
+        mask = columns.select(start_date, end_date)
+        quote_count = columns.count(mask)
         
-        if not quotes:
+        if not quote_count:
             return {"error": "No hay datos para el período especificado"}
         
-        # Calcular métricas
-        total_revenue = sum(q.final_price for q in quotes)
-        total_cost = sum(q.total_cost for q in quotes)
+        # Calcular métricas en una sola pasada vectorizada
+        totals = columns.sums(("final_price", "total_cost", "total_hours", "weight_g"), mask)
+        total_revenue = totals["final_price"]
+        total_cost = totals["total_cost"]
         total_profit = total_revenue - total_cost
         profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
         
         # Calcular por tipo de filamento
-        filament_stats = {}
-        for quote in quotes:
-            filament = getattr(quote, 'filament_type', 'Desconocido')
-            if filament not in filament_stats:
-                filament_stats[filament] = {
-                    "count": 0,
-                    "revenue": 0,
-                    "cost": 0,
-                    "profit": 0
-                }
-            
-            filament_stats[filament]["count"] += 1
-            filament_stats[filament]["revenue"] += quote.final_price
-            filament_stats[filament]["cost"] += quote.total_cost
-            filament_stats[filament]["profit"] += (quote.final_price - quote.total_cost)
+        filament_stats = {
+            filament: {
+                "count": group["count"],
+                "revenue": group["final_price"],
+                "cost": group["total_cost"],
+                "profit": group["final_price"] - group["total_cost"]
+            }
+            for filament, group in columns.group_sums("filament", ("final_price", "total_cost"), mask).items()
+        }
         
         # Calcular estadísticas de tiempo
-        total_print_time = sum(q.print_time for q in quotes)
-        avg_print_time = total_print_time / len(quotes) if quotes else 0
+        total_print_time = totals["total_hours"]
+        avg_print_time = total_print_time / quote_count
         
         # Calcular estadísticas de material
-        total_filament = sum(q.filament_used for q in quotes)
-        avg_filament = total_filament / len(quotes) if quotes else 0
+        total_filament = totals["weight_g"]
+        avg_filament = total_filament / quote_count
         
         report = {
             "period": {
@@ -57,7 +53,7 @@ class AdvancedReports:
                 "end": end_date
             },
             "summary": {
-                "total_quotes": len(quotes),
+                "total_quotes": quote_count,
                 "total_revenue": total_revenue,
                 "total_cost": total_cost,
                 "total_profit": total_profit,
@@ -75,35 +71,22 @@ class AdvancedReports:
     
     def generate_monthly_trends(self, months=12):
         """Genera un análisis de tendencias mensuales."""
-        quotes = self.db_manager.get_all_quotes()
+        columns = get_quote_columns(self.db_manager)
         
-        # Agrupar por mes
-        monthly_data = {}
-        for quote in quotes:
-            # Convertir la fecha de creación a objeto datetime
-            try:
-                quote_date = datetime.fromisoformat(quote.created_at)
-                month_key = quote_date.strftime("%Y-%m")
-                
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = {
-                        "quotes": 0,
-                        "revenue": 0,
-                        "cost": 0,
-                        "profit": 0,
-                        "print_time": 0,
-                        "filament": 0
-                    }
-                
-                monthly_data[month_key]["quotes"] += 1
-                monthly_data[month_key]["revenue"] += quote.final_price
-                monthly_data[month_key]["cost"] += quote.total_cost
-                monthly_data[month_key]["profit"] += (quote.final_price - quote.total_cost)
-                monthly_data[month_key]["print_time"] += quote.print_time
-                monthly_data[month_key]["filament"] += quote.filament_used
-            except Exception as e:
-                print(f"Error procesando cotización: {e}")
-                continue
+        # Agrupar por mes (las cotizaciones con fecha no válida se omiten)
+        monthly_data = {
+            month_key: {
+                "quotes": group["count"],
+                "revenue": group["final_price"],
+                "cost": group["total_cost"],
+                "profit": group["final_price"] - group["total_cost"],
+                "print_time": group["total_hours"],
+                "filament": group["weight_g"]
+            }
+            for month_key, group in columns.group_sums(
+                "month", ("final_price", "total_cost", "total_hours", "weight_g")
+            ).items()
+        }
         
         # Ordenar por fecha
         sorted_months = sorted(monthly_data.keys())
@@ -140,7 +123,8 @@ class AdvancedReports:
                 }
             
             client_stats[client]["quotes"] += 1
-            client_stats[client]["total_spent"] += quote.final_price
+            # Se acumula en centavos enteros para que el total sea exacto
+            client_stats[client]["total_spent"] += to_minor(quote.final_price)
             
             # Actualizar fechas
             if quote.created_at < client_stats[client]["first_order"]:
@@ -148,8 +132,11 @@ class AdvancedReports:
             if quote.created_at > client_stats[client]["last_order"]:
                 client_stats[client]["last_order"] = quote.created_at
         
+        total_revenue_minor = sum(c["total_spent"] for c in client_stats.values())
+        
         # Calcular valores promedio
         for client in client_stats:
+            client_stats[client]["total_spent"] = from_minor(client_stats[client]["total_spent"])
             if client_stats[client]["quotes"] > 0:
                 client_stats[client]["avg_order_value"] = (
                     client_stats[client]["total_spent"] / client_stats[client]["quotes"]
@@ -167,7 +154,7 @@ class AdvancedReports:
             "summary": {
                 "total_clients": len(client_stats),
                 "total_quotes": sum(c["quotes"] for c in client_stats.values()),
-                "total_revenue": sum(c["total_spent"] for c in client_stats.values())
+                "total_revenue": from_minor(total_revenue_minor)
             },
             "generated_at": datetime.now().isoformat()
         }
@@ -238,30 +225,24 @@ class AdvancedReports:
     
     def get_performance_indicators(self):
         """Obtiene indicadores clave de rendimiento (KPIs)."""
-        quotes = self.db_manager.get_all_quotes()
+        columns = get_quote_columns(self.db_manager)
         
-        if not quotes:
+        if not len(columns):
             return {"error": "No hay datos disponibles"}
         
         # Calcular KPIs
-        total_quotes = len(quotes)
-        total_revenue = sum(q.final_price for q in quotes)
-        total_profit = sum((q.final_price - q.total_cost) for q in quotes)
+        total_quotes = len(columns)
+        total_revenue = columns.sum("final_price")
+        total_profit = total_revenue - columns.sum("total_cost")
         
         # KPIs de crecimiento
-        # Obtener cotizaciones de los últimos 30 días
+        # Cotizaciones de los últimos 30 días
         thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_quotes = [q for q in quotes 
-                        if datetime.fromisoformat(q.created_at) >= thirty_days_ago]
+        current_month_count = columns.count(columns.select(start=thirty_days_ago))
         
-        # Obtener cotizaciones del mes anterior
+        # Cotizaciones del mes anterior
         sixty_days_ago = datetime.now() - timedelta(days=60)
-        previous_month_quotes = [q for q in quotes 
-                               if thirty_days_ago > datetime.fromisoformat(q.created_at) >= sixty_days_ago]
-        
-        # Calcular crecimiento
-        current_month_count = len(recent_quotes)
-        previous_month_count = len(previous_month_quotes)
+        previous_month_count = columns.count(columns.select(start=sixty_days_ago)) - current_month_count
         
         growth_rate = 0
         if previous_month_count > 0:
@@ -1,7 +1,10 @@
 import json
 import os
 from datetime import datetime
-class Analytics:
+
+from utils.persistence import WriteBehindMixin, atomic_write_json, mutator
+
+class Analytics(WriteBehindMixin):
     def __init__(self, analytics_file="analytics.json"):
         self.analytics_file = analytics_file
         self.analytics_data = self.load_analytics()
@@ -27,53 +30,66 @@ class Analytics:
             "time_spent": 0,  # en segundos
             "last_used": None,
             "most_used_features": {},
-            "user_preferences": {}
+            "user_preferences": {},
+            "cache_stats": {}
         }
     
     def save_analytics(self):
-        """Guarda los datos de análisis en el archivo JSON."""
+        """Guarda los datos de análisis en el archivo JSON (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_analytics)
+    
+    def _write_analytics(self):
+        """Escribe los datos de análisis en el archivo."""
         try:
-            with open(self.analytics_file, 'w') as f:
-                json.dump(self.analytics_data, f, indent=2)
+            atomic_write_json(self.analytics_file, self.analytics_data)
+            return True
         except IOError as e:
             print(f"Error al guardar análisis: {e}")
+            return False
     
+    @mutator
     def track_app_start(self):
         """Registra el inicio de la aplicación."""
         self.analytics_data["app_starts"] += 1
         self.analytics_data["last_used"] = datetime.now().isoformat()
         self.save_analytics()
     
+    @mutator
     def track_calculation(self):
         """Registra una cotización realizada."""
         self.analytics_data["calculations_made"] += 1
         self.analytics_data["last_used"] = datetime.now().isoformat()
         self.save_analytics()
     
+    @mutator
     def track_quote_saved(self):
         """Registra una cotización guardada."""
         self.analytics_data["quotes_saved"] += 1
         self.analytics_data["last_used"] = datetime.now().isoformat()
         self.save_analytics()
     
+    @mutator
     def track_csv_export(self):
         """Registra una exportación a CSV."""
         self.analytics_data["csv_exports"] += 1
         self.analytics_data["last_used"] = datetime.now().isoformat()
         self.save_analytics()
     
+    @mutator
     def track_settings_change(self):
         """Registra un cambio en la configuración."""
         self.analytics_data["settings_changes"] += 1
         self.analytics_data["last_used"] = datetime.now().isoformat()
         self.save_analytics()
     
+    @mutator
     def track_time_spent(self, seconds):
         """Registra el tiempo pasado en la aplicación."""
         self.analytics_data["time_spent"] += seconds
         self.analytics_data["last_used"] = datetime.now().isoformat()
         self.save_analytics()
     
+    @mutator
     def track_feature_usage(self, feature_name):
         """Registra el uso de una característica específica."""
         if feature_name in self.analytics_data["most_used_features"]:
@@ -83,6 +99,24 @@ class Analytics:
         self.analytics_data["last_used"] = datetime.now().isoformat()
         self.save_analytics()
     
+    @mutator
+    def track_cache_stats(self, cache_name, hits, misses):
+        """Acumula los aciertos y fallos de una caché."""
+        if not hits and not misses:
+            return
+        stats = self.analytics_data.setdefault("cache_stats", {}).setdefault(cache_name, {"hits": 0, "misses": 0})
+        stats["hits"] += hits
+        stats["misses"] += misses
+        self.save_analytics()
+
+    def get_cache_hit_rates(self):
+        """Devuelve la tasa de aciertos (%) de cada caché registrada."""
+        rates = {}
+        for cache_name, stats in self.analytics_data.get("cache_stats", {}).items():
+            lookups = stats["hits"] + stats["misses"]
+            rates[cache_name] = round(stats["hits"] / lookups * 100, 1) if lookups else 0.0
+        return rates
+
     def get_analytics_summary(self):
         """Devuelve un resumen de los datos de análisis."""
         return {
@@ -93,9 +127,11 @@ class Analytics:
             "Cambios de configuración": self.analytics_data["settings_changes"],
             "Tiempo total usado (minutos)": round(self.analytics_data["time_spent"] / 60, 2),
             "Último uso": self.analytics_data["last_used"],
-            "Características más usadas": self.analytics_data["most_used_features"]
+            "Características más usadas": self.analytics_data["most_used_features"],
+            "Aciertos de caché (%)": self.get_cache_hit_rates()
         }
     
+    @mutator
     def reset_analytics(self):
         """Restablece todos los datos de análisis."""
         self.analytics_data = self.get_default_analytics()
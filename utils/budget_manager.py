@@ -1,9 +1,25 @@
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from utils.bulk_operations import BulkOperationsMixin
+from utils.money import (
+    DEFAULT_DECIMALS, MONEY_FIELDS, detect_minor_units, from_minor, records_from_minor,
+    records_to_minor, sum_minor
+)
+from utils.persistence import WriteBehindMixin, atomic_write_json, mutator
+from utils.record_index import RecordIndex, ReverseIndex, intern_value
+from utils.text_index import TextIndex
 
 class Budget:
+    __slots__ = (
+        "id", "name", "period", "amount", "created_at", "updated_at",
+        "start_date", "end_date", "status", "category", "description",
+        "spent_amount", "reserved_amount", "notes", "alert_threshold",
+        "transactions"
+    )
+    
     def __init__(self, name: str, period: str, amount: float):
         self.id = self._generate_id()
         self.name = name
@@ -70,19 +86,18 @@ class Budget:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        """Crea un presupuesto desde un diccionario."""
-        budget = cls(
-            data["name"], 
-            data["period"], 
-            data["amount"]
-        )
+        """Crea un presupuesto desde un diccionario sin pasar por el constructor."""
+        budget = cls.__new__(cls)
         budget.id = data["id"]
+        budget.name = data["name"]
+        budget.period = intern_value(data["period"])
+        budget.amount = data["amount"]
         budget.created_at = data["created_at"]
         budget.updated_at = data["updated_at"]
-        budget.start_date = data.get("start_date", datetime.now().isoformat())
-        budget.end_date = data.get("end_date", budget._calculate_end_date(data["period"]))
-        budget.status = data.get("status", "active")
-        budget.category = data.get("category", "general")
+        budget.start_date = data["start_date"] if "start_date" in data else datetime.now().isoformat()
+        budget.end_date = data["end_date"] if "end_date" in data else budget._calculate_end_date(data["period"])
+        budget.status = intern_value(data.get("status", "active"))
+        budget.category = intern_value(data.get("category", "general"))
         budget.description = data.get("description", "")
         budget.spent_amount = data.get("spent_amount", 0.0)
         budget.reserved_amount = data.get("reserved_amount", 0.0)
@@ -127,6 +142,11 @@ class Budget:
         return transaction
 
 class Transaction:
+    __slots__ = (
+        "id", "amount", "description", "budget_id", "date", "category",
+        "type", "notes", "related_quote_id", "related_project_id"
+    )
+    
     def __init__(self, amount: float, description: str, budget_id: str = ""):
         self.id = self._generate_id()
         self.amount = amount
@@ -161,27 +181,56 @@ class Transaction:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        """Crea una transacción desde un diccionario."""
-        transaction = cls(
-            data["amount"], 
-            data["description"], 
-            data.get("budget_id", "")
-        )
+        """Crea una transacción desde un diccionario sin pasar por el constructor."""
+        transaction = cls.__new__(cls)
         transaction.id = data["id"]
+        transaction.amount = data["amount"]
+        transaction.description = data["description"]
+        transaction.budget_id = data.get("budget_id", "")
         transaction.date = data["date"]
-        transaction.category = data.get("category", "general")
-        transaction.type = data.get("type", "expense")
+        transaction.category = intern_value(data.get("category", "general"))
+        transaction.type = intern_value(data.get("type", "expense"))
         transaction.notes = data.get("notes", "")
         transaction.related_quote_id = data.get("related_quote_id", "")
         transaction.related_project_id = data.get("related_project_id", "")
         return transaction
 
-class BudgetManager:
-    def __init__(self, budgets_file="budgets.json", transactions_file="transactions.json"):
+class BudgetManager(WriteBehindMixin, BulkOperationsMixin):
+    _bulk_records_attr = "budgets"
+    # Decimales si los archivos guardan importes en unidades menores (ver utils.money)
+    budget_minor_units = None
+    transaction_minor_units = None
+    
+    def __init__(self, budgets_file="budgets.json", transactions_file="transactions.json",
+                 settings_manager=None):
         self.budgets_file = budgets_file
         self.transactions_file = transactions_file
+        # Configuración de la que se leen los decimales de la moneda actual
+        self.settings_manager = settings_manager
         self.budgets = self.load_budgets()
+        self.index = RecordIndex()
+        self.text_index = TextIndex(("name", "description", "category"))
         self.transactions = self.load_transactions()
+        self.transaction_index = ReverseIndex("budget_id")
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Reconstruye los índices a partir de los presupuestos y transacciones en memoria."""
+        self.index.rebuild(self.budgets)
+        self.text_index.rebuild(self.budgets)
+        self.transaction_index.rebuild(self.transactions)
+    
+    def _bulk_build(self, data: Dict[str, Any]):
+        """Crea un presupuesto a partir de un diccionario del lote."""
+        budget = Budget(data["name"], data.get("period", "monthly"), float(data["amount"]))
+        self._apply_fields(budget, {k: v for k, v in data.items() if k != "amount"})
+        return budget
+    
+    def _bulk_save(self):
+        return self.save_budgets()
+    
+    def _bulk_indexes(self):
+        return [self.index, self.text_index]
     
     def load_budgets(self):
         """Carga los presupuestos desde el archivo."""
@@ -189,6 +238,8 @@ class BudgetManager:
             try:
                 with open(self.budgets_file, 'r') as f:
                     data = json.load(f)
+                    self.budget_minor_units = detect_minor_units(data)
+                    records_from_minor(data, MONEY_FIELDS["budgets"])
                     return [Budget.from_dict(budget_data) for budget_data in data]
             except (json.JSONDecodeError, IOError) as e:
                 print(f"Error al cargar presupuestos: {e}")
@@ -196,10 +247,14 @@ class BudgetManager:
         return []
     
     def save_budgets(self):
-        """Guarda los presupuestos en el archivo."""
+        """Guarda los presupuestos en el archivo (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_budgets)
+    
+    def _write_budgets(self):
+        """Escribe los presupuestos en el archivo."""
         try:
-            with open(self.budgets_file, 'w') as f:
-                json.dump([budget.to_dict() for budget in self.budgets], f, indent=2)
+            data = [budget.to_dict() for budget in self.budgets]
+            atomic_write_json(self.budgets_file, records_to_minor(data, MONEY_FIELDS["budgets"], self.budget_minor_units))
             return True
         except IOError as e:
             print(f"Error al guardar presupuestos: {e}")
@@ -211,6 +266,8 @@ class BudgetManager:
             try:
                 with open(self.transactions_file, 'r') as f:
                     data = json.load(f)
+                    self.transaction_minor_units = detect_minor_units(data)
+                    records_from_minor(data, MONEY_FIELDS["transactions"])
                     return [Transaction.from_dict(transaction_data) for transaction_data in data]
             except (json.JSONDecodeError, IOError) as e:
                 print(f"Error al cargar transacciones: {e}")
@@ -218,28 +275,33 @@ class BudgetManager:
         return []
     
     def save_transactions(self):
-        """Guarda las transacciones en el archivo."""
+        """Guarda las transacciones en el archivo (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_transactions)
+    
+    def _write_transactions(self):
+        """Escribe las transacciones en el archivo."""
         try:
-            with open(self.transactions_file, 'w') as f:
-                json.dump([transaction.to_dict() for transaction in self.transactions], f, indent=2)
+            data = [transaction.to_dict() for transaction in self.transactions]
+            atomic_write_json(self.transactions_file,
+                              records_to_minor(data, MONEY_FIELDS["transactions"], self.transaction_minor_units))
             return True
         except IOError as e:
             print(f"Error al guardar transacciones: {e}")
             return False
     
+    @mutator
     def create_budget(self, name: str, period: str, amount: float):
         """Crea un nuevo presupuesto."""
         budget = Budget(name, period, amount)
         self.budgets.append(budget)
+        self.index.add(budget)
+        self.text_index.add(budget)
         self.save_budgets()
         return budget
     
     def get_budget(self, budget_id: str):
         """Obtiene un presupuesto por ID."""
-        for budget in self.budgets:
-            if budget.id == budget_id:
-                return budget
-        return None
+        return self.index.get(budget_id)
     
     def get_budgets(self, status=None, category=None):
         """Obtiene todos los presupuestos, opcionalmente filtrados."""
@@ -253,16 +315,21 @@ class BudgetManager:
         
         return filtered_budgets
     
+    @mutator
     def update_budget(self, budget_id: str, **kwargs):
         """Actualiza un presupuesto con los valores proporcionados."""
         budget = self.get_budget(budget_id)
         if not budget:
             return False, "Presupuesto no encontrado"
         
+        old_id = budget.id
+        
         # Actualizar campos proporcionados
         for key, value in kwargs.items():
             if hasattr(budget, key):
                 setattr(budget, key, value)
+        self.index.reindex(budget, old_id)
+        self.text_index.reindex(budget, old_id)
         
         # Actualizar fecha de modificación
         budget.updated_at = datetime.now().isoformat()
@@ -270,6 +337,7 @@ class BudgetManager:
         self.save_budgets()
         return True, "Presupuesto actualizado"
     
+    @mutator
     def delete_budget(self, budget_id: str):
         """Elimina un presupuesto."""
         budget = self.get_budget(budget_id)
@@ -277,21 +345,16 @@ class BudgetManager:
             return False, "Presupuesto no encontrado"
         
         self.budgets.remove(budget)
+        self.index.remove(budget)
+        self.text_index.remove(budget)
         self.save_budgets()
         return True, "Presupuesto eliminado"
     
-    def search_budgets(self, query: str):
-        """Busca presupuestos por nombre o descripción."""
-        query = query.lower()
-        results = []
-        
-        for budget in self.budgets:
-            if (query in budget.name.lower() or 
-                query in budget.description.lower() or
-                query in budget.category.lower()):
-                results.append(budget)
-        
-        return results
+    def search_budgets(self, query: str, mode: str = "and"):
+        """Busca presupuestos por nombre, descripción o categoría, del más al menos relevante."""
+        if not query.strip():
+            return list(self.budgets)
+        return self.text_index.search(query, mode)
     
     def get_budget_statistics(self):
         """Obtiene estadísticas de presupuestos."""
@@ -340,12 +403,14 @@ class BudgetManager:
         
         return stats
     
+    @mutator
     def add_transaction(self, amount: float, description: str, budget_id: str = "", category: str = ""):
         """Añade una transacción."""
         transaction = Transaction(amount, description, budget_id)
         transaction.category = category or "general"
         
         self.transactions.append(transaction)
+        self.transaction_index.add(transaction)
         
         # Si hay un presupuesto asociado, actualizarlo
         if budget_id:
@@ -356,13 +421,52 @@ class BudgetManager:
         
         self.save_transactions()
         return transaction
-    
+
+    @mutator
+    def add_transactions(self, items: List[Dict[str, Any]]):
+        """Añade varias transacciones guardando cada archivo una sola vez.
+
+        Cada elemento admite las claves de `add_transaction`. Devuelve las
+        transacciones creadas y los errores por fila.
+        """
+        created, errors = [], []
+        budgets_changed = False
+
+        for position, data in enumerate(items, start=1):
+            try:
+                amount = float(data["amount"])
+            except (KeyError, ValueError, TypeError) as e:
+                errors.append(f"Fila {position}: dato no válido ({e})")
+                continue
+
+            description = data.get("description", "")
+            budget_id = data.get("budget_id", "")
+            category = data.get("category", "")
+            transaction = Transaction(amount, description, budget_id)
+            transaction.category = category or "general"
+
+            self.transactions.append(transaction)
+            self.transaction_index.add(transaction)
+            created.append(transaction)
+
+            if budget_id:
+                budget = self.get_budget(budget_id)
+                if budget:
+                    budget.add_transaction(amount, description, category)
+                    budgets_changed = True
+
+        if budgets_changed:
+            self.save_budgets()
+        if created:
+            self.save_transactions()
+        return created, errors
+
     def get_transactions(self, budget_id=None, category=None, transaction_type=None):
         """Obtiene transacciones, opcionalmente filtradas."""
         filtered_transactions = self.transactions
         
         if budget_id:
-            filtered_transactions = [t for t in filtered_transactions if t.budget_id == budget_id]
+            filtered_transactions = self.transaction_index.get(budget_id)
         
         if category:
             filtered_transactions = [t for t in filtered_transactions if t.category == category]
@@ -398,6 +502,7 @@ class BudgetManager:
             "is_near_limit": budget.is_near_limit()
         }
     
+    @mutator
     def reserve_amount(self, budget_id: str, amount: float, description: str = ""):
         """Reserva una cantidad de un presupuesto."""
         budget = self.get_budget(budget_id)
@@ -416,6 +521,7 @@ class BudgetManager:
         self.save_budgets()
         return True, f"${amount} reservados exitosamente"
     
+    @mutator
     def release_reserved_amount(self, budget_id: str, amount: float):
         """Libera una cantidad reservada de un presupuesto."""
         budget = self.get_budget(budget_id)
@@ -443,9 +549,24 @@ class BudgetManager:
         """Marca un presupuesto como completado."""
         return self.update_budget(budget_id, status="completed")
     
-    def get_monthly_summary(self, year: int, month: int):
-        """Obtiene un resumen de transacciones para un mes específico."""
+    def get_currency_decimals(self) -> int:
+        """Decimales de la moneda actual según la configuración (o los del archivo)."""
+        if self.settings_manager is not None:
+            return self.settings_manager.get_currency_decimals()
+        if self.transaction_minor_units is not None:
+            return self.transaction_minor_units
+        return DEFAULT_DECIMALS
+    
+    def get_monthly_summary(self, year: int, month: int, decimals: Optional[int] = None):
+        """Obtiene un resumen de transacciones para un mes específico.
+
+        Los totales se suman en unidades menores enteras de `decimals`
+        decimales (por defecto, los de la moneda configurada), sin error de
+        redondeo; las claves `*_minor` los dan enteros.
+        """
         from datetime import datetime
+        if decimals is None:
+            decimals = self.get_currency_decimals()
         
         monthly_transactions = []
         for transaction in self.transactions:
@@ -456,16 +577,19 @@ class BudgetManager:
             except Exception:
                 continue
         
-        total_income = sum(t.amount for t in monthly_transactions if t.type == "income")
-        total_expenses = sum(t.amount for t in monthly_transactions if t.type == "expense")
+        income_minor = sum_minor([t.amount for t in monthly_transactions if t.type == "income"], decimals)
+        expenses_minor = sum_minor([t.amount for t in monthly_transactions if t.type == "expense"], decimals)
         
         return {
             "year": year,
             "month": month,
             "transactions": monthly_transactions,
-            "total_income": total_income,
-            "total_expenses": total_expenses,
-            "net_balance": total_income - total_expenses,
+            "total_income": from_minor(income_minor, decimals),
+            "total_expenses": from_minor(expenses_minor, decimals),
+            "net_balance": from_minor(income_minor - expenses_minor, decimals),
+            "total_income_minor": income_minor,
+            "total_expenses_minor": expenses_minor,
+            "net_balance_minor": income_minor - expenses_minor,
             "transaction_count": len(monthly_transactions)
         }
     
@@ -532,7 +656,7 @@ class BudgetManager:
             return None
         
         # Filtrar transacciones del presupuesto
-        budget_transactions = [t for t in self.transactions if t.budget_id == budget_id]
+        budget_transactions = self.transaction_index.get(budget_id)
         
         # Ordenar por fecha
         budget_transactions.sort(key=lambda x: x.date)
@@ -0,0 +1,122 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from utils.persistence import mutator
+from utils.record_index import RecordIndex
+
+# Campos que los lotes nunca sobrescriben
+PROTECTED_FIELDS = ("id", "created_at")
+
+
+class BulkOperationsMixin(ABC):
+    """Operaciones masivas para los gestores JSON: validan en una pasada,
+    actualizan los índices y guardan una sola vez.
+
+    Cada gestor define `_bulk_records_attr` (nombre de su lista),
+    `_bulk_build(data)` (crea un registro o lanza ValueError), `_bulk_save()`
+    y, si tiene índices inversos, `_bulk_indexes()`. Si `_bulk_unique_name`
+    es True se rechazan nombres repetidos, igual que en las altas individuales.
+    Un gestor sin `_bulk_build` o `_bulk_save` no se puede instanciar.
+    """
+
+    _bulk_records_attr: str = ""
+    _bulk_unique_name: bool = False
+
+    @abstractmethod
+    def _bulk_build(self, data: Dict[str, Any]):
+        """Crea un registro a partir de un diccionario del lote (o lanza ValueError)."""
+
+    @abstractmethod
+    def _bulk_save(self) -> bool:
+        """Guarda la lista de registros del gestor."""
+
+    def _bulk_indexes(self) -> List[Any]:
+        """Índices que deben mantenerse al crear, modificar o borrar."""
+        return [self.index]
+
+    @staticmethod
+    def _apply_fields(record: Any, data: Dict[str, Any]):
+        """Copia los campos conocidos de `data` al registro."""
+        for key, value in data.items():
+            if key not in PROTECTED_FIELDS and hasattr(record, key):
+                setattr(record, key, value)
+
+    @mutator
+    def create_many(self, items: Iterable[Dict[str, Any]]) -> Tuple[List[Any], List[str]]:
+        """Crea varios registros y guarda una sola vez.
+
+        Devuelve la lista de registros creados y los errores por fila.
+        """
+        records = getattr(self, self._bulk_records_attr)
+        indexes = self._bulk_indexes()
+        created, errors = [], []
+        seen_names = set()
+
+        for position, data in enumerate(items, start=1):
+            try:
+                record = self._bulk_build(data)
+            except (KeyError, ValueError, TypeError) as e:
+                errors.append(f"Fila {position}: dato no válido ({e})")
+                continue
+            if self._bulk_unique_name:
+                name_key = RecordIndex.normalize(record.name)
+                if name_key in seen_names or self.index.get_by_name(record.name):
+                    errors.append(f"Fila {position}: '{record.name}' ya existe")
+                    continue
+                seen_names.add(name_key)
+            created.append(record)
+
+        if created:
+            records.extend(created)
+            for index in indexes:
+                for record in created:
+                    index.add(record)
+            self._bulk_save()
+        return created, errors
+
+    @mutator
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> Tuple[int, List[str]]:
+        """Actualiza varios registros (id -> campos) y guarda una sola vez."""
+        indexes = self._bulk_indexes()
+        now = datetime.now().isoformat()
+        updated, errors = 0, []
+
+        for record_id, fields in updates.items():
+            record = self.index.get(record_id)
+            if record is None:
+                errors.append(f"{record_id}: no encontrado")
+                continue
+            for index in indexes:
+                index.remove(record)
+            self._apply_fields(record, fields)
+            record.updated_at = now
+            for index in indexes:
+                index.add(record)
+            updated += 1
+
+        if updated:
+            self._bulk_save()
+        return updated, errors
+
+    @mutator
+    def delete_many(self, record_ids: Iterable[str]) -> Tuple[int, List[str]]:
+        """Elimina varios registros por ID y guarda una sola vez."""
+        indexes = self._bulk_indexes()
+        to_delete, errors = {}, []
+
+        for record_id in record_ids:
+            record = self.index.get(record_id)
+            if record is None:
+                errors.append(f"{record_id}: no encontrado")
+                continue
+            to_delete[record_id] = record
+
+        if to_delete:
+            for record in to_delete.values():
+                for index in indexes:
+                    index.remove(record)
+            records = getattr(self, self._bulk_records_attr)
+            records[:] = [r for r in records if r.id not in to_delete]
+            self._bulk_save()
+        return len(to_delete), errors
@@ -0,0 +1,292 @@
+"""
+Cotización masiva de listas de piezas (CSV o JSONL).
+
+Lee la lista en streaming, la cotiza por bloques con el `PricingEngine` de
+la configuración vigente y escribe cada bloque en el archivo de salida y/o
+en el almacén de cotizaciones. La memoria depende del tamaño de bloque, no
+del tamaño de la lista.
+
+Uso: python -m utils.bulk_quote piezas.csv -o cotizaciones.jsonl [--save]
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from contextlib import nullcontext
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.pricing_engine import PricingEngine, QUOTE_DATA_FIELDS
+
+# Columnas de la lista de piezas; "margin" es opcional
+PART_FIELDS = ("name", "weight_g", "hours", "filament")
+DEFAULT_CHUNK_SIZE = 1000
+# Cotizaciones que se acumulan antes de guardar en un almacén que reescribe
+# el archivo completo: acota la memoria y el número de reescrituras
+REWRITE_SAVE_SIZE = 50000
+DEFAULT_PROFIT_MARGIN = 30.0
+# Solo se conservan los primeros mensajes de error para no crecer con la entrada
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(path: str) -> str:
+    """Deduce el formato ('csv' o 'jsonl') a partir de la extensión."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        # Un arreglo JSON no se puede leer fila a fila
+        raise ValueError(f"{path}: usa JSONL (.jsonl, un objeto por línea) en lugar de un arreglo .json")
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "csv"
+
+
+def read_parts(path: str, file_format: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """Recorre la lista de piezas fila a fila como (número de línea, fila)."""
+    file_format = file_format or detect_format(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if file_format == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, ValueError(f"JSON no válido ({e.msg})")
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Agrupa un iterable en listas de hasta `size` elementos."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BulkQuoter:
+    """Cotiza bloques de piezas con una sola llamada a `price_batch` por bloque."""
+
+    def __init__(self, engine: PricingEngine, profit_margin_percent: float = DEFAULT_PROFIT_MARGIN,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.engine = engine
+        self.profit_margin_percent = profit_margin_percent
+        self.chunk_size = chunk_size
+        self.filament_categories = list(engine.filament_prices)
+        self.filament_codes = {name: code for code, name in enumerate(self.filament_categories)}
+
+    def parse_part(self, row: Any) -> Tuple[str, float, float, int, float]:
+        """Valida una fila y devuelve (nombre, peso, horas, código de filamento, margen)."""
+        if isinstance(row, Exception):
+            raise row
+        if not isinstance(row, dict):
+            raise ValueError("la fila no es un objeto")
+        missing = [field for field in PART_FIELDS[1:] if row.get(field) in (None, "")]
+        if missing:
+            raise ValueError(f"falta el campo {', '.join(missing)}")
+
+        weight_g = float(row["weight_g"])
+        total_hours = float(row["hours"])
+        if not (math.isfinite(weight_g) and math.isfinite(total_hours)):
+            raise ValueError("el peso y las horas deben ser números finitos")
+        if weight_g < 0 or total_hours <= 0:
+            raise ValueError("el peso no puede ser negativo y las horas deben ser mayores que cero")
+        filament = str(row["filament"]).strip()
+        code = self.filament_codes.get(filament)
+        if code is None:
+            raise ValueError(f"filamento no configurado: {filament}")
+        margin = row.get("margin")
+        margin = self.profit_margin_percent if margin in (None, "") else float(margin)
+        if not math.isfinite(margin):
+            raise ValueError("el margen debe ser un número finito")
+        return str(row.get("name") or "Sin nombre"), weight_g, total_hours, code, margin
+
+    def price_chunk(self, rows: List[Tuple[int, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Cotiza un bloque de filas (número de línea, fila).
+
+        Devuelve las cotizaciones con los campos de `QUOTE_DATA_FIELDS`, en el
+        orden de entrada, y los errores de las filas descartadas.
+        """
+        names, weights, hours, codes, margins, errors = [], [], [], [], [], []
+        for line_number, row in rows:
+            try:
+                name, weight_g, total_hours, code, margin = self.parse_part(row)
+            except (ValueError, TypeError) as e:
+                errors.append(f"Línea {line_number}: {e}")
+                continue
+            names.append(name)
+            weights.append(weight_g)
+            hours.append(total_hours)
+            codes.append(code)
+            margins.append(margin)
+        if not names:
+            return [], errors
+
+        result = self.engine.price_batch(weights, hours, codes, margins,
+                                         filament_categories=self.filament_categories)
+        columns = {field: (values.tolist() if hasattr(values, "tolist") else values)
+                   for field, values in result.items()}
+        categories = self.filament_categories
+        quotes = [
+            {
+                "piece_name": names[row],
+                "weight_g": weights[row],
+                "total_hours": hours[row],
+                "filament_type": categories[codes[row]],
+                "material_cost": columns["material_cost"][row],
+                "print_time_cost": columns["print_time_cost"][row],
+                "electricity_cost": columns["electricity_cost"][row],
+                "profit_margin_percent": margins[row],
+                "final_price": columns["final_price"][row]
+            }
+            for row in range(len(names))
+        ]
+        return quotes, errors
+
+    def quote_parts(self, rows: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[List[Dict[str, Any]], List[str]]]:
+        """Cotiza una secuencia de filas bloque a bloque."""
+        for chunk in chunked(rows, self.chunk_size):
+            yield self.price_chunk(chunk)
+
+
+class QuoteWriter:
+    """Escribe cotizaciones en CSV o JSONL a medida que llegan."""
+
+    def __init__(self, path: str, file_format: Optional[str] = None):
+        self.path = path
+        self.file_format = file_format or detect_format(path)
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        if self.file_format == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=QUOTE_DATA_FIELDS)
+            self._writer.writeheader()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        return False
+
+    def write_many(self, quotes: List[Dict[str, Any]]):
+        """Añade un bloque de cotizaciones al archivo."""
+        if self._writer is not None:
+            self._writer.writerows(quotes)
+        else:
+            self._file.writelines(json.dumps(quote, ensure_ascii=False) + "\n" for quote in quotes)
+
+
+def _keep_errors(summary: Dict[str, Any], errors: List[str]):
+    """Añade errores al resumen sin pasar de `MAX_REPORTED_ERRORS`."""
+    room = MAX_REPORTED_ERRORS - len(summary["errors"])
+    if room > 0:
+        summary["errors"].extend(errors[:room])
+
+
+def _save_chunk(summary: Dict[str, Any], db_manager, quotes: List[Dict[str, Any]]):
+    """Guarda cotizaciones con `save_many` y anota el resultado en el resumen."""
+    created, save_errors = db_manager.save_many(quotes)
+    summary["saved"] += len(created)
+    _keep_errors(summary, save_errors)
+
+
+def run_bulk_quote(input_path: str, engine: PricingEngine, output_path: Optional[str] = None,
+                   db_manager=None, profit_margin_percent: float = DEFAULT_PROFIT_MARGIN,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, input_format: Optional[str] = None,
+                   output_format: Optional[str] = None, workers: int = 1) -> Dict[str, Any]:
+    """Cotiza una lista de piezas y envía cada bloque a la salida y/o al almacén.
+
+    `db_manager` es cualquier gestor de cotizaciones con `save_many`; cada
+    bloque se guarda con una sola escritura. Los gestores que reescriben el
+    archivo completo en cada guardado (`rewrites_on_save`, como el JSON)
+    reciben las cotizaciones en tandas de hasta `REWRITE_SAVE_SIZE`, para no
+    reescribirlo una vez por bloque. Devuelve un resumen con las
+    cotizaciones generadas, guardadas, las filas descartadas y la suma de
+    precios finales. Con `workers` distinto de 1 los bloques se cotizan en
+    varios procesos (`None`: uno por núcleo); el resultado es el mismo.
+    """
+    # Validar los formatos antes de crear el archivo de salida
+    input_format = input_format or detect_format(input_path)
+    if output_path:
+        output_format = output_format or detect_format(output_path)
+    if workers == 1:
+        quoter = BulkQuoter(engine, profit_margin_percent, chunk_size)
+    else:
+        from utils.parallel_pricing import ParallelQuoter
+        quoter = ParallelQuoter(engine, profit_margin_percent, chunk_size, workers)
+    summary = {"priced": 0, "saved": 0, "failed": 0, "total_final_price": 0.0, "errors": []}
+    buffered = [] if getattr(db_manager, "rewrites_on_save", False) else None
+
+    with QuoteWriter(output_path, output_format) if output_path else nullcontext() as writer:
+        for quotes, errors in quoter.quote_parts(read_parts(input_path, input_format)):
+            summary["failed"] += len(errors)
+            _keep_errors(summary, errors)
+            if not quotes:
+                continue
+            summary["priced"] += len(quotes)
+            summary["total_final_price"] += sum(quote["final_price"] for quote in quotes)
+            if writer:
+                writer.write_many(quotes)
+            if buffered is not None:
+                buffered.extend(quotes)
+                if len(buffered) >= REWRITE_SAVE_SIZE:
+                    _save_chunk(summary, db_manager, buffered)
+                    buffered = []
+            elif db_manager is not None:
+                _save_chunk(summary, db_manager, quotes)
+    if buffered:
+        _save_chunk(summary, db_manager, buffered)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cotiza una lista de piezas desde CSV o JSONL.")
+    parser.add_argument("input", help="Lista de piezas (columnas: name, weight_g, hours, filament[, margin])")
+    parser.add_argument("-o", "--output", help="Archivo de salida (.csv o .jsonl)")
+    parser.add_argument("--save", action="store_true", help="Guardar las cotizaciones en el historial")
+    parser.add_argument("--margin", type=float, default=DEFAULT_PROFIT_MARGIN,
+                        help="Margen de ganancia (%%) para las filas sin 'margin'")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Piezas por bloque")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Procesos de cotización (0: uno por núcleo, 1: sin procesos extra)")
+    parser.add_argument("--settings", default="settings.json", help="Archivo de configuración")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.save:
+        parser.error("indica --output, --save o ambos")
+
+    from models.settings_manager import SettingsManager
+    settings_manager = SettingsManager(args.settings)
+    db_manager = None
+    if args.save:
+        from models.database_mobile import get_db
+        db_manager = get_db(settings_manager.get('storage_backend', 'json'))
+
+    try:
+        summary = run_bulk_quote(args.input, settings_manager.snapshot().pricing_engine,
+                                 output_path=args.output, db_manager=db_manager,
+                                 profit_margin_percent=args.margin, chunk_size=args.chunk_size,
+                                 workers=args.workers or None)
+    except (IOError, OSError, ValueError) as e:
+        print(f"Error al cotizar la lista de piezas: {e}")
+        return 1
+
+    symbol = settings_manager.get('currency_symbol', '$')
+    print(f"Cotizadas: {summary['priced']}  Guardadas: {summary['saved']}  Descartadas: {summary['failed']}")
+    print(f"Total: {symbol}{summary['total_final_price']:.2f}")
+    for error in summary["errors"]:
+        print(f"  {error}")
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,21 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any
 
+from utils.bulk_operations import BulkOperationsMixin
+from utils.money import MONEY_FIELDS, detect_minor_units, records_from_minor, records_to_minor
+from utils.persistence import WriteBehindMixin, atomic_write_json, mutator
+from utils.record_index import RecordIndex, intern_value
+from utils.prefix_index import DEFAULT_COMPLETIONS, PrefixIndex
+from utils.text_index import TextIndex
+from utils.trigram_index import DEFAULT_THRESHOLD, TrigramIndex
+
 class Client:
+    __slots__ = (
+        "id", "name", "email", "phone", "company", "address", "created_at",
+        "updated_at", "status", "total_spent", "quote_count", "last_contact",
+        "notes", "preferred_filament", "discount_rate"
+    )
+    
     def __init__(self, name: str, email: str = "", phone: str = ""):
         self.id = self._generate_id()
         self.name = name
@@ -48,26 +62,58 @@ class Client:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        """Crea un cliente desde un diccionario."""
-        client = cls(data["name"], data.get("email", ""), data.get("phone", ""))
+        """Crea un cliente desde un diccionario sin pasar por el constructor."""
+        client = cls.__new__(cls)
         client.id = data["id"]
+        client.name = data["name"]
+        client.email = data.get("email", "")
+        client.phone = data.get("phone", "")
         client.company = data.get("company", "")
         client.address = data.get("address", "")
         client.created_at = data["created_at"]
         client.updated_at = data["updated_at"]
-        client.status = data.get("status", "active")
+        client.status = intern_value(data.get("status", "active"))
         client.total_spent = data.get("total_spent", 0.0)
         client.quote_count = data.get("quote_count", 0)
         client.last_contact = data.get("last_contact")
         client.notes = data.get("notes", "")
-        client.preferred_filament = data.get("preferred_filament", "")
+        client.preferred_filament = intern_value(data.get("preferred_filament", ""))
         client.discount_rate = data.get("discount_rate", 0.0)
         return client
 
-class ClientManager:
+class ClientManager(WriteBehindMixin, BulkOperationsMixin):
+    _bulk_records_attr = "clients"
+    _bulk_unique_name = True
+    # Decimales si el archivo guarda importes en unidades menores (ver utils.money)
+    minor_units = None
+    
     def __init__(self, clients_file="clients.json"):
         self.clients_file = clients_file
         self.clients = self.load_clients()
+        self.index = RecordIndex("name")
+        self.text_index = TextIndex(("name", "email", "company", "phone"))
+        self.fuzzy_index = TrigramIndex("name")
+        self.prefix_index = PrefixIndex("name")
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Reconstruye los índices a partir de los clientes en memoria."""
+        self.index.rebuild(self.clients)
+        self.text_index.rebuild(self.clients)
+        self.fuzzy_index.rebuild(self.clients)
+        self.prefix_index.rebuild(self.clients)
+    
+    def _bulk_build(self, data: Dict[str, Any]):
+        """Crea un cliente a partir de un diccionario del lote."""
+        client = Client(data["name"], data.get("email", ""), data.get("phone", ""))
+        self._apply_fields(client, data)
+        return client
+    
+    def _bulk_save(self):
+        return self.save_clients()
+    
+    def _bulk_indexes(self):
+        return [self.index, self.text_index, self.fuzzy_index, self.prefix_index]
     
     def load_clients(self):
         """Carga los clientes desde el archivo."""
@@ -75,6 +121,8 @@ class ClientManager:
             try:
                 with open(self.clients_file, 'r') as f:
                     data = json.load(f)
+                    self.minor_units = detect_minor_units(data)
+                    records_from_minor(data, MONEY_FIELDS["clients"])
                     return [Client.from_dict(client_data) for client_data in data]
             except (json.JSONDecodeError, IOError) as e:
                 print(f"Error al cargar clientes: {e}")
@@ -82,39 +130,47 @@ class ClientManager:
         return []
     
     def save_clients(self):
-        """Guarda los clientes en el archivo."""
+        """Guarda los clientes en el archivo (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_clients)
+    
+    def _write_clients(self):
+        """Escribe los clientes en el archivo."""
         try:
-            with open(self.clients_file, 'w') as f:
-                json.dump([client.to_dict() for client in self.clients], f, indent=2)
+            data = [client.to_dict() for client in self.clients]
+            atomic_write_json(self.clients_file, records_to_minor(data, MONEY_FIELDS["clients"], self.minor_units))
             return True
         except IOError as e:
             print(f"Error al guardar clientes: {e}")
             return False
     
-    def create_client(self, name: str, email: str = "", phone: str = ""):
-        """Crea un nuevo cliente."""
+    @mutator
+    def create_client(self, name: str, email: str = "", phone: str = "", **fields):
+        """Crea un nuevo cliente.
+        
+        Los campos adicionales (company, address, preferred_filament, ...) se
+        asignan antes de indexarlo, para que la búsqueda de texto los vea.
+        """
         # Verificar si el cliente ya existe
         if self.get_client_by_name(name):
             return False, "El cliente ya existe"
         
         client = Client(name, email, phone)
+        self._apply_fields(client, fields)
         self.clients.append(client)
+        self.index.add(client)
+        self.text_index.add(client)
+        self.fuzzy_index.add(client)
+        self.prefix_index.add(client)
         self.save_clients()
         return client, "Cliente creado exitosamente"
     
     def get_client(self, client_id: str):
         """Obtiene un cliente por ID."""
-        for client in self.clients:
-            if client.id == client_id:
-                return client
-        return None
+        return self.index.get(client_id)
     
     def get_client_by_name(self, name: str):
         """Obtiene un cliente por nombre."""
-        for client in self.clients:
-            if client.name.lower() == name.lower():
-                return client
-        return None
+        return self.index.get_by_name(name)
     
     def get_clients(self, status=None):
         """Obtiene todos los clientes, opcionalmente filtrados por estado."""
@@ -122,16 +178,24 @@ class ClientManager:
             return [c for c in self.clients if c.status == status]
         return self.clients
     
+    @mutator
     def update_client(self, client_id: str, **kwargs):
         """Actualiza un cliente con los valores proporcionados."""
         client = self.get_client(client_id)
         if not client:
             return False, "Cliente no encontrado"
         
+        old_id = client.id
+        old_name = client.name
+        
         # Actualizar campos proporcionados
         for key, value in kwargs.items():
             if hasattr(client, key):
                 setattr(client, key, value)
+        self.index.reindex(client, old_id, old_name)
+        self.text_index.reindex(client, old_id)
+        self.fuzzy_index.reindex(client, old_id)
+        self.prefix_index.reindex(client, old_id)
         
         # Actualizar fecha de modificación
         client.updated_at = datetime.now().isoformat()
@@ -139,6 +203,7 @@ class ClientManager:
         self.save_clients()
         return True, "Cliente actualizado"
     
+    @mutator
     def delete_client(self, client_id: str):
         """Elimina un cliente."""
         client = self.get_client(client_id)
@@ -146,22 +211,26 @@ class ClientManager:
             return False, "Cliente no encontrado"
         
         self.clients.remove(client)
+        self.index.remove(client)
+        self.text_index.remove(client)
+        self.fuzzy_index.remove(client)
+        self.prefix_index.remove(client)
         self.save_clients()
         return True, "Cliente eliminado"
     
-    def search_clients(self, query: str):
-        """Busca clientes por nombre, email o compañía."""
-        query = query.lower()
-        results = []
-        
-        for client in self.clients:
-            if (query in client.name.lower() or 
-                query in client.email.lower() or
-                query in client.company.lower() or
-                query in client.phone.lower()):
-                results.append(client)
-        
-        return results
+    def search_clients(self, query: str, mode: str = "and"):
+        """Busca clientes por nombre, email, teléfono o compañía, del más al menos relevante."""
+        if not query.strip():
+            return list(self.clients)
+        return self.text_index.search(query, mode)
+    
+    def fuzzy_search_clients(self, query: str, threshold: float = DEFAULT_THRESHOLD):
+        """Busca clientes por nombre aunque tenga errores de tipeo, del más al menos parecido."""
+        return self.fuzzy_index.search(query, threshold)
+    
+    def complete_clients(self, prefix: str, limit: int = DEFAULT_COMPLETIONS):
+        """Clientes cuyo nombre tiene una palabra que empieza por `prefix` (autocompletado)."""
+        return self.prefix_index.complete(prefix, limit)
     
     def get_client_statistics(self, client_id: str):
         """Obtiene estadísticas de un cliente."""
@@ -182,6 +251,7 @@ class ClientManager:
         
         return stats
     
+    @mutator
     def update_client_spending(self, client_id: str, amount: float):
         """Actualiza el gasto total de un cliente."""
         client = self.get_client(client_id)
@@ -205,6 +275,7 @@ class ClientManager:
         return [c for c in self.clients 
                 if min_amount <= c.total_spent <= max_amount]
     
+    @mutator
     def add_client_note(self, client_id: str, note: str):
         """Añade una nota al cliente."""
         client = self.get_client(client_id)
@@ -223,6 +294,7 @@ class ClientManager:
         self.save_clients()
         return True, "Nota añadida al cliente"
     
+    @mutator
     def update_last_contact(self, client_id: str):
         """Actualiza la fecha del último contacto con el cliente."""
         client = self.get_client(client_id)
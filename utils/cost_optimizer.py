@@ -1,12 +1,52 @@
 import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils.material_manager import DEFAULT_DENSITIES
+from utils.pricing_engine import PricingEngine, np
+
+# Diámetro de boquilla con el que se mide el tiempo de la pieza (mm); el
+# tiempo en otra impresora se estima proporcional a referencia / boquilla
+REFERENCE_NOZZLE_MM = 0.4
+# Resultados de optimización que se conservan en memoria
+OPTIMIZATION_CACHE_SIZE = 128
+# Campos de la calculadora que describen la pieza a optimizar
+PART_FIELDS = ('weight_g', 'total_hours', 'filament_type')
+# Cuánto más puede tardar la opción elegida por cada nivel de optimización
+TIME_TOLERANCE = {"aggressive": math.inf, "moderate": 1.25, "conservative": 1.0}
+
+
+def pareto_front(costs, hours) -> List[int]:
+    """Posiciones de las opciones no dominadas en costo y tiempo, de la más rápida a la más lenta."""
+    if np is not None:
+        costs = np.asarray(costs, dtype=np.float64)
+        hours = np.asarray(hours, dtype=np.float64)
+        if not len(costs):
+            return []
+        order = np.lexsort((costs, hours))
+        sorted_costs = costs[order]
+        best_before = np.concatenate(([np.inf], np.minimum.accumulate(sorted_costs)[:-1]))
+        return order[sorted_costs < best_before].tolist()
+
+    front, best = [], math.inf
+    for position in sorted(range(len(costs)), key=lambda i: (hours[i], costs[i])):
+        if costs[position] < best:
+            front.append(position)
+            best = costs[position]
+    return front
+
+
 class CostOptimizer:
-    def __init__(self, settings_manager):
+    def __init__(self, settings_manager, material_manager=None, printer_manager=None):
         self.settings_manager = settings_manager
+        self.material_manager = material_manager
+        self.printer_manager = printer_manager
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
     
     def suggest_cost_savings(self, quote_data):
         """Sugiere formas de reducir costos para una cotización."""
         suggestions = []
-        settings = self.settings_manager.load_settings()
+        settings = self.settings_manager.snapshot()
         
         # Calcular costos actuales
         current_material_cost = quote_data.get('material_cost', 0)
@@ -33,6 +73,8 @@ class CostOptimizer:
     
     def _analyze_material_costs(self, quote_data, settings):
         """Analiza posibles ahorros en costos de material."""
+        if self._can_optimize(quote_data):
+            return self._analyze_combinations(quote_data)
         suggestions = []
         
         filament_used = quote_data.get('filament_used', 0)
@@ -122,8 +164,165 @@ class CostOptimizer:
         
         return suggestions
     
+    def _analyze_combinations(self, quote_data, limit=3):
+        """Sugiere combinaciones material/impresora del frente de Pareto más baratas que la actual."""
+        result = self.optimize_part(quote_data['weight_g'], quote_data['total_hours'],
+                                    quote_data['filament_type'], quote_data.get('profit_margin_percent', 0))
+        current_price = quote_data.get('final_price', 0)
+        suggestions = []
+        for option in sorted(result["pareto"], key=lambda option: option["final_price"])[:limit]:
+            savings = current_price - option["final_price"]
+            if savings <= 0:
+                break
+            suggestions.append({
+                "type": "material",
+                "title": "Combinación más económica",
+                "description": f"Usa {option['material_name']} en {option['printer_name']} "
+                              f"({option['total_hours']:.1f} h) para ahorrar ${savings:.2f}",
+                "savings": savings,
+                "option": option
+            })
+        return suggestions
+
+    def _can_optimize(self, quote_data) -> bool:
+        """Indica si hay catálogo y la cotización tiene los datos de la pieza."""
+        return (self.material_manager is not None and self.printer_manager is not None
+                and all(quote_data.get(field) is not None for field in PART_FIELDS))
+
+    def _catalog_key(self) -> tuple:
+        """Clave del catálogo: cambia con cada guardado de materiales o impresoras."""
+        return (id(self.material_manager), self.material_manager.data_version,
+                id(self.printer_manager), self.printer_manager.data_version)
+
+    def _catalog(self):
+        """Materiales e impresoras activos."""
+        return (self.material_manager.get_materials(status="active"),
+                self.printer_manager.get_printers(status="active"))
+
+    def optimize_part(self, weight_g, total_hours, filament_type, profit_margin_percent=0.0) -> Dict[str, Any]:
+        """Evalúa todas las combinaciones material/impresora posibles para una pieza.
+
+        `weight_g` y `total_hours` son los de la cotización con `filament_type`
+        y la boquilla de referencia: el peso se ajusta por la densidad de cada
+        material y el tiempo por la boquilla de cada impresora. Una impresora
+        admite un material si su tipo está en `materials_supported` (lista
+        vacía: admite todos). Sin tarifa o consumo propios se usan los de la
+        configuración.
+
+        Devuelve 'options' (todas, de la más barata a la más cara), 'pareto'
+        (las no dominadas en precio y tiempo, de la más rápida a la más lenta),
+        'cheapest' y 'fastest'. El resultado se guarda por pieza, versión de
+        la configuración y catálogo; no debe modificarse.
+        """
+        snapshot = self.settings_manager.snapshot()
+        key = (float(weight_g), float(total_hours), filament_type, float(profit_margin_percent),
+               snapshot.version, self._catalog_key())
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        materials, printers = self._catalog()
+        result = self._evaluate_combinations(float(weight_g), float(total_hours), filament_type,
+                                             float(profit_margin_percent), snapshot, materials, printers)
+        self._cache[key] = result
+        if len(self._cache) > OPTIMIZATION_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
+
+    def _evaluate_combinations(self, weight_g, total_hours, filament_type, profit_margin_percent,
+                               settings, materials, printers) -> Dict[str, Any]:
+        """Calcula el precio de la matriz materiales x impresoras."""
+        reference = next((m for m in materials if m.material_type == filament_type), None)
+        reference_density = reference.density if reference else DEFAULT_DENSITIES.get(filament_type, 1.24)
+        default_rate = float(settings.get('machine_cost_per_hour', 0))
+        default_power = float(settings.get('printer_power_watts', 0))
+        kwh_price = float(settings.get('electricity_kwh_price', 0))
+
+        prices_per_kg = [float(m.price_per_kg) for m in materials]
+        weights = [weight_g * (m.density or reference_density) / reference_density for m in materials]
+        rates = [float(p.hourly_rate) if p.hourly_rate else default_rate for p in printers]
+        powers = [float(p.power_consumption) if p.power_consumption else default_power for p in printers]
+        hours = [total_hours * REFERENCE_NOZZLE_MM / (p.nozzle_diameter or REFERENCE_NOZZLE_MM) for p in printers]
+        supported = [[not p.materials_supported or m.material_type in p.materials_supported for p in printers]
+                     for m in materials]
+
+        # Un lote de `PricingEngine.price_batch` por impresora (con su tarifa y
+        # consumo), con una fila por material
+        material_ids = [m.id for m in materials]
+        material_prices = dict(zip(material_ids, prices_per_kg))
+        codes = list(range(len(materials)))
+        columns = []
+        for rate, power, printer_hours in zip(rates, powers, hours) if materials else ():
+            engine = PricingEngine(rate, kwh_price, power, material_prices)
+            batch = engine.price_batch(weights, [printer_hours] * len(materials), codes,
+                                       profit_margin_percent, filament_categories=material_ids)
+            columns.append({field: (values.tolist() if hasattr(values, "tolist") else values)
+                            for field, values in batch.items()})
+        material_cost, print_time_cost, electricity_cost, final_price = (
+            [[column[field][i] for column in columns] for i in codes]
+            for field in ("material_cost", "print_time_cost", "electricity_cost", "final_price")
+        )
+
+        options = []
+        for i, material in enumerate(materials):
+            for j, printer in enumerate(printers):
+                if not supported[i][j]:
+                    continue
+                options.append({
+                    "material_id": material.id,
+                    "material_name": material.name,
+                    "material_type": material.material_type,
+                    "printer_id": printer.id,
+                    "printer_name": printer.name,
+                    "weight_g": weights[i],
+                    "total_hours": hours[j],
+                    "material_cost": material_cost[i][j],
+                    "print_time_cost": print_time_cost[i][j],
+                    "electricity_cost": electricity_cost[i][j],
+                    "profit_margin_percent": profit_margin_percent,
+                    "final_price": final_price[i][j]
+                })
+        options.sort(key=lambda option: option["final_price"])
+
+        front = pareto_front([option["final_price"] for option in options],
+                             [option["total_hours"] for option in options])
+        pareto = [options[position] for position in front]
+        return {
+            "options": options,
+            "pareto": pareto,
+            "cheapest": options[0] if options else None,
+            "fastest": pareto[0] if pareto else None
+        }
+
+    def _optimized_from_front(self, quote_data, optimization_level) -> Optional[Dict[str, Any]]:
+        """Elige del frente de Pareto la opción más barata dentro del tiempo que admite el nivel."""
+        result = self.optimize_part(quote_data['weight_g'], quote_data['total_hours'],
+                                    quote_data['filament_type'], quote_data.get('profit_margin_percent', 0))
+        max_hours = quote_data['total_hours'] * TIME_TOLERANCE.get(optimization_level, 1.0)
+        candidates = [option for option in result["pareto"] if option["total_hours"] <= max_hours + 1e-9]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda option: option["final_price"])
+        optimized_data = quote_data.copy()
+        if best["final_price"] < quote_data.get('final_price', math.inf):
+            optimized_data.update(best)
+            optimized_data['filament_type'] = best['material_type']
+        return optimized_data
+
     def calculate_optimized_quote(self, quote_data, optimization_level="moderate"):
-        """Calcula una cotización optimizada según el nivel de optimización."""
+        """Calcula una cotización optimizada según el nivel de optimización.
+
+        Con catálogo de materiales e impresoras y una cotización de la
+        calculadora, elige del frente de Pareto la combinación más barata que
+        no tarde más que la actual ('conservative'), hasta un 25% más
+        ('moderate') o sin límite ('aggressive'). Si no, aplica factores fijos.
+        """
+        if self._can_optimize(quote_data):
+            optimized_data = self._optimized_from_front(quote_data, optimization_level)
+            if optimized_data is not None:
+                return optimized_data
+
         optimized_data = quote_data.copy()
         
         if optimization_level == "aggressive":
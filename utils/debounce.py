@@ -0,0 +1,73 @@
+"""
+Limitador de frecuencia para eventos de la interfaz.
+
+Cada pulsación en una caja de búsqueda dispara `on_change`; redibujar la
+lista y llamar a `page.update()` en cada una satura la vista. `Debouncer`
+agrupa las llamadas: la función se ejecuta como mucho una vez por
+intervalo y siempre con los últimos argumentos recibidos, así que el
+resultado final corresponde a lo último que se escribió.
+
+    self.search_debouncer = Debouncer(self.apply_search, interval=0.25)
+    search_field = ft.TextField(on_change=lambda e: self.search_debouncer.call(e.control.value))
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Intervalo mínimo por defecto entre ejecuciones, en segundos
+DEFAULT_INTERVAL = 0.25
+
+
+class Debouncer:
+    """Ejecuta `func` como mucho una vez cada `interval` segundos con los últimos argumentos."""
+
+    def __init__(self, func: Callable[..., Any], interval: float = DEFAULT_INTERVAL):
+        self.func = func
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._args: tuple = ()
+        self._kwargs: dict = {}
+        self._last_run = 0.0
+
+    def call(self, *args, **kwargs):
+        """Programa una ejecución con estos argumentos (reemplazan a los pendientes)."""
+        with self._lock:
+            self._args, self._kwargs = args, kwargs
+            if self._timer is not None:
+                return
+            delay = max(0.0, self._last_run + self.interval - time.monotonic())
+            timer = self._timer = threading.Timer(delay, self._run)
+            timer.args = (timer,)
+            timer.daemon = True
+            timer.start()
+
+    def _run(self, timer: threading.Timer):
+        with self._lock:
+            # Otra ejecución (flush) o una cancelación ya se ocupó de este temporizador
+            if self._timer is not timer:
+                return
+            args, kwargs = self._args, self._kwargs
+            self._timer = None
+            self._last_run = time.monotonic()
+        try:
+            self.func(*args, **kwargs)
+        except Exception as e:
+            print(f"Error en la llamada diferida: {e}")
+
+    def flush(self):
+        """Ejecuta ya la llamada pendiente, si la hay."""
+        with self._lock:
+            timer = self._timer
+            if timer is None:
+                return
+            timer.cancel()
+        self._run(timer)
+
+    def cancel(self):
+        """Descarta la llamada pendiente."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
@@ -166,7 +166,31 @@ class ExportUtils:
         except Exception as e:
             print(f"Error al exportar a HTML: {e}")
             return False
-    
+
+    @staticmethod
+    def export_sensitivity_to_csv(result, file_path):
+        """Exporta una grilla de sensibilidad a CSV, un punto por fila."""
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=list(result.axes) + ['final_price'])
+                writer.writeheader()
+                writer.writerows(result.rows())
+            return True
+        except Exception as e:
+            print(f"Error al exportar la sensibilidad a CSV: {e}")
+            return False
+
+    @staticmethod
+    def export_sensitivity_to_json(result, file_path, include_values=False):
+        """Exporta el resumen y las tablas de una grilla de sensibilidad a JSON."""
+        try:
+            with open(file_path, 'w', encoding='utf-8') as jsonfile:
+                json.dump(result.to_dict(include_values), jsonfile, indent=2, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"Error al exportar la sensibilidad a JSON: {e}")
+            return False
+
     @staticmethod
     def get_export_formats():
         """Devuelve los formatos de exportación disponibles."""
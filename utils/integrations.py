@@ -127,7 +127,7 @@ Fecha: {quote_data.get('created_at', 'No disponible')}
             pla_price = self.get_filament_prices("PLA")
             
             # Actualizar configuración
-            current_settings = settings_manager.load_settings()
+            current_settings = settings_manager.snapshot().to_dict()
             
             # Actualizar precio de electricidad si es diferente
             if electricity_price != current_settings.get('electricity_kwh_price', 0):
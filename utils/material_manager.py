@@ -3,7 +3,31 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any
 
+from utils.bulk_operations import BulkOperationsMixin
+from utils.persistence import WriteBehindMixin, atomic_write_json, mutator
+from utils.record_index import RecordIndex, intern_value
+from utils.text_index import TextIndex
+from utils.trigram_index import DEFAULT_THRESHOLD, TrigramIndex
+
+# Densidad por defecto (g/cm³) según el tipo de material
+DEFAULT_DENSITIES = {
+    "PLA": 1.24,
+    "ABS": 1.04,
+    "PETG": 1.27,
+    "TPU": 1.21,
+    "Nylon": 1.15,
+    "PC": 1.20,
+    "Wood Fill": 1.28,
+    "Metal Fill": 3.50
+}
+
 class Material:
+    __slots__ = (
+        "id", "name", "material_type", "price_per_kg", "density", "color",
+        "manufacturer", "supplier", "created_at", "updated_at", "status",
+        "stock_quantity", "min_stock_alert", "notes", "properties"
+    )
+    
     def __init__(self, name: str, material_type: str, price_per_kg: float):
         self.id = self._generate_id()
         self.name = name
@@ -28,17 +52,7 @@ class Material:
     
     def _get_default_density(self, material_type: str):
         """Obtiene la densidad por defecto según el tipo de material."""
-        densities = {
-            "PLA": 1.24,
-            "ABS": 1.04,
-            "PETG": 1.27,
-            "TPU": 1.21,
-            "Nylon": 1.15,
-            "PC": 1.20,
-            "Wood Fill": 1.28,
-            "Metal Fill": 3.50
-        }
-        return densities.get(material_type, 1.24)
+        return DEFAULT_DENSITIES.get(material_type, 1.24)
     
     def _get_default_properties(self, material_type: str):
         """Obtiene propiedades por defecto según el tipo de material."""
@@ -96,24 +110,23 @@ class Material:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        """Crea un material desde un diccionario."""
-        material = cls(
-            data["name"], 
-            data["material_type"], 
-            data["price_per_kg"]
-        )
+        """Crea un material desde un diccionario sin pasar por el constructor."""
+        material = cls.__new__(cls)
         material.id = data["id"]
-        material.density = data.get("density", material._get_default_density(data["material_type"]))
+        material.name = data["name"]
+        material.material_type = intern_value(data["material_type"])
+        material.price_per_kg = data["price_per_kg"]
+        material.density = data["density"] if "density" in data else material._get_default_density(data["material_type"])
         material.color = data.get("color", "")
         material.manufacturer = data.get("manufacturer", "")
         material.supplier = data.get("supplier", "")
         material.created_at = data["created_at"]
         material.updated_at = data["updated_at"]
-        material.status = data.get("status", "active")
+        material.status = intern_value(data.get("status", "active"))
         material.stock_quantity = data.get("stock_quantity", 0.0)
         material.min_stock_alert = data.get("min_stock_alert", 1.0)
         material.notes = data.get("notes", "")
-        material.properties = data.get("properties", material._get_default_properties(data["material_type"]))
+        material.properties = data["properties"] if "properties" in data else material._get_default_properties(data["material_type"])
         return material
     
     def calculate_cost(self, weight_grams: float):
@@ -125,10 +138,35 @@ class Material:
         """Verifica si el material está bajo en stock."""
         return self.stock_quantity <= self.min_stock_alert
 
-class MaterialManager:
+class MaterialManager(WriteBehindMixin, BulkOperationsMixin):
+    _bulk_records_attr = "materials"
+    _bulk_unique_name = True
+    
     def __init__(self, materials_file="materials.json"):
         self.materials_file = materials_file
         self.materials = self.load_materials()
+        self.index = RecordIndex("name")
+        self.text_index = TextIndex(("name", "material_type", "manufacturer", "color"))
+        self.fuzzy_index = TrigramIndex("name")
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Reconstruye los índices a partir de los materiales en memoria."""
+        self.index.rebuild(self.materials)
+        self.text_index.rebuild(self.materials)
+        self.fuzzy_index.rebuild(self.materials)
+    
+    def _bulk_build(self, data: Dict[str, Any]):
+        """Crea un material a partir de un diccionario del lote."""
+        material = Material(data["name"], data["material_type"], float(data["price_per_kg"]))
+        self._apply_fields(material, {k: v for k, v in data.items() if k != "price_per_kg"})
+        return material
+    
+    def _bulk_save(self):
+        return self.save_materials()
+    
+    def _bulk_indexes(self):
+        return [self.index, self.text_index, self.fuzzy_index]
     
     def load_materials(self):
         """Carga los materiales desde el archivo."""
@@ -143,15 +181,19 @@ class MaterialManager:
         return []
     
     def save_materials(self):
-        """Guarda los materiales en el archivo."""
+        """Guarda los materiales en el archivo (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_materials)
+    
+    def _write_materials(self):
+        """Escribe los materiales en el archivo."""
         try:
-            with open(self.materials_file, 'w') as f:
-                json.dump([material.to_dict() for material in self.materials], f, indent=2)
+            atomic_write_json(self.materials_file, [material.to_dict() for material in self.materials])
             return True
         except IOError as e:
             print(f"Error al guardar materiales: {e}")
             return False
     
+    @mutator
     def add_material(self, name: str, material_type: str, price_per_kg: float):
         """Añade un nuevo material."""
         # Verificar si el material ya existe
@@ -160,22 +202,19 @@ class MaterialManager:
         
         material = Material(name, material_type, price_per_kg)
         self.materials.append(material)
+        self.index.add(material)
+        self.text_index.add(material)
+        self.fuzzy_index.add(material)
         self.save_materials()
         return material, "Material añadido exitosamente"
     
     def get_material(self, material_id: str):
         """Obtiene un material por ID."""
-        for material in self.materials:
-            if material.id == material_id:
-                return material
-        return None
+        return self.index.get(material_id)
     
     def get_material_by_name(self, name: str):
         """Obtiene un material por nombre."""
-        for material in self.materials:
-            if material.name.lower() == name.lower():
-                return material
-        return None
+        return self.index.get_by_name(name)
     
     def get_materials(self, material_type=None, status=None):
         """Obtiene todos los materiales, opcionalmente filtrados por tipo o estado."""
@@ -189,16 +228,23 @@ class MaterialManager:
         
         return filtered_materials
     
+    @mutator
     def update_material(self, material_id: str, **kwargs):
         """Actualiza un material con los valores proporcionados."""
         material = self.get_material(material_id)
         if not material:
             return False, "Material no encontrado"
         
+        old_id = material.id
+        old_name = material.name
+        
         # Actualizar campos proporcionados
         for key, value in kwargs.items():
             if hasattr(material, key):
                 setattr(material, key, value)
+        self.index.reindex(material, old_id, old_name)
+        self.text_index.reindex(material, old_id)
+        self.fuzzy_index.reindex(material, old_id)
         
         # Actualizar fecha de modificación
         material.updated_at = datetime.now().isoformat()
@@ -206,6 +252,7 @@ class MaterialManager:
         self.save_materials()
         return True, "Material actualizado"
     
+    @mutator
     def delete_material(self, material_id: str):
         """Elimina un material."""
         material = self.get_material(material_id)
@@ -213,22 +260,21 @@ class MaterialManager:
             return False, "Material no encontrado"
         
         self.materials.remove(material)
+        self.index.remove(material)
+        self.text_index.remove(material)
+        self.fuzzy_index.remove(material)
         self.save_materials()
         return True, "Material eliminado"
     
-    def search_materials(self, query: str):
-        """Busca materiales por nombre, tipo o fabricante."""
-        query = query.lower()
-        results = []
-        
-        for material in self.materials:
-            if (query in material.name.lower() or 
-                query in material.material_type.lower() or
-                query in material.manufacturer.lower() or
-                query in material.color.lower()):
-                results.append(material)
-        
-        return results
+    def search_materials(self, query: str, mode: str = "and"):
+        """Busca materiales por nombre, tipo, fabricante o color, del más al menos relevante."""
+        if not query.strip():
+            return list(self.materials)
+        return self.text_index.search(query, mode)
+    
+    def fuzzy_search_materials(self, query: str, threshold: float = DEFAULT_THRESHOLD):
+        """Busca materiales por nombre aunque tenga errores de tipeo, del más al menos parecido."""
+        return self.fuzzy_index.search(query, threshold)
     
     def get_material_statistics(self):
         """Obtiene estadísticas de materiales."""
@@ -265,6 +311,7 @@ class MaterialManager:
         
         return stats
     
+    @mutator
     def update_stock(self, material_id: str, quantity: float, operation: str = "add"):
         """Actualiza el stock de un material."""
         material = self.get_material(material_id)
@@ -349,25 +396,19 @@ class MaterialManager:
         try:
             with open(filename, 'r', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
-                imported_count = 0
-                
-                for row in reader:
-                    name = row.get('name', '')
-                    material_type = row.get('material_type', '')
-                    price_per_kg = float(row.get('price_per_kg', 0))
-                    
-                    # Verificar si el material ya existe
-                    if not self.get_material_by_name(name):
-                        material = Material(name, material_type, price_per_kg)
-                        material.manufacturer = row.get('manufacturer', '')
-                        material.supplier = row.get('supplier', '')
-                        material.stock_quantity = float(row.get('stock_quantity', 0))
-                        material.status = row.get('status', 'active')
-                        
-                        self.materials.append(material)
-                        imported_count += 1
+                rows = [{
+                    "name": row.get('name', ''),
+                    "material_type": row.get('material_type', ''),
+                    "price_per_kg": float(row.get('price_per_kg', 0)),
+                    "manufacturer": row.get('manufacturer', ''),
+                    "supplier": row.get('supplier', ''),
+                    "stock_quantity": float(row.get('stock_quantity', 0)),
+                    "status": row.get('status', 'active')
+                } for row in reader]
                 
-                self.save_materials()
+                # Los materiales ya existentes se omiten
+                created, _ = self.create_many(rows)
+                imported_count = len(created)
                 return True, f"{imported_count} materiales importados exitosamente"
         except Exception as e:
             return False, f"Error al importar materiales: {str(e)}"
@@ -0,0 +1,181 @@
+"""
+Importes en unidades menores enteras (centavos).
+
+Los importes se guardan como float y sumarlos acumula error de redondeo.
+Este módulo convierte importes a enteros en la unidad menor de la moneda
+(los decimales de cada moneda están en `SettingsManager.currencies`) para
+sumarlos de forma exacta, también por lotes con NumPy.
+
+Los archivos JSON de registros pueden guardarse opcionalmente en unidades
+menores: cada registro convertido lleva la clave `minor_units` con los
+decimales usados y sus campos de dinero son enteros. Los gestores detectan
+el formato al cargar y lo conservan al guardar. Para convertir archivos:
+
+    python -m utils.money transactions.json --kind transactions
+    python -m utils.money transactions.json --kind transactions --to-float
+"""
+
+import argparse
+import json
+import sys
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él las columnas se suman con listas
+    np = None
+
+from utils.persistence import atomic_write_json
+
+DEFAULT_DECIMALS = 2
+MINOR_UNITS_KEY = "minor_units"
+
+# Campos de dinero de cada tipo de archivo
+MONEY_FIELDS = {
+    "budgets": ("amount", "spent_amount", "reserved_amount"),
+    "transactions": ("amount",),
+    "clients": ("total_spent",),
+    "quotes": ("material_cost", "print_time_cost", "electricity_cost", "final_price"),
+}
+
+
+def to_minor(amount, decimals: int = DEFAULT_DECIMALS) -> int:
+    """Importe en unidades menores, redondeando al entero más cercano (mitades lejos de cero).
+
+    Se redondea el decimal que representa el float (`repr`), no su valor
+    binario: 1.005 con 2 decimales da 101, no 100.
+    """
+    value = Decimal(repr(float(amount))).scaleb(decimals)
+    return int(value.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor(minor: int, decimals: int = DEFAULT_DECIMALS) -> float:
+    """Importe en unidades de la moneda a partir de unidades menores."""
+    return minor / 10 ** decimals
+
+
+def to_minor_array(amounts, decimals: int = DEFAULT_DECIMALS):
+    """`to_minor` para una columna: array int64 con NumPy, lista de int sin él."""
+    if np is None:
+        return [to_minor(amount, decimals) for amount in amounts]
+    values = np.asarray(amounts, dtype=np.float64)
+    scaled = np.abs(values) * 10 ** decimals
+    minor = np.floor(scaled + 0.5).astype(np.int64)
+    minor = np.where(values < 0, -minor, minor)
+    # Cerca de una mitad el producto binario puede caer del lado equivocado:
+    # esas filas se redondean una a una con `to_minor`
+    fraction = scaled - np.floor(scaled)
+    doubtful = np.flatnonzero(np.abs(fraction - 0.5) <= np.maximum(1e-6, scaled * 1e-12))
+    for row in doubtful.tolist():
+        minor[row] = to_minor(values[row], decimals)
+    return minor
+
+
+def sum_minor(amounts, decimals: int = DEFAULT_DECIMALS) -> int:
+    """Suma exacta, en unidades menores, de una secuencia de importes."""
+    minor = to_minor_array(amounts, decimals)
+    return int(minor.sum()) if np is not None else sum(minor)
+
+
+def exact_sum(amounts, decimals: int = DEFAULT_DECIMALS) -> float:
+    """Suma de importes redondeando cada uno a la unidad menor, sin error acumulado."""
+    return from_minor(sum_minor(amounts, decimals), decimals)
+
+
+def format_minor(minor: int, symbol: str = "$", decimals: int = DEFAULT_DECIMALS) -> str:
+    """Formatea un importe en unidades menores, p. ej. 12345 -> '$123.45'."""
+    sign = "-" if minor < 0 else ""
+    units, cents = divmod(abs(minor), 10 ** decimals)
+    return f"{sign}{symbol}{units}.{cents:0{decimals}d}" if decimals else f"{sign}{symbol}{units}"
+
+
+# ----------------------------------------------------------------------
+# Registros y archivos
+
+def detect_minor_units(records: List[Dict[str, Any]]) -> Optional[int]:
+    """Decimales de los registros guardados en unidades menores, o None si están en float.
+
+    Basta con un registro convertido (un archivo puede mezclar registros
+    convertidos y añadidos a mano en float).
+    """
+    for record in records or ():
+        if isinstance(record, dict) and record.get(MINOR_UNITS_KEY) is not None:
+            return record[MINOR_UNITS_KEY]
+    return None
+
+
+def records_from_minor(records: List[Dict[str, Any]], fields: Iterable[str]) -> List[Dict[str, Any]]:
+    """Convierte (en el sitio) los registros en unidades menores a importes float."""
+    fields = tuple(fields)
+    for record in records:
+        decimals = record.pop(MINOR_UNITS_KEY, None)
+        if decimals is None:
+            continue
+        for field in fields:
+            if record.get(field) is not None:
+                record[field] = from_minor(record[field], decimals)
+    return records
+
+
+def records_to_minor(records: List[Dict[str, Any]], fields: Iterable[str],
+                     decimals: Optional[int]) -> List[Dict[str, Any]]:
+    """Convierte (en el sitio) los importes float de los registros a unidades menores.
+
+    Con `decimals=None` no hace nada, para poder llamarla siempre al guardar.
+    """
+    if decimals is None:
+        return records
+    fields = tuple(fields)
+    for record in records:
+        if MINOR_UNITS_KEY in record:
+            continue
+        for field in fields:
+            if record.get(field) is not None:
+                record[field] = to_minor(record[field], decimals)
+        record[MINOR_UNITS_KEY] = decimals
+    return records
+
+
+def convert_file(path: str, kind: str, decimals: Optional[int] = DEFAULT_DECIMALS) -> Tuple[bool, str]:
+    """Convierte un archivo de registros a unidades menores (o a float con `decimals=None`)."""
+    if kind not in MONEY_FIELDS:
+        return False, f"Tipo de archivo no válido: {kind}"
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        return False, f"Error al leer {path}: {e}"
+
+    fields = MONEY_FIELDS[kind]
+    records_from_minor(records, fields)
+    records_to_minor(records, fields, decimals)
+    try:
+        atomic_write_json(path, records, ensure_ascii=False)
+    except IOError as e:
+        return False, f"Error al guardar {path}: {e}"
+    target = f"unidades menores ({decimals} decimales)" if decimals is not None else "float"
+    return True, f"{len(records)} registros convertidos a {target}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convierte los importes de un archivo JSON a centavos enteros.")
+    parser.add_argument("file", help="Archivo de registros (budgets.json, transactions.json, ...)")
+    parser.add_argument("--kind", required=True, choices=sorted(MONEY_FIELDS), help="Tipo de registros")
+    parser.add_argument("--currency", help="Moneda (por defecto, la de la configuración)")
+    parser.add_argument("--settings", default="settings.json", help="Archivo de configuración")
+    parser.add_argument("--to-float", action="store_true", help="Volver a guardar los importes como float")
+    args = parser.parse_args(argv)
+
+    decimals = None
+    if not args.to_float:
+        from models.settings_manager import SettingsManager
+        decimals = SettingsManager(args.settings).get_currency_decimals(args.currency)
+
+    success, message = convert_file(args.file, args.kind, decimals)
+    print(message)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
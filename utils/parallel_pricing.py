@@ -0,0 +1,166 @@
+"""
+Cotización por lotes repartida en varios procesos.
+
+Los bloques de piezas (o de filas a recotizar) se reparten entre los procesos de un
+`ProcessPoolExecutor` y los resultados se devuelven en el orden de
+entrada, así que la salida es idéntica a la del modo de un solo proceso.
+Si no se pueden crear procesos (plataformas sin `multiprocessing`, pool
+roto), el trabajo pendiente sigue en el proceso actual.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.bulk_quote import BulkQuoter, DEFAULT_CHUNK_SIZE, DEFAULT_PROFIT_MARGIN, chunked
+from utils.pricing_engine import PricingEngine, np
+
+# Bloques en vuelo por proceso: mantiene ocupados a los procesos sin
+# acumular toda la entrada en memoria
+PENDING_PER_WORKER = 2
+
+_EXHAUSTED = object()
+
+# Filas por bloque al recotizar: `price_batch` es vectorial, así que los
+# bloques son grandes para que el envío entre procesos no domine
+BATCH_CHUNK_SIZE = 50000
+
+# Estado de cada proceso del pool, creado una vez por `_init_worker`
+_worker_quoter: Optional[BulkQuoter] = None
+# Motor y filamentos de cada proceso del pool, creados por `_init_batch_worker`
+_worker_engine: Optional[PricingEngine] = None
+_worker_categories: Optional[List[str]] = None
+
+
+def default_workers() -> int:
+    """Número de procesos por defecto: uno por núcleo."""
+    return os.cpu_count() or 1
+
+
+def _init_worker(engine: PricingEngine, profit_margin_percent: float, chunk_size: int):
+    """Crea el cotizador del proceso hijo."""
+    global _worker_quoter
+    _worker_quoter = BulkQuoter(engine, profit_margin_percent, chunk_size)
+
+
+def _price_chunk_in_worker(rows):
+    """Cotiza un bloque en el proceso hijo."""
+    return _worker_quoter.price_chunk(rows)
+
+
+def _init_batch_worker(engine: PricingEngine, filament_categories: Optional[List[str]]):
+    """Guarda el motor y los filamentos del proceso hijo."""
+    global _worker_engine, _worker_categories
+    _worker_engine = engine
+    _worker_categories = filament_categories
+
+
+def _price_batch_in_worker(columns):
+    """Calcula un bloque de filas con `price_batch` en el proceso hijo."""
+    return _worker_engine.price_batch(*columns, filament_categories=_worker_categories)
+
+
+def ordered_map(func: Callable[[Any], Any], items: Iterable[Any], workers: Optional[int] = None,
+                initializer: Optional[Callable] = None, initargs: tuple = (),
+                fallback: Optional[Callable[[Any], Any]] = None) -> Iterator[Any]:
+    """Aplica `func` a cada elemento en un pool de procesos, en orden de entrada.
+
+    Solo hay `workers * PENDING_PER_WORKER` elementos en vuelo a la vez.
+    `fallback` (por defecto `func`) procesa los elementos en el proceso
+    actual cuando hay un solo worker o el pool no está disponible; debe
+    devolver lo mismo que `func`.
+    """
+    workers = workers or default_workers()
+    fallback = fallback or func
+    iterator = iter(items)
+    if workers <= 1:
+        yield from map(fallback, iterator)
+        return
+
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    except (OSError, NotImplementedError, ImportError) as e:
+        print(f"Error al crear el pool de procesos, se usa un solo proceso: {e}")
+        yield from map(fallback, iterator)
+        return
+
+    limit = workers * PENDING_PER_WORKER
+    pending = deque()
+    try:
+        try:
+            while True:
+                while len(pending) < limit:
+                    item = next(iterator, _EXHAUSTED)
+                    if item is _EXHAUSTED:
+                        break
+                    # Se anota antes de enviar para no perderlo si el envío falla
+                    pending.append((item, None))
+                    pending[-1] = (item, executor.submit(func, item))
+                if not pending:
+                    return
+                result = pending[0][1].result()
+                pending.popleft()
+                yield result
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Error en el pool de procesos, se continúa en un solo proceso: {e}")
+            for item, _ in pending:
+                yield fallback(item)
+            yield from map(fallback, iterator)
+    finally:
+        # shutdown(cancel_futures=...) no existe en Python 3.8: cancelar a mano
+        for _, future in pending:
+            if future is not None:
+                future.cancel()
+        executor.shutdown(wait=True)
+
+
+def price_batch_parallel(engine: PricingEngine, weights_g, total_hours, filament_types, profit_margin_percent,
+                         filament_categories: Optional[List[str]] = None, workers: Optional[int] = None,
+                         chunk_size: int = BATCH_CHUNK_SIZE) -> Dict[str, Any]:
+    """`PricingEngine.price_batch` con las filas repartidas por bloques entre procesos.
+
+    Las columnas deben ser secuencias (listas o arrays) de la misma longitud;
+    el resultado es idéntico al de una sola llamada a `price_batch`.
+    """
+    count = len(weights_g)
+    columns = (
+        (weights_g[start:start + chunk_size], total_hours[start:start + chunk_size],
+         filament_types[start:start + chunk_size], profit_margin_percent[start:start + chunk_size])
+        for start in range(0, count, chunk_size)
+    )
+    parts = list(ordered_map(
+        _price_batch_in_worker, columns, workers,
+        initializer=_init_batch_worker,
+        initargs=(engine, filament_categories),
+        fallback=lambda part: engine.price_batch(*part, filament_categories=filament_categories)
+    ))
+    if len(parts) <= 1:
+        return parts[0] if parts else engine.price_batch(
+            weights_g, total_hours, filament_types, profit_margin_percent, filament_categories=filament_categories)
+    if np is not None:
+        return {field: np.concatenate([part[field] for part in parts]) for field in parts[0]}
+    return {field: [value for part in parts for value in part[field]] for field in parts[0]}
+
+
+class ParallelQuoter(BulkQuoter):
+    """`BulkQuoter` que cotiza los bloques en varios procesos.
+
+    Con `workers=1` (o sin pool disponible) se comporta igual que
+    `BulkQuoter`; con `workers=None` usa un proceso por núcleo.
+    """
+
+    def __init__(self, engine: PricingEngine, profit_margin_percent: float = DEFAULT_PROFIT_MARGIN,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, workers: Optional[int] = None):
+        super().__init__(engine, profit_margin_percent, chunk_size)
+        self.workers = workers or default_workers()
+
+    def quote_parts(self, rows):
+        """Cotiza una secuencia de filas bloque a bloque, en orden de entrada."""
+        return ordered_map(
+            _price_chunk_in_worker, chunked(rows, self.chunk_size), self.workers,
+            initializer=_init_worker,
+            initargs=(self.engine, self.profit_margin_percent, self.chunk_size),
+            fallback=self.price_chunk
+        )
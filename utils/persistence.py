@@ -0,0 +1,507 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _fsync_directory(directory: str):
+    """Sincroniza la entrada de directorio tras un renombrado (sólo POSIX)."""
+    if os.name != "posix":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_temp_file(path: str, payload: bytes, fsync: bool) -> str:
+    """Escribe `payload` en un temporal junto a `path` y devuelve su ruta."""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def atomic_write_bytes(path: str, payload: bytes, fsync: bool = True):
+    """Escribe un archivo de forma atómica: temporal, fsync y renombrado.
+
+    Ante un cierre abrupto el destino conserva la versión anterior completa
+    o la nueva completa, nunca un archivo truncado. Lanza OSError si falla.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = _write_temp_file(path, payload, fsync)
+    try:
+        os.replace(temp_path, path)
+        if fsync:
+            _fsync_directory(directory)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def commit_files(payloads: Dict[str, bytes], fsync: bool = True):
+    """Escribe varios archivos como un grupo: cambian todos o ninguno.
+
+    Primero se escriben y sincronizan todos los temporales; sólo si todos
+    salen bien se renombran. Si falla un renombrado, los archivos ya
+    renombrados recuperan su contenido anterior (o se borran si no
+    existían). Ante un cierre abrupto a mitad de los renombrados cada
+    archivo queda completo, en su versión anterior o en la nueva.
+    Lanza OSError si falla.
+    """
+    prepared = []
+    try:
+        for path, payload in payloads.items():
+            prepared.append((path, _write_temp_file(path, payload, fsync)))
+        # Contenido anterior de cada destino (None: no existía) para deshacer
+        previous = {}
+        for path, _ in prepared:
+            try:
+                with open(path, 'rb') as f:
+                    previous[path] = f.read()
+            except FileNotFoundError:
+                previous[path] = None
+    except BaseException:
+        _remove_temp_files(prepared)
+        raise
+
+    replaced = []
+    try:
+        for path, temp_path in prepared:
+            os.replace(temp_path, path)
+            replaced.append(path)
+    except BaseException:
+        _remove_temp_files(prepared)
+        _restore_files(replaced, previous, fsync)
+        raise
+    if fsync:
+        for directory in {os.path.dirname(os.path.abspath(path)) for path in payloads}:
+            _fsync_directory(directory)
+
+
+def _remove_temp_files(prepared):
+    """Borra los temporales que sigan existiendo."""
+    for _, temp_path in prepared:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _restore_files(paths, previous: Dict[str, Optional[bytes]], fsync: bool):
+    """Devuelve cada archivo a su contenido anterior (o lo borra si no existía)."""
+    for path in reversed(paths):
+        try:
+            if previous[path] is None:
+                os.remove(path)
+            else:
+                atomic_write_bytes(path, previous[path], fsync=fsync)
+        except OSError as e:
+            print(f"Error al restaurar {path} tras un guardado en grupo fallido: {e}")
+
+
+class GroupCommitWriter:
+    """Escritor atómico compartido con confirmación en grupo.
+
+    El primer guardado que llega actúa como líder: espera `window` segundos
+    para reunir a otros guardados concurrentes y los escribe juntos. Varios
+    guardados del mismo archivo dentro de la ventana se reducen al último,
+    con una sola escritura y un solo fsync.
+    """
+
+    def __init__(self, window: float = 0.0, fsync: bool = True):
+        self.window = window
+        self.fsync = fsync
+        self._cond = threading.Condition()
+        self._pending: Dict[str, bytes] = {}
+        self._batch_number = 0
+        self._completed_batch = -1
+        self._leader_active = False
+        self._results: Dict[int, Dict[str, Optional[BaseException]]] = {}
+        self.commit_count = 0
+        self.write_count = 0
+
+    def configure(self, window: Optional[float] = None, fsync: Optional[bool] = None):
+        """Ajusta la ventana de agrupación y la durabilidad."""
+        if window is not None:
+            self.window = window
+        if fsync is not None:
+            self.fsync = fsync
+
+    def commit(self, path: str, payload: bytes):
+        """Guarda `payload` en `path` de forma atómica. Lanza OSError si falla."""
+        path = os.path.abspath(path)
+        with self._cond:
+            self._pending[path] = payload
+            batch_number = self._batch_number
+            self.commit_count += 1
+            if self._leader_active:
+                while self._completed_batch < batch_number:
+                    self._cond.wait()
+                error = self._results.get(batch_number, {}).get(path)
+                if error is not None:
+                    raise error
+                return
+            self._leader_active = True
+
+        self._lead()
+        with self._cond:
+            error = self._results.get(batch_number, {}).get(path)
+        if error is not None:
+            raise error
+
+    def _lead(self):
+        """Escribe lotes mientras haya guardados pendientes."""
+        while True:
+            batch: Dict[str, bytes] = {}
+            batch_number = None
+            results: Dict[str, Optional[BaseException]] = {}
+            try:
+                if self.window > 0:
+                    time.sleep(self.window)
+                with self._cond:
+                    batch = self._pending
+                    batch_number = self._batch_number
+                    self._pending = {}
+                    self._batch_number += 1
+
+                for path, payload in batch.items():
+                    try:
+                        atomic_write_bytes(path, payload, fsync=self.fsync)
+                        results[path] = None
+                        self.write_count += 1
+                    except OSError as e:
+                        results[path] = e
+            except BaseException as e:
+                # Un error inesperado no puede dejar esperando al resto del lote
+                self._abort_batch(batch, batch_number, results, e)
+                raise
+
+            with self._cond:
+                self._finish_batch(batch_number, results)
+                if not self._pending:
+                    self._leader_active = False
+                    return
+
+    def _finish_batch(self, batch_number: int, results: Dict[str, Optional[BaseException]]):
+        """Publica los resultados de un lote y despierta a quienes lo esperan (con `_cond` tomado)."""
+        self._results[batch_number] = results
+        self._results.pop(batch_number - 64, None)
+        self._completed_batch = batch_number
+        self._cond.notify_all()
+
+    def _abort_batch(self, batch: Dict[str, bytes], batch_number: Optional[int],
+                     results: Dict[str, Optional[BaseException]], error: BaseException):
+        """Marca con `error` lo que quedó sin escribir y cede el liderazgo."""
+        with self._cond:
+            if batch_number is None:
+                # El fallo llegó antes de tomar el lote: tomarlo para responder a sus guardados
+                batch = self._pending
+                batch_number = self._batch_number
+                self._pending = {}
+                self._batch_number += 1
+            for path in batch:
+                results.setdefault(path, error)
+            self._finish_batch(batch_number, results)
+            self._leader_active = False
+
+
+group_commit = GroupCommitWriter()
+
+# Escrituras retenidas por hilo mientras una unidad de trabajo las prepara
+_staging = threading.local()
+
+
+def configure_group_commit(window: Optional[float] = None, fsync: Optional[bool] = None):
+    """Ajusta el escritor compartido por todos los almacenes."""
+    group_commit.configure(window=window, fsync=fsync)
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2, ensure_ascii: bool = True):
+    """Serializa `data` y lo guarda mediante el escritor compartido."""
+    payload = json.dumps(data, indent=indent, ensure_ascii=ensure_ascii).encode('utf-8')
+    staged = getattr(_staging, "payloads", None)
+    if staged is not None:
+        staged[os.path.abspath(path)] = payload
+        return
+    group_commit.commit(path, payload)
+
+
+@contextmanager
+def staged_writes():
+    """Retiene las escrituras de `atomic_write_json` del hilo actual.
+
+    Devuelve el diccionario ruta -> contenido para confirmarlo después con
+    `commit_files`.
+    """
+    previous = getattr(_staging, "payloads", None)
+    _staging.payloads = {}
+    try:
+        yield _staging.payloads
+    finally:
+        _staging.payloads = previous
+
+
+class WriteBehindWriter:
+    """Agrupa guardados: las mutaciones marcan el archivo como sucio y un hilo
+    en segundo plano lo escribe como mucho una vez por intervalo.
+
+    Con `lock`, `write_func` se ejecuta con ese candado tomado y sus
+    escrituras retenidas (`staged_writes`): los datos se serializan sin que
+    otro hilo los modifique y el archivo se escribe después, ya sin el candado.
+    """
+
+    def __init__(self, write_func: Callable[[], bool], interval: float = 1.0, name: str = "write-behind",
+                 lock=None):
+        self.write_func = write_func
+        self.interval = interval
+        self.name = name
+        self.lock = lock
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._paused = 0
+        self.flush_count = 0
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        """Marca los datos como pendientes de escribir."""
+        with self._lock:
+            self._dirty = True
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Bucle del hilo: escribe los cambios pendientes en cada intervalo."""
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+
+    def pause(self):
+        """Suspende las escrituras (espera a que termine la que esté en curso)."""
+        with self._write_lock:
+            self._paused += 1
+
+    def resume(self):
+        """Reanuda las escrituras; lo pendiente se escribe en el siguiente intervalo."""
+        with self._write_lock:
+            self._paused = max(0, self._paused - 1)
+
+    def flush(self) -> bool:
+        """Escribe inmediatamente los cambios pendientes, si los hay.
+
+        Mientras el escritor está en pausa no escribe y devuelve si queda algo
+        pendiente. El candado de datos se toma antes que el de escritura (un
+        hilo que ya lo tiene puede llamar a `flush` sin cruzarse con el hilo
+        de escritura) y se suelta en cuanto los datos están serializados.
+        """
+        with ExitStack() as held:
+            with self.lock if self.lock is not None else nullcontext():
+                held.enter_context(self._write_lock)
+                with self._lock:
+                    if not self._dirty:
+                        return True
+                    if self._paused:
+                        return False
+                    self._dirty = False
+                saved, payloads = self._serialize()
+            if saved is not False and payloads:
+                saved = self._commit(payloads)
+            if saved is False:
+                # Reintentar en el siguiente intervalo
+                with self._lock:
+                    self._dirty = True
+                return False
+            self.flush_count += 1
+            return True
+
+    def _serialize(self) -> Tuple[Any, Dict[str, bytes]]:
+        """Ejecuta `write_func`; con `lock`, retiene sus escrituras para hacerlas después."""
+        try:
+            if self.lock is None:
+                return self.write_func(), {}
+            with staged_writes() as payloads:
+                saved = self.write_func()
+            return saved, payloads
+        except Exception as e:
+            print(f"Error en la escritura diferida ({self.name}): {e}")
+            return False, {}
+
+    def _commit(self, payloads: Dict[str, bytes]) -> bool:
+        """Escribe los archivos serializados por `_serialize`."""
+        try:
+            for path, payload in payloads.items():
+                group_commit.commit(path, payload)
+            return True
+        except OSError as e:
+            print(f"Error en la escritura diferida ({self.name}): {e}")
+            return False
+
+    def close(self) -> bool:
+        """Detiene el hilo y escribe lo pendiente."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self.flush()
+
+
+# Gestores con escritura diferida activa: se vacían al salir del intérprete
+_write_behind_managers = weakref.WeakSet()
+# Protege la creación perezosa de `WriteBehindMixin.data_lock`
+_data_lock_guard = threading.Lock()
+
+
+@atexit.register
+def _flush_write_behind_managers():
+    """Escribe lo pendiente de todos los gestores en modo diferido."""
+    for manager in list(_write_behind_managers):
+        manager.flush()
+
+
+def mutator(method: Callable) -> Callable:
+    """Ejecuta un método que modifica los datos del gestor con su `data_lock` tomado.
+
+    El hilo de la escritura diferida toma el mismo candado para serializar,
+    así que nunca ve los datos a medio modificar. En clases sin `data_lock`
+    el método se ejecuta tal cual.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        lock = getattr(self, "data_lock", None)
+        if lock is None:
+            return method(self, *args, **kwargs)
+        with lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class WriteBehindMixin:
+    """Modo de escritura diferida para los gestores que guardan en JSON.
+
+    Los métodos `save_*` delegan en `_persist`: en modo normal escriben al
+    momento, en modo diferido sólo marcan el archivo como sucio y dentro de
+    una `UnitOfWork` el guardado se pospone hasta su confirmación.
+
+    Los métodos que modifican los datos van decorados con `mutator`: en modo
+    diferido el hilo de escritura serializa con el mismo `data_lock`.
+    `data_version` aumenta con cada guardado y sirve de clave a las cachés
+    que dependen de los datos del gestor.
+    """
+
+    data_version = 0
+
+    _write_behind_writers: Optional[Dict[str, WriteBehindWriter]] = None
+    _write_behind_interval: Optional[float] = None
+    _unit_of_work = None
+    # Guardados inmediatos que fallaron: su archivo no refleja la memoria
+    _failed_writes: Optional[set] = None
+
+    @property
+    def data_lock(self) -> threading.RLock:
+        """Candado de los datos del gestor (lo toman los `mutator` y la escritura diferida)."""
+        lock = self.__dict__.get("_data_lock")
+        if lock is None:
+            with _data_lock_guard:
+                lock = self.__dict__.setdefault("_data_lock", threading.RLock())
+        return lock
+
+    def enable_write_behind(self, interval: float = 1.0):
+        """Activa la escritura diferida con el intervalo indicado (segundos)."""
+        if self._write_behind_writers is None:
+            self._write_behind_writers = {}
+        _write_behind_managers.add(self)
+        self._write_behind_interval = interval
+        for writer in self._write_behind_writers.values():
+            writer.interval = interval
+
+    def disable_write_behind(self) -> bool:
+        """Escribe lo pendiente y vuelve al guardado inmediato."""
+        saved = True
+        for writer in (self._write_behind_writers or {}).values():
+            saved = writer.close() and saved
+        self._write_behind_interval = None
+        if self._write_behind_writers:
+            self._write_behind_writers.clear()
+        _write_behind_managers.discard(self)
+        return saved
+
+    def is_write_behind_enabled(self) -> bool:
+        return self._write_behind_interval is not None
+
+    def is_dirty(self) -> bool:
+        """Indica si hay cambios sin escribir en disco."""
+        return any(w.dirty for w in (self._write_behind_writers or {}).values())
+
+    def is_persisted(self, write_name: str) -> bool:
+        """Indica si el archivo de `write_name` (p. ej. "_write_clients") refleja la memoria."""
+        writer = (self._write_behind_writers or {}).get(write_name)
+        if writer is not None and writer.dirty:
+            return False
+        return write_name not in (self._failed_writes or ())
+
+    def pause_write_behind(self):
+        """Escribe lo pendiente y suspende la escritura diferida (p. ej. durante una unidad de trabajo)."""
+        for writer in list((self._write_behind_writers or {}).values()):
+            writer.flush()
+            writer.pause()
+
+    def resume_write_behind(self):
+        """Reanuda la escritura diferida suspendida con `pause_write_behind`."""
+        for writer in list((self._write_behind_writers or {}).values()):
+            writer.resume()
+
+    def flush(self) -> bool:
+        """Escribe inmediatamente todos los cambios pendientes."""
+        saved = True
+        for writer in list((self._write_behind_writers or {}).values()):
+            saved = writer.flush() and saved
+        return saved
+
+    def _persist(self, write_func: Callable[[], bool]) -> bool:
+        """Escribe ahora o marca como sucio según el modo activo."""
+        self.data_version += 1
+        if self._unit_of_work is not None:
+            self._unit_of_work.defer(self, write_func)
+            return True
+        if self._write_behind_interval is None:
+            saved = write_func()
+            self._track_write(write_func.__name__, saved is not False)
+            return saved
+        key = write_func.__name__
+        writer = self._write_behind_writers.get(key)
+        if writer is None:
+            writer = WriteBehindWriter(write_func, self._write_behind_interval,
+                                       name=f"{type(self).__name__}.{key}", lock=self.data_lock)
+            self._write_behind_writers[key] = writer
+        writer.mark_dirty()
+        return True
+
+    def _track_write(self, write_name: str, saved: bool):
+        """Anota si el último guardado inmediato de `write_name` llegó a disco."""
+        if saved:
+            if self._failed_writes:
+                self._failed_writes.discard(write_name)
+        else:
+            if self._failed_writes is None:
+                self._failed_writes = set()
+            self._failed_writes.add(write_name)
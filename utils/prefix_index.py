@@ -0,0 +1,125 @@
+"""
+Autocompletado por prefijo para las cajas de búsqueda.
+
+`PrefixIndex` guarda una lista ordenada de claves (el nombre normalizado
+desde el comienzo de cada palabra: "engranaje grande" y "grande") y la
+consulta con bisect. Cada pulsación cuesta O(log n + k) para devolver las k
+primeras coincidencias, y las altas y bajas mantienen la lista ordenada sin
+reconstruirla.
+"""
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Tuple
+
+from utils.text_index import tokenize
+
+# Sugerencias que devuelve `complete` por defecto
+DEFAULT_COMPLETIONS = 10
+
+
+def prefix_keys(text) -> List[str]:
+    """Claves de un texto: el texto normalizado a partir de cada una de sus palabras."""
+    words = tokenize(text)
+    return [" ".join(words[position:]) for position in range(len(words))]
+
+
+class PrefixIndex:
+    """Lista ordenada de (clave, orden, id) sobre un campo de texto, con la interfaz de los demás índices.
+
+    El orden de inserción hace única cada pareja (clave, orden), así que las
+    tuplas nunca llegan a comparar IDs.
+    """
+
+    def __init__(self, field: str, id_attr: str = "id"):
+        self.field = field
+        self.id_attr = id_attr
+        self.entries: List[Tuple[str, int, Any]] = []
+        self.records: Dict[Any, Any] = {}
+        self._keys: Dict[Any, Tuple[int, List[str]]] = {}
+        self._next_order = 0
+
+    def rebuild(self, records: Iterable[Any]):
+        """Reconstruye el índice desde cero (un solo sort)."""
+        self.entries = []
+        self.records = {}
+        self._keys = {}
+        self._next_order = 0
+        for record in records:
+            record_id = getattr(record, self.id_attr)
+            keys = prefix_keys(getattr(record, self.field, None))
+            order = self._next_order
+            self._next_order += 1
+            self.entries.extend((key, order, record_id) for key in keys)
+            self._keys[record_id] = (order, keys)
+            self.records[record_id] = record
+        self.entries.sort()
+
+    def add(self, record: Any):
+        """Añade un registro (si ya estaba, lo vuelve a indexar con su texto actual)."""
+        record_id = getattr(record, self.id_attr)
+        previous = self._keys.get(record_id)
+        if previous is None:
+            order = self._next_order
+            self._next_order += 1
+        else:
+            order = previous[0]
+            self._discard(record_id)
+        keys = prefix_keys(getattr(record, self.field, None))
+        for key in keys:
+            insort(self.entries, (key, order, record_id))
+        self._keys[record_id] = (order, keys)
+        self.records[record_id] = record
+
+    def remove(self, record: Any):
+        """Quita un registro del índice."""
+        self._discard(getattr(record, self.id_attr))
+
+    def reindex(self, record: Any, old_id: Any = None):
+        """Actualiza un registro cuyo texto (o ID) pudo cambiar."""
+        if old_id is not None and old_id != getattr(record, self.id_attr):
+            self._discard(old_id)
+        self.add(record)
+
+    def _discard(self, record_id: Any):
+        """Elimina las entradas de un ID con las claves que tenía al indexarse."""
+        previous = self._keys.pop(record_id, None)
+        if previous is None:
+            return
+        order, keys = previous
+        for key in keys:
+            position = bisect_left(self.entries, (key, order))
+            if position < len(self.entries) and self.entries[position][:2] == (key, order):
+                del self.entries[position]
+        self.records.pop(record_id, None)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def complete_ids(self, prefix: str, limit: int = DEFAULT_COMPLETIONS) -> List[Any]:
+        """IDs cuyo texto tiene una palabra (o frase) que empieza por `prefix`, en orden alfabético."""
+        prefix = " ".join(tokenize(prefix))
+        if not prefix:
+            return []
+        entries = self.entries
+        position = bisect_left(entries, (prefix,))
+        found: Dict[Any, None] = {}
+        while position < len(entries) and len(found) < limit:
+            key, _, record_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            found[record_id] = None
+            position += 1
+        return list(found)
+
+    def complete(self, prefix: str, limit: int = DEFAULT_COMPLETIONS) -> List[Any]:
+        """Registros que completan `prefix`, como máximo `limit`."""
+        records = self.records
+        return [records[record_id] for record_id in self.complete_ids(prefix, limit)]
+
+
+def get_quote_prefix_index(db_manager) -> PrefixIndex:
+    """Devuelve el índice de prefijos de nombres de pieza del gestor, creándolo si hace falta."""
+    for index in db_manager.indexes:
+        if isinstance(index, PrefixIndex) and index.field == "piece_name":
+            return index
+    return db_manager.register_index(PrefixIndex("piece_name"))
@@ -0,0 +1,212 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él el lote se calcula fila a fila
+    np = None
+
+# Campos de una cotización lista para `DatabaseManager.save_quote`
+QUOTE_DATA_FIELDS = (
+    "piece_name", "weight_g", "total_hours", "filament_type", "material_cost",
+    "print_time_cost", "electricity_cost", "profit_margin_percent", "final_price"
+)
+# Campos del desglose que devuelve el cálculo por lotes
+BREAKDOWN_FIELDS = (
+    "material_cost", "print_time_cost", "electricity_cost",
+    "subtotal", "margin_amount", "final_price"
+)
+
+
+class PricingEngine:
+    """Fórmula de precio de la calculadora, sin dependencias de la interfaz.
+
+    material = peso(kg) * precio/kg; impresión = horas * costo/hora;
+    electricidad = kW * horas * precio kWh; precio final = subtotal + margen.
+
+    Cada término es un método estático válido para escalares y arrays, para
+    que el resto de cálculos (sensibilidad, despejes) usen la misma fórmula.
+    """
+
+    def __init__(self, machine_cost_per_hour: float, electricity_kwh_price: float,
+                 printer_power_watts: float, filament_prices: Dict[str, float]):
+        self.machine_cost_per_hour = machine_cost_per_hour
+        self.electricity_kwh_price = electricity_kwh_price
+        self.printer_power_watts = printer_power_watts
+        self.filament_prices = filament_prices
+
+    def __reduce__(self):
+        # Los precios pueden venir en un MappingProxyType (no serializable):
+        # se copian a dict para poder enviar el motor a otros procesos
+        return (type(self), (self.machine_cost_per_hour, self.electricity_kwh_price,
+                             self.printer_power_watts, dict(self.filament_prices)))
+
+    @staticmethod
+    def material_cost(weight_g, price_per_kg):
+        """Costo del material: peso en kg por precio del kg."""
+        return (weight_g / 1000) * price_per_kg
+
+    @staticmethod
+    def print_time_cost(total_hours, machine_cost_per_hour):
+        """Costo de uso de la máquina."""
+        return total_hours * machine_cost_per_hour
+
+    @staticmethod
+    def electricity_cost(total_hours, printer_power_watts, electricity_kwh_price):
+        """Costo de la electricidad: kW por horas por precio del kWh."""
+        return (printer_power_watts / 1000) * total_hours * electricity_kwh_price
+
+    @staticmethod
+    def margin_amount(subtotal, profit_margin_percent):
+        """Margen de ganancia sobre el subtotal."""
+        return subtotal * (profit_margin_percent / 100)
+
+    @classmethod
+    def final_price(cls, weight_g, total_hours, filament_price_per_kg, machine_cost_per_hour,
+                    electricity_kwh_price, printer_power_watts, profit_margin_percent):
+        """Precio final con todos los parámetros explícitos (escalares o arrays)."""
+        subtotal = (cls.material_cost(weight_g, filament_price_per_kg)
+                    + cls.print_time_cost(total_hours, machine_cost_per_hour)
+                    + cls.electricity_cost(total_hours, printer_power_watts, electricity_kwh_price))
+        return subtotal + cls.margin_amount(subtotal, profit_margin_percent)
+
+    def subtotal(self, weight_g, total_hours, price_per_kg):
+        """Costo sin margen con la configuración del motor (escalares o arrays)."""
+        return (self.material_cost(weight_g, price_per_kg)
+                + self.print_time_cost(total_hours, self.machine_cost_per_hour)
+                + self.electricity_cost(total_hours, self.printer_power_watts, self.electricity_kwh_price))
+
+    @property
+    def hourly_cost(self) -> float:
+        """Costo por hora de impresión: máquina + electricidad."""
+        return (self.machine_cost_per_hour
+                + self.electricity_cost(1, self.printer_power_watts, self.electricity_kwh_price))
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "PricingEngine":
+        """Crea el motor a partir del diccionario de `settings.json`."""
+        return cls(
+            float(settings['machine_cost_per_hour']),
+            float(settings['electricity_kwh_price']),
+            int(settings['printer_power_watts']),
+            {name: float(info['price_per_kg']) for name, info in settings['filaments'].items()}
+        )
+
+    def price(self, weight_g: float, total_hours: float, filament_type: str,
+              profit_margin_percent: float, piece_name: str = "Sin nombre") -> Dict[str, Any]:
+        """Calcula el precio de una pieza.
+
+        Devuelve los campos de `QUOTE_DATA_FIELDS` más `subtotal` y
+        `margin_amount`. Lanza KeyError si el filamento no está configurado.
+        """
+        filament_price_per_kg = self.filament_prices[filament_type]
+        material_cost = self.material_cost(weight_g, filament_price_per_kg)
+        print_time_cost = self.print_time_cost(total_hours, self.machine_cost_per_hour)
+        electricity_cost = self.electricity_cost(total_hours, self.printer_power_watts, self.electricity_kwh_price)
+
+        subtotal = material_cost + print_time_cost + electricity_cost
+        margin_amount = self.margin_amount(subtotal, profit_margin_percent)
+        final_price = subtotal + margin_amount
+
+        return {
+            "piece_name": piece_name,
+            "weight_g": weight_g,
+            "total_hours": total_hours,
+            "filament_type": filament_type,
+            "material_cost": material_cost,
+            "print_time_cost": print_time_cost,
+            "electricity_cost": electricity_cost,
+            "subtotal": subtotal,
+            "margin_amount": margin_amount,
+            "profit_margin_percent": profit_margin_percent,
+            "final_price": final_price
+        }
+
+    def price_batch(self, weights_g: Iterable[float], total_hours: Iterable[float],
+                    filament_types: Union[str, Iterable[str], Iterable[int]],
+                    profit_margin_percent: Union[float, Iterable[float]],
+                    filament_categories: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Calcula el desglose de muchas piezas a la vez.
+
+        `filament_types` y `profit_margin_percent` aceptan un valor único para
+        todo el lote. Si se pasa `filament_categories`, `filament_types` son
+        códigos enteros de esa lista (como las columnas de `QuoteColumns`).
+        Con NumPy devuelve arrays float64 por campo de `BREAKDOWN_FIELDS`; sin
+        NumPy, listas. Los resultados coinciden exactamente con los de `price`.
+        """
+        if filament_categories is not None:
+            category_prices = [self.filament_prices[name] for name in filament_categories]
+        if np is None:
+            if filament_categories is not None:
+                filament_prices = [category_prices[code] for code in filament_types]
+            elif isinstance(filament_types, str):
+                filament_prices = None
+            else:
+                filament_prices = [self.filament_prices[name] for name in filament_types]
+            return self._price_batch_python(weights_g, total_hours, filament_types,
+                                            filament_prices, profit_margin_percent)
+
+        weights = np.asarray(weights_g, dtype=np.float64)
+        hours = np.asarray(total_hours, dtype=np.float64)
+        margins = np.asarray(profit_margin_percent, dtype=np.float64)
+
+        if filament_categories is not None:
+            prices_per_kg = np.array(category_prices, dtype=np.float64)[np.asarray(filament_types)]
+        else:
+            prices_per_kg = self._filament_price_array(filament_types, weights.shape)
+        material_cost = self.material_cost(weights, prices_per_kg)
+        print_time_cost = self.print_time_cost(hours, self.machine_cost_per_hour)
+        electricity_cost = self.electricity_cost(hours, self.printer_power_watts, self.electricity_kwh_price)
+
+        subtotal = material_cost + print_time_cost + electricity_cost
+        margin_amount = self.margin_amount(subtotal, margins)
+        final_price = subtotal + margin_amount
+
+        return {
+            "material_cost": material_cost,
+            "print_time_cost": print_time_cost,
+            "electricity_cost": electricity_cost,
+            "subtotal": subtotal,
+            "margin_amount": margin_amount,
+            "final_price": final_price
+        }
+
+    def _filament_price_array(self, filament_types, shape):
+        """Convierte los tipos de filamento en un array de precios por kg."""
+        if isinstance(filament_types, str):
+            return np.full(shape, self.filament_prices[filament_types], dtype=np.float64)
+        names, codes = np.unique(np.asarray(filament_types), return_inverse=True)
+        prices = np.array([self.filament_prices[str(name)] for name in names], dtype=np.float64)
+        return prices[codes.reshape(shape)]
+
+    def _price_batch_python(self, weights_g, total_hours, filament_types, filament_prices,
+                            profit_margin_percent):
+        """Cálculo por lotes sin NumPy, con la misma fórmula que `price`."""
+        weights = list(weights_g)
+        count = len(weights)
+        if filament_prices is None:
+            filament_prices = [self.filament_prices[filament_types]] * count
+        margins = (profit_margin_percent if isinstance(profit_margin_percent, Iterable)
+                   else [profit_margin_percent] * count)
+        machine_cost_per_hour = self.machine_cost_per_hour
+        printer_power_watts = self.printer_power_watts
+        electricity_kwh_price = self.electricity_kwh_price
+        material_cost_of, print_time_cost_of = self.material_cost, self.print_time_cost
+        electricity_cost_of, margin_amount_of = self.electricity_cost, self.margin_amount
+
+        result = {field: [] for field in BREAKDOWN_FIELDS}
+        material_costs, print_time_costs, electricity_costs, subtotals, margin_amounts, final_prices = (
+            result[field] for field in BREAKDOWN_FIELDS
+        )
+        for weight, hours, price_per_kg, margin in zip(weights, total_hours, filament_prices, margins):
+            material_cost = material_cost_of(weight, price_per_kg)
+            print_time_cost = print_time_cost_of(hours, machine_cost_per_hour)
+            electricity_cost = electricity_cost_of(hours, printer_power_watts, electricity_kwh_price)
+            subtotal = material_cost + print_time_cost + electricity_cost
+            margin_amount = margin_amount_of(subtotal, margin)
+            material_costs.append(material_cost)
+            print_time_costs.append(print_time_cost)
+            electricity_costs.append(electricity_cost)
+            subtotals.append(subtotal)
+            margin_amounts.append(margin_amount)
+            final_prices.append(subtotal + margin_amount)
+        return result
@@ -0,0 +1,185 @@
+"""
+Cálculo inverso del precio: dado un precio final objetivo, qué margen,
+peso máximo u horas máximas lo alcanzan.
+
+La fórmula de `PricingEngine` es lineal en cada parámetro,
+
+    precio = (peso/1000 * precio_kg + horas * (costo_hora + kW * precio_kWh)) * (1 + margen/100)
+
+así que se despeja en forma cerrada. `solve_max` es un buscador por
+bisección vectorizado para reglas de precio no lineales (tramos, recargos):
+solo necesita una función de precio creciente.
+"""
+
+from typing import Callable, Iterable, List, Optional, Union
+
+from utils.pricing_engine import PricingEngine, np
+
+Number = Union[int, float]
+
+
+def solve_max(price_func: Callable, target_price, low, high, iterations: int = 60):
+    """Mayor valor x en [low, high] con price_func(x) <= target_price.
+
+    `price_func` debe ser creciente en x y aceptar arrays si se le pasan
+    arrays (con NumPy todo el lote se resuelve a la vez). Devuelve NaN (o
+    None sin NumPy) donde ni siquiera `low` alcanza el objetivo; si `high`
+    lo alcanza, devuelve `high`. 60 iteraciones dan precisión de float64.
+    """
+    if np is None:
+        if isinstance(target_price, Iterable):
+            lows = low if isinstance(low, Iterable) else [low] * len(target_price)
+            highs = high if isinstance(high, Iterable) else [high] * len(target_price)
+            return [solve_max(price_func, target, lo, hi, iterations)
+                    for target, lo, hi in zip(target_price, lows, highs)]
+        if price_func(low) > target_price:
+            return None
+        if price_func(high) <= target_price:
+            return high
+        for _ in range(iterations):
+            middle = (low + high) / 2
+            if price_func(middle) <= target_price:
+                low = middle
+            else:
+                high = middle
+        return low
+
+    target_price = np.asarray(target_price, dtype=np.float64)
+    low = np.broadcast_to(np.asarray(low, dtype=np.float64), target_price.shape).copy()
+    high = np.broadcast_to(np.asarray(high, dtype=np.float64), target_price.shape).copy()
+    feasible = price_func(low) <= target_price
+    reaches_high = price_func(high) <= target_price
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        below = price_func(middle) <= target_price
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    result = np.where(reaches_high, high, low)
+    result[~feasible] = np.nan
+    return result
+
+
+class PricingSolver:
+    """Despeja la fórmula de `PricingEngine` para un precio objetivo.
+
+    Los métodos individuales devuelven None si el objetivo no se puede
+    alcanzar (por ejemplo, si solo las horas ya cuestan más que el precio
+    objetivo). Los métodos `*_batch` aceptan columnas (listas o arrays) y
+    devuelven arrays NumPy con NaN en los casos imposibles, o listas con
+    None sin NumPy.
+    """
+
+    def __init__(self, engine: PricingEngine):
+        self.engine = engine
+        # Costo por hora de impresión: máquina + electricidad
+        self.hourly_cost = engine.hourly_cost
+
+    # ------------------------------------------------------------------
+    # Una pieza
+
+    def required_margin(self, weight_g: Number, total_hours: Number, filament_type: str,
+                        target_price: Number) -> Optional[float]:
+        """Margen (%) con el que la pieza cuesta `target_price`; negativo si hay que vender bajo costo."""
+        subtotal = self._subtotal(weight_g, total_hours, self.engine.filament_prices[filament_type])
+        if subtotal <= 0:
+            return None
+        return (target_price / subtotal - 1) * 100
+
+    def max_weight(self, total_hours: Number, filament_type: str, profit_margin_percent: Number,
+                   target_price: Number) -> Optional[float]:
+        """Peso máximo (g) que se puede usar sin pasar de `target_price`."""
+        price_per_kg = self.engine.filament_prices[filament_type]
+        budget = target_price / (1 + profit_margin_percent / 100) - total_hours * self.hourly_cost
+        if budget < 0 or price_per_kg <= 0:
+            return None
+        return budget * 1000 / price_per_kg
+
+    def max_hours(self, weight_g: Number, filament_type: str, profit_margin_percent: Number,
+                  target_price: Number) -> Optional[float]:
+        """Horas de impresión máximas sin pasar de `target_price`."""
+        price_per_kg = self.engine.filament_prices[filament_type]
+        budget = target_price / (1 + profit_margin_percent / 100) - self.engine.material_cost(weight_g, price_per_kg)
+        if budget < 0 or self.hourly_cost <= 0:
+            return None
+        return budget / self.hourly_cost
+
+    # ------------------------------------------------------------------
+    # Lotes
+
+    def required_margin_batch(self, weights_g, total_hours, filament_types, target_prices,
+                              filament_categories: Optional[List[str]] = None):
+        """`required_margin` para un lote completo."""
+        prices_per_kg = self._prices_per_kg(filament_types, filament_categories, len(target_prices))
+        if np is None:
+            result = []
+            for weight, hours, price_per_kg, target in zip(weights_g, total_hours, prices_per_kg, target_prices):
+                subtotal = self._subtotal(weight, hours, price_per_kg)
+                result.append((target / subtotal - 1) * 100 if subtotal > 0 else None)
+            return result
+        subtotal = self._subtotal(np.asarray(weights_g, dtype=np.float64),
+                                  np.asarray(total_hours, dtype=np.float64), prices_per_kg)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin = (np.asarray(target_prices, dtype=np.float64) / subtotal - 1) * 100
+        return np.where(subtotal > 0, margin, np.nan)
+
+    def max_weight_batch(self, total_hours, filament_types, profit_margin_percent, target_prices,
+                         filament_categories: Optional[List[str]] = None):
+        """`max_weight` para un lote completo."""
+        prices_per_kg = self._prices_per_kg(filament_types, filament_categories, len(target_prices))
+        if np is None:
+            margins = self._repeat(profit_margin_percent, len(target_prices))
+            result = []
+            for hours, price_per_kg, margin, target in zip(total_hours, prices_per_kg, margins, target_prices):
+                budget = target / (1 + margin / 100) - hours * self.hourly_cost
+                result.append(budget * 1000 / price_per_kg if budget >= 0 and price_per_kg > 0 else None)
+            return result
+        budget = (np.asarray(target_prices, dtype=np.float64)
+                  / (1 + np.asarray(profit_margin_percent, dtype=np.float64) / 100)
+                  - np.asarray(total_hours, dtype=np.float64) * self.hourly_cost)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = budget * 1000 / prices_per_kg
+        return np.where((budget >= 0) & (prices_per_kg > 0), weight, np.nan)
+
+    def max_hours_batch(self, weights_g, filament_types, profit_margin_percent, target_prices,
+                        filament_categories: Optional[List[str]] = None):
+        """`max_hours` para un lote completo."""
+        prices_per_kg = self._prices_per_kg(filament_types, filament_categories, len(target_prices))
+        if np is None:
+            margins = self._repeat(profit_margin_percent, len(target_prices))
+            result = []
+            for weight, price_per_kg, margin, target in zip(weights_g, prices_per_kg, margins, target_prices):
+                budget = target / (1 + margin / 100) - self.engine.material_cost(weight, price_per_kg)
+                result.append(budget / self.hourly_cost if budget >= 0 and self.hourly_cost > 0 else None)
+            return result
+        budget = (np.asarray(target_prices, dtype=np.float64)
+                  / (1 + np.asarray(profit_margin_percent, dtype=np.float64) / 100)
+                  - self.engine.material_cost(np.asarray(weights_g, dtype=np.float64), prices_per_kg))
+        if self.hourly_cost <= 0:
+            return np.full(budget.shape, np.nan)
+        return np.where(budget >= 0, budget / self.hourly_cost, np.nan)
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+
+    def _subtotal(self, weight_g, total_hours, price_per_kg):
+        """Costo sin margen (escalares o arrays), con la fórmula del motor."""
+        return self.engine.subtotal(weight_g, total_hours, price_per_kg)
+
+    @staticmethod
+    def _repeat(value, count: int) -> list:
+        """Un valor único repetido para todo el lote, o la columna tal cual."""
+        return list(value) if isinstance(value, Iterable) else [value] * count
+
+    def _prices_per_kg(self, filament_types, filament_categories, count: int):
+        """Precio por kg de cada fila (array NumPy o lista)."""
+        prices = self.engine.filament_prices
+        if isinstance(filament_types, str):
+            column = [prices[filament_types]] * count
+        elif filament_categories is not None:
+            category_prices = [prices[name] for name in filament_categories]
+            if np is not None:
+                return np.array(category_prices, dtype=np.float64)[np.asarray(filament_types)]
+            column = [category_prices[code] for code in filament_types]
+        else:
+            column = [prices[name] for name in filament_types]
+        return np.array(column, dtype=np.float64) if np is not None else column
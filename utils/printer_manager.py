@@ -3,7 +3,19 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any
 
+from utils.bulk_operations import BulkOperationsMixin
+from utils.persistence import WriteBehindMixin, atomic_write_json, mutator
+from utils.record_index import RecordIndex, intern_value
+
 class Printer:
+    __slots__ = (
+        "id", "name", "model", "manufacturer", "created_at", "updated_at",
+        "status", "purchase_date", "purchase_price", "hourly_rate",
+        "power_consumption", "build_volume", "technology", "nozzle_diameter",
+        "layer_height_range", "materials_supported", "maintenance_schedule",
+        "last_maintenance", "total_print_hours", "notes", "location"
+    )
+    
     def __init__(self, name: str, model: str, manufacturer: str):
         self.id = self._generate_id()
         self.name = name
@@ -60,22 +72,21 @@ class Printer:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        """Crea una impresora desde un diccionario."""
-        printer = cls(
-            data["name"], 
-            data["model"], 
-            data["manufacturer"]
-        )
+        """Crea una impresora desde un diccionario sin pasar por el constructor."""
+        printer = cls.__new__(cls)
         printer.id = data["id"]
+        printer.name = data["name"]
+        printer.model = data["model"]
+        printer.manufacturer = data["manufacturer"]
         printer.created_at = data["created_at"]
         printer.updated_at = data["updated_at"]
-        printer.status = data.get("status", "active")
+        printer.status = intern_value(data.get("status", "active"))
         printer.purchase_date = data.get("purchase_date")
         printer.purchase_price = data.get("purchase_price", 0.0)
         printer.hourly_rate = data.get("hourly_rate", 0.0)
         printer.power_consumption = data.get("power_consumption", 0.0)
         printer.build_volume = data.get("build_volume", "")
-        printer.technology = data.get("technology", "FDM")
+        printer.technology = intern_value(data.get("technology", "FDM"))
         printer.nozzle_diameter = data.get("nozzle_diameter", 0.4)
         printer.layer_height_range = data.get("layer_height_range", "0.05-0.3mm")
         printer.materials_supported = data.get("materials_supported", [])
@@ -116,10 +127,28 @@ class Printer:
             return min((self.total_print_hours / hours_in_period) * 100, 100)
         return 0
 
-class PrinterManager:
+class PrinterManager(WriteBehindMixin, BulkOperationsMixin):
+    _bulk_records_attr = "printers"
+    _bulk_unique_name = True
+    
     def __init__(self, printers_file="printers.json"):
         self.printers_file = printers_file
         self.printers = self.load_printers()
+        self.index = RecordIndex("name")
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Reconstruye los índices a partir de los impresoras en memoria."""
+        self.index.rebuild(self.printers)
+    
+    def _bulk_build(self, data: Dict[str, Any]):
+        """Crea una impresora a partir de un diccionario del lote."""
+        printer = Printer(data["name"], data.get("model", ""), data.get("manufacturer", ""))
+        self._apply_fields(printer, data)
+        return printer
+    
+    def _bulk_save(self):
+        return self.save_printers()
     
     def load_printers(self):
         """Carga las impresoras desde el archivo."""
@@ -134,15 +163,19 @@ class PrinterManager:
         return []
     
     def save_printers(self):
-        """Guarda las impresoras en el archivo."""
+        """Guarda las impresoras en el archivo (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_printers)
+    
+    def _write_printers(self):
+        """Escribe las impresoras en el archivo."""
         try:
-            with open(self.printers_file, 'w') as f:
-                json.dump([printer.to_dict() for printer in self.printers], f, indent=2)
+            atomic_write_json(self.printers_file, [printer.to_dict() for printer in self.printers])
             return True
         except IOError as e:
             print(f"Error al guardar impresoras: {e}")
             return False
     
+    @mutator
     def add_printer(self, name: str, model: str, manufacturer: str):
         """Añade una nueva impresora."""
         # Verificar si la impresora ya existe
@@ -151,22 +184,17 @@ class PrinterManager:
         
         printer = Printer(name, model, manufacturer)
         self.printers.append(printer)
+        self.index.add(printer)
         self.save_printers()
         return printer, "Impresora añadida exitosamente"
     
     def get_printer(self, printer_id: str):
         """Obtiene una impresora por ID."""
-        for printer in self.printers:
-            if printer.id == printer_id:
-                return printer
-        return None
+        return self.index.get(printer_id)
     
     def get_printer_by_name(self, name: str):
         """Obtiene una impresora por nombre."""
-        for printer in self.printers:
-            if printer.name.lower() == name.lower():
-                return printer
-        return None
+        return self.index.get_by_name(name)
     
     def get_printers(self, status=None, technology=None):
         """Obtiene todas las impresoras, opcionalmente filtradas por estado o tecnología."""
@@ -180,16 +208,21 @@ class PrinterManager:
         
         return filtered_printers
     
+    @mutator
     def update_printer(self, printer_id: str, **kwargs):
         """Actualiza una impresora con los valores proporcionados."""
         printer = self.get_printer(printer_id)
         if not printer:
             return False, "Impresora no encontrada"
         
+        old_id = printer.id
+        old_name = printer.name
+        
         # Actualizar campos proporcionados
         for key, value in kwargs.items():
             if hasattr(printer, key):
                 setattr(printer, key, value)
+        self.index.reindex(printer, old_id, old_name)
         
         # Actualizar fecha de modificación
         printer.updated_at = datetime.now().isoformat()
@@ -197,6 +230,7 @@ class PrinterManager:
         self.save_printers()
         return True, "Impresora actualizada"
     
+    @mutator
     def delete_printer(self, printer_id: str):
         """Elimina una impresora."""
         printer = self.get_printer(printer_id)
@@ -204,6 +238,7 @@ class PrinterManager:
             return False, "Impresora no encontrada"
         
         self.printers.remove(printer)
+        self.index.remove(printer)
         self.save_printers()
         return True, "Impresora eliminada"
     
@@ -258,6 +293,7 @@ class PrinterManager:
         
         return stats
     
+    @mutator
     def update_print_hours(self, printer_id: str, hours: float):
         """Actualiza las horas de impresión de una impresora."""
         printer = self.get_printer(printer_id)
@@ -274,6 +310,7 @@ class PrinterManager:
         
         return True, f"Horas actualizadas: {printer.total_print_hours} horas totales"
     
+    @mutator
     def record_maintenance(self, printer_id: str):
         """Registra el mantenimiento de una impresora."""
         printer = self.get_printer(printer_id)
@@ -364,25 +401,19 @@ class PrinterManager:
         try:
             with open(filename, 'r', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
-                imported_count = 0
-                
-                for row in reader:
-                    name = row.get('name', '')
-                    model = row.get('model', '')
-                    manufacturer = row.get('manufacturer', '')
-                    
-                    # Verificar si la impresora ya existe
-                    if not self.get_printer_by_name(name):
-                        printer = Printer(name, model, manufacturer)
-                        printer.status = row.get('status', 'active')
-                        printer.technology = row.get('technology', 'FDM')
-                        printer.total_print_hours = float(row.get('total_print_hours', 0))
-                        printer.location = row.get('location', '')
-                        
-                        self.printers.append(printer)
-                        imported_count += 1
+                rows = [{
+                    "name": row.get('name', ''),
+                    "model": row.get('model', ''),
+                    "manufacturer": row.get('manufacturer', ''),
+                    "status": row.get('status', 'active'),
+                    "technology": row.get('technology', 'FDM'),
+                    "total_print_hours": float(row.get('total_print_hours', 0)),
+                    "location": row.get('location', '')
+                } for row in reader]
                 
-                self.save_printers()
+                # Las impresoras ya existentes se omiten
+                created, _ = self.create_many(rows)
+                imported_count = len(created)
                 return True, f"{imported_count} impresoras importadas exitosamente"
         except Exception as e:
             return False, f"Error al importar impresoras: {str(e)}"
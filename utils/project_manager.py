@@ -3,6 +3,12 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any
 
+from utils.bulk_operations import BulkOperationsMixin
+from utils.persistence import WriteBehindMixin, atomic_write_json, mutator
+from utils.record_index import RecordIndex, ReverseIndex
+from utils.prefix_index import DEFAULT_COMPLETIONS, PrefixIndex
+from utils.text_index import TextIndex
+
 class Project:
     def __init__(self, name: str, description: str = ""):
         self.id = self._generate_id()
@@ -56,10 +62,38 @@ class Project:
         project.notes = data.get("notes", "")
         return project
 
-class ProjectManager:
+class ProjectManager(WriteBehindMixin, BulkOperationsMixin):
+    _bulk_records_attr = "projects"
+    
     def __init__(self, projects_file="projects.json"):
         self.projects_file = projects_file
         self.projects = self.load_projects()
+        self.index = RecordIndex()
+        self.client_index = ReverseIndex("client", normalize=RecordIndex.normalize)
+        self.quote_index = ReverseIndex("quotes", multi=True)
+        self.text_index = TextIndex(("name", "description", "client"))
+        self.prefix_index = PrefixIndex("name")
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Reconstruye los índices a partir de los proyectos en memoria."""
+        self.index.rebuild(self.projects)
+        self.client_index.rebuild(self.projects)
+        self.quote_index.rebuild(self.projects)
+        self.text_index.rebuild(self.projects)
+        self.prefix_index.rebuild(self.projects)
+    
+    def _bulk_build(self, data: Dict[str, Any]):
+        """Crea un proyecto a partir de un diccionario del lote."""
+        project = Project(data["name"], data.get("description", ""))
+        self._apply_fields(project, data)
+        return project
+    
+    def _bulk_save(self):
+        return self.save_projects()
+    
+    def _bulk_indexes(self):
+        return [self.index, self.client_index, self.quote_index, self.text_index, self.prefix_index]
     
     def load_projects(self):
         """Carga los proyectos desde el archivo."""
@@ -74,28 +108,39 @@ class ProjectManager:
         return []
     
     def save_projects(self):
-        """Guarda los proyectos en el archivo."""
+        """Guarda los proyectos en el archivo (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_projects)
+    
+    def _write_projects(self):
+        """Escribe los proyectos en el archivo."""
         try:
-            with open(self.projects_file, 'w') as f:
-                json.dump([project.to_dict() for project in self.projects], f, indent=2)
+            atomic_write_json(self.projects_file, [project.to_dict() for project in self.projects])
             return True
         except IOError as e:
             print(f"Error al guardar proyectos: {e}")
             return False
     
-    def create_project(self, name: str, description: str = ""):
-        """Crea un nuevo proyecto."""
+    @mutator
+    def create_project(self, name: str, description: str = "", **fields):
+        """Crea un nuevo proyecto.
+        
+        Los campos adicionales (client, budget, status, ...) se asignan antes
+        de indexarlo, para que las búsquedas por cliente o texto lo encuentren.
+        """
         project = Project(name, description)
+        self._apply_fields(project, fields)
         self.projects.append(project)
+        self.index.add(project)
+        self.client_index.add(project)
+        self.quote_index.add(project)
+        self.text_index.add(project)
+        self.prefix_index.add(project)
         self.save_projects()
         return project
     
     def get_project(self, project_id: str):
         """Obtiene un proyecto por ID."""
-        for project in self.projects:
-            if project.id == project_id:
-                return project
-        return None
+        return self.index.get(project_id)
     
     def get_projects(self, status=None):
         """Obtiene todos los proyectos, opcionalmente filtrados por estado."""
@@ -103,16 +148,26 @@ class ProjectManager:
             return [p for p in self.projects if p.status == status]
         return self.projects
     
+    @mutator
     def update_project(self, project_id: str, **kwargs):
         """Actualiza un proyecto con los valores proporcionados."""
         project = self.get_project(project_id)
         if not project:
             return False, "Proyecto no encontrado"
         
+        old_id = project.id
+        old_client_keys = self.client_index.keys_of(project)
+        old_quote_keys = self.quote_index.keys_of(project)
+        
         # Actualizar campos proporcionados
         for key, value in kwargs.items():
             if hasattr(project, key):
                 setattr(project, key, value)
+        self.index.reindex(project, old_id)
+        self.client_index.reindex(project, old_client_keys, old_id)
+        self.quote_index.reindex(project, old_quote_keys, old_id)
+        self.text_index.reindex(project, old_id)
+        self.prefix_index.reindex(project, old_id)
         
         # Actualizar fecha de modificación
         project.updated_at = datetime.now().isoformat()
@@ -120,6 +175,7 @@ class ProjectManager:
         self.save_projects()
         return True, "Proyecto actualizado"
     
+    @mutator
     def delete_project(self, project_id: str):
         """Elimina un proyecto."""
         project = self.get_project(project_id)
@@ -127,9 +183,15 @@ class ProjectManager:
             return False, "Proyecto no encontrado"
         
         self.projects.remove(project)
+        self.index.remove(project)
+        self.client_index.remove(project)
+        self.quote_index.remove(project)
+        self.text_index.remove(project)
+        self.prefix_index.remove(project)
         self.save_projects()
         return True, "Proyecto eliminado"
     
+    @mutator
     def add_quote_to_project(self, project_id: str, quote_id: str):
         """Agrega una cotización a un proyecto."""
         project = self.get_project(project_id)
@@ -138,12 +200,14 @@ class ProjectManager:
         
         if quote_id not in project.quotes:
             project.quotes.append(quote_id)
+            self.quote_index.add(project)
             project.updated_at = datetime.now().isoformat()
             self.save_projects()
             return True, "Cotización agregada al proyecto"
         
         return False, "La cotización ya está en el proyecto"
     
+    @mutator
     def remove_quote_from_project(self, project_id: str, quote_id: str):
         """Elimina una cotización de un proyecto."""
         project = self.get_project(project_id)
@@ -152,6 +216,8 @@ class ProjectManager:
         
         if quote_id in project.quotes:
             project.quotes.remove(quote_id)
+            if quote_id not in project.quotes:
+                self.quote_index.remove(project, [quote_id])
             project.updated_at = datetime.now().isoformat()
             self.save_projects()
             return True, "Cotización eliminada del proyecto"
@@ -185,18 +251,15 @@ class ProjectManager:
         
         return stats
     
-    def search_projects(self, query: str):
-        """Busca proyectos por nombre o descripción."""
-        query = query.lower()
-        results = []
-        
-        for project in self.projects:
-            if (query in project.name.lower() or 
-                query in project.description.lower() or
-                query in project.client.lower()):
-                results.append(project)
-        
-        return results
+    def search_projects(self, query: str, mode: str = "and"):
+        """Busca proyectos por nombre, descripción o cliente, del más al menos relevante."""
+        if not query.strip():
+            return list(self.projects)
+        return self.text_index.search(query, mode)
+    
+    def complete_projects(self, prefix: str, limit: int = DEFAULT_COMPLETIONS):
+        """Proyectos cuyo nombre tiene una palabra que empieza por `prefix` (autocompletado)."""
+        return self.prefix_index.complete(prefix, limit)
     
     def get_overdue_projects(self):
         """Obtiene proyectos con fechas vencidas."""
@@ -216,7 +279,11 @@ class ProjectManager:
     
     def get_projects_by_client(self, client_name: str):
         """Obtiene proyectos de un cliente específico."""
-        return [p for p in self.projects if p.client.lower() == client_name.lower()]
+        return self.client_index.get(client_name)
+    
+    def get_project_by_quote(self, quote_id: str):
+        """Obtiene el proyecto al que pertenece una cotización."""
+        return self.quote_index.first(quote_id)
     
     def archive_project(self, project_id: str):
         """Archiva un proyecto."""
@@ -0,0 +1,368 @@
+"""
+Planificador de consultas para la búsqueda avanzada de cotizaciones.
+
+`SearchFilter.filter_quotes` aplicaba cada filtro como una comprensión sobre
+la lista completa (y convertía la fecha de cada cotización en cada filtro
+de fechas) y después `sort_quotes` ordenaba todo el resultado.
+`QueryPlanner` compila el diccionario de filtros una sola vez en un
+`QueryPlan`:
+
+- con `QuoteIndexes` (índices ordenados por fecha, precio y horas, y un
+  índice hash por filamento) estima cuántas cotizaciones cumple cada
+  filtro, empieza por el más selectivo, interseca los candidatos con los
+  demás índices que lo reducen y comprueba el resto directamente sobre los
+  candidatos (si ningún filtro es selectivo, recorre la lista);
+- sin índices, aplica los filtros ya convertidos del más barato al más
+  caro, dejando para el final la conversión de fechas;
+- si solo se muestran las `limit` primeras, usa `heapq.nsmallest` /
+  `heapq.nlargest` (o lee directamente el índice ordenado) en lugar de
+  ordenar todo.
+
+Las claves del diccionario son las de `SearchFilter.filter_quotes`
+(piece_name, start_date, end_date, min_price, max_price, min_time,
+max_time) más filament_type, query, sort_by, sort_order y limit.
+"""
+
+import heapq
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.record_index import ReverseIndex, SortedIndex
+from utils.text_index import search_records
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Fecha de una cotización (datetime o texto ISO), o None si no se puede leer."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def quote_hours(quote) -> float:
+    """Horas de impresión: `print_time` o, en los gestores de cotizaciones, `total_hours`."""
+    hours = getattr(quote, "print_time", None)
+    return quote.total_hours if hours is None else hours
+
+
+def quote_weight(quote) -> float:
+    """Filamento usado: `filament_used` o, en los gestores de cotizaciones, `weight_g`."""
+    weight = getattr(quote, "filament_used", None)
+    return quote.weight_g if weight is None else weight
+
+
+def _in_range(value, low, high) -> bool:
+    """Si `value` existe y está entre `low` y `high` (límites opcionales, incluidos)."""
+    return value is not None and (low is None or value >= low) and (high is None or value <= high)
+
+
+# Claves de ordenación de `sort_by` (las mismas que SearchFilter.sort_quotes)
+SORT_KEYS: Dict[str, Callable[[Any], Any]] = {
+    "piece_name": lambda quote: quote.piece_name.lower(),
+    "print_time": quote_hours,
+    "filament_used": quote_weight,
+    "final_price": attrgetter("final_price"),
+    "created_at": attrgetter("created_at"),
+}
+
+# Filtros de rango: nombre -> (clave mínima, clave máxima, conversión del límite)
+RANGE_FILTERS = {
+    "date": ("start_date", "end_date", datetime.fromisoformat),
+    "price": ("min_price", "max_price", float),
+    "time": ("min_time", "max_time", float),
+}
+
+# Índice ordenado que sirve a cada campo (y a cada `sort_by`)
+FIELD_INDEXES = {"created_at": "date", "final_price": "price", "print_time": "time", "total_hours": "time"}
+
+
+class QuoteIndexes:
+    """Índices secundarios de cotizaciones que usa el planificador.
+
+    Se mantiene con la interfaz de los demás índices (`rebuild`, `add`,
+    `remove`), así que puede registrarse con `DatabaseManager.register_index`.
+    """
+
+    def __init__(self):
+        self.by_date = SortedIndex("created_at", parse_timestamp)
+        self.by_price = SortedIndex("final_price")
+        self.by_hours = SortedIndex(quote_hours)
+        self.by_filament = ReverseIndex("filament_type")
+        self.records: Dict[Any, Any] = {}
+        # Posición de llegada de cada ID; se conserva al quitar y volver a
+        # añadir una cotización modificada para no alterar el orden original
+        self.positions: Dict[Any, int] = {}
+
+    @property
+    def sorted_indexes(self) -> Dict[str, SortedIndex]:
+        return {"date": self.by_date, "price": self.by_price, "time": self.by_hours}
+
+    def index_for(self, field: str) -> SortedIndex:
+        """Índice ordenado de un campo (created_at, final_price, total_hours o print_time)."""
+        if field not in FIELD_INDEXES:
+            raise ValueError(f"Campo sin índice ordenado: {field}")
+        return self.sorted_indexes[FIELD_INDEXES[field]]
+
+    def range_bounds(self, field: str, low=None, high=None) -> Tuple[Any, Any]:
+        """Convierte los límites de un rango al tipo de la clave (las fechas pueden venir como texto ISO)."""
+        if FIELD_INDEXES.get(field) == "date":
+            return (None if low is None else parse_timestamp(low),
+                    None if high is None else parse_timestamp(high))
+        return low, high
+
+    def _indexes(self):
+        return (self.by_date, self.by_price, self.by_hours, self.by_filament)
+
+    def rebuild(self, quotes: Iterable[Any]):
+        """Reconstruye todos los índices desde cero."""
+        quotes = list(quotes)
+        for index in self._indexes():
+            index.rebuild(quotes)
+        self.records = {quote.id: quote for quote in quotes}
+        self.positions = {quote.id: position for position, quote in enumerate(quotes)}
+
+    def add(self, quote: Any):
+        """Añade una cotización a todos los índices."""
+        for index in self._indexes():
+            index.add(quote)
+        self.records[quote.id] = quote
+        self.positions.setdefault(quote.id, len(self.positions))
+
+    def remove(self, quote: Any):
+        """Quita una cotización de todos los índices."""
+        for index in self._indexes():
+            index.remove(quote)
+        self.records.pop(quote.id, None)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class QueryPlan:
+    """Filtros compilados de una búsqueda y la estrategia elegida para resolverla."""
+
+    def __init__(self):
+        # (nombre, mínimo, máximo) de los filtros de rango válidos
+        self.ranges: List[Tuple[str, Any, Any]] = []
+        self.filament_type: Optional[str] = None
+        self.piece_name: Optional[str] = None
+        self.query: Optional[str] = None
+        self.sort_by: Optional[str] = None
+        self.reverse = True
+        self.limit: Optional[int] = None
+        # Pasos elegidos al ejecutar con índices: (descripción, estimación)
+        self.steps: List[Tuple[str, int]] = []
+
+    def explain(self) -> List[str]:
+        """Descripción legible de los pasos del último plan ejecutado."""
+        return [f"{description} (~{estimate})" for description, estimate in self.steps]
+
+
+class QueryPlanner:
+    """Compila y ejecuta búsquedas avanzadas sobre cotizaciones."""
+
+    def __init__(self, indexes: Optional[QuoteIndexes] = None, text_index=None):
+        self.indexes = indexes
+        self.text_index = text_index
+
+    # ------------------------------------------------------------------
+    # Compilación
+
+    def compile(self, search_params: Dict[str, Any]) -> QueryPlan:
+        """Convierte una sola vez los filtros; los valores no válidos se ignoran como antes."""
+        plan = QueryPlan()
+        for name, (low_key, high_key, convert) in RANGE_FILTERS.items():
+            low = self._convert(search_params, low_key, convert)
+            high = self._convert(search_params, high_key, convert)
+            if low is not None or high is not None:
+                plan.ranges.append((name, low, high))
+
+        if search_params.get("filament_type"):
+            plan.filament_type = search_params["filament_type"]
+        if search_params.get("piece_name"):
+            plan.piece_name = search_params["piece_name"].lower()
+        query = (search_params.get("query") or "").lower().strip()
+        if query:
+            plan.query = query
+
+        if "sort_by" in search_params:
+            plan.sort_by = search_params["sort_by"] if search_params["sort_by"] in SORT_KEYS else "created_at"
+            plan.reverse = search_params.get("sort_order", "desc") == "desc"
+        if search_params.get("limit"):
+            try:
+                plan.limit = max(0, int(search_params["limit"]))
+            except (TypeError, ValueError):
+                pass
+        return plan
+
+    @staticmethod
+    def _convert(search_params: Dict[str, Any], key: str, convert):
+        """Límite de un filtro de rango, o None si falta o no es válido."""
+        value = search_params.get(key)
+        if value is None or value == "":
+            return None
+        try:
+            return convert(value)
+        except (TypeError, ValueError):
+            return None
+
+    # ------------------------------------------------------------------
+    # Ejecución
+
+    def search(self, quotes: List[Any], search_params: Dict[str, Any]) -> List[Any]:
+        """Compila y ejecuta una búsqueda."""
+        return self.execute(self.compile(search_params), quotes)
+
+    def execute(self, plan: QueryPlan, quotes: List[Any]) -> List[Any]:
+        """Ejecuta un plan sobre `quotes`.
+
+        Los índices solo se usan si cubren exactamente esas cotizaciones
+        (mismo número de registros); si no, se recorre la lista.
+        """
+        indexes = self.indexes if self.indexes is not None and len(self.indexes) == len(quotes) else None
+        plan.steps = []
+        candidates = None
+        if indexes is not None:
+            if self._sorted_walk_applies(plan):
+                return self._sorted_walk(plan, indexes, quotes)
+            candidates = self._from_indexes(plan, indexes)
+        if candidates is None:
+            candidates = self._scan(plan, quotes)
+
+        if plan.query is not None:
+            if self.text_index is not None and len(self.text_index) == len(quotes):
+                ranked = self.text_index.search(plan.query)
+                allowed = {quote.id for quote in candidates}
+                candidates = [quote for quote in ranked if quote.id in allowed]
+                plan.steps.append(("índice de texto", len(ranked)))
+            else:
+                # Mismo significado que con índice: prefijos de palabra en nombre y filamento
+                allowed = {quote.id for quote in candidates}
+                candidates = [quote for quote in search_records(quotes, plan.query) if quote.id in allowed]
+
+        return self._order(plan, candidates)
+
+    def _scan(self, plan: QueryPlan, quotes: List[Any]) -> List[Any]:
+        """Recorre la lista aplicando los filtros del más barato al más caro."""
+        plan.steps.append(("recorrido completo", len(quotes)))
+        return self._apply_checks(plan, list(quotes), plan.ranges, plan.filament_type is not None)
+
+    @staticmethod
+    def _apply_checks(plan: QueryPlan, quotes: List[Any], ranges, check_filament: bool) -> List[Any]:
+        """Filtra `quotes` con los filtros que no resuelve un índice.
+
+        Cada filtro es una comprensión sobre lo que dejó el anterior, y la
+        fecha (que hay que convertir en cada cotización) se comprueba al final,
+        sobre el menor número posible de cotizaciones.
+        """
+        if check_filament:
+            filament_type = plan.filament_type
+            quotes = [quote for quote in quotes if quote.filament_type == filament_type]
+        for name, low, high in sorted(ranges, key=lambda range_filter: range_filter[0] == "date"):
+            if name == "price":
+                if low is not None:
+                    quotes = [quote for quote in quotes if quote.final_price >= low]
+                if high is not None:
+                    quotes = [quote for quote in quotes if quote.final_price <= high]
+            elif name == "time":
+                if low is not None:
+                    quotes = [quote for quote in quotes if quote_hours(quote) >= low]
+                if high is not None:
+                    quotes = [quote for quote in quotes if quote_hours(quote) <= high]
+            elif name == "date":
+                lower = datetime.min if low is None else low
+                upper = datetime.max if high is None else high
+                fromisoformat = datetime.fromisoformat
+                try:
+                    quotes = [quote for quote in quotes if lower <= fromisoformat(quote.created_at) <= upper]
+                except (TypeError, ValueError):
+                    # Hay fechas que no son texto ISO: convertirlas una a una
+                    quotes = [quote for quote in quotes
+                              if _in_range(parse_timestamp(quote.created_at), low, high)]
+        if plan.piece_name is not None:
+            piece_name = plan.piece_name
+            quotes = [quote for quote in quotes if piece_name in quote.piece_name.lower()]
+        return quotes
+
+    def _from_indexes(self, plan: QueryPlan, indexes: QuoteIndexes) -> Optional[List[Any]]:
+        """Candidatos a partir del índice más selectivo, intersecados con los que lo reducen.
+
+        Devuelve None si ningún filtro descarta al menos tres cuartas partes
+        de las cotizaciones: entonces recorrer la lista sale más barato.
+        """
+        sorted_indexes = indexes.sorted_indexes
+        options = []
+        for name, low, high in plan.ranges:
+            index = sorted_indexes[name]
+            options.append((index.count_range(low, high), f"rango {name}",
+                            lambda index=index, low=low, high=high: index.range_ids(low, high), (name, low, high)))
+        if plan.filament_type is not None:
+            bucket = indexes.by_filament.buckets.get(plan.filament_type, {})
+            options.append((len(bucket), "filamento", lambda bucket=bucket: bucket.keys(), None))
+
+        options.sort(key=lambda option: option[0])
+        if not options or options[0][0] * 4 > len(indexes):
+            return None
+
+        estimate, description, fetch, _ = options[0]
+        plan.steps.append((description, estimate))
+        candidate_ids = set(fetch())
+        residual_ranges, check_filament = [], False
+        for estimate, description, fetch, range_filter in options[1:]:
+            if estimate < len(candidate_ids) * 4:
+                # Intersecar conjuntos es más barato que comprobar cada candidato
+                candidate_ids = candidate_ids.intersection(fetch())
+                plan.steps.append((f"intersección {description}", estimate))
+            elif range_filter is None:
+                check_filament = True
+            else:
+                residual_ranges.append(range_filter)
+
+        positions = indexes.positions
+        records = indexes.records
+        candidates = [records[record_id] for record_id in sorted(candidate_ids, key=positions.__getitem__)]
+        if residual_ranges or check_filament or plan.piece_name is not None:
+            plan.steps.append(("comprobación de candidatos", len(candidates)))
+            candidates = self._apply_checks(plan, candidates, residual_ranges, check_filament)
+        return candidates
+
+    @staticmethod
+    def _sorted_walk_applies(plan: QueryPlan) -> bool:
+        """Sin filtros, ordenando por un campo indexado y con `limit`, basta con leer ese índice."""
+        return (plan.sort_by in FIELD_INDEXES and plan.limit is not None and not plan.ranges and plan.filament_type is None
+                and plan.piece_name is None and plan.query is None)
+
+    def _sorted_walk(self, plan: QueryPlan, indexes: QuoteIndexes, quotes: List[Any]) -> List[Any]:
+        """Primeras `limit` cotizaciones directamente del índice ordenado."""
+        index = indexes.sorted_indexes[FIELD_INDEXES[plan.sort_by]]
+        if len(index) != len(indexes):
+            # Hay cotizaciones sin valor indexable: ordenar la lista completa
+            return self._order(plan, list(quotes))
+        plan.steps.append((f"índice ordenado {plan.sort_by}", plan.limit))
+        return index.largest(plan.limit) if plan.reverse else index.smallest(plan.limit)
+
+    @staticmethod
+    def _order(plan: QueryPlan, candidates: List[Any]) -> List[Any]:
+        """Ordena (o elige las `limit` primeras con un heap) según el plan."""
+        if plan.sort_by is None:
+            return candidates[:plan.limit] if plan.limit is not None else candidates
+        key = SORT_KEYS[plan.sort_by]
+        try:
+            if plan.limit is not None:
+                select = heapq.nlargest if plan.reverse else heapq.nsmallest
+                return select(plan.limit, candidates, key=key)
+            return sorted(candidates, key=key, reverse=plan.reverse)
+        except Exception as e:
+            print(f"Error al ordenar cotizaciones: {e}")
+            return candidates
+
+
+def get_quote_indexes(db_manager) -> QuoteIndexes:
+    """Devuelve los índices secundarios de cotizaciones del gestor, creándolos si hace falta."""
+    for index in db_manager.indexes:
+        if isinstance(index, QuoteIndexes):
+            return index
+    return db_manager.register_index(QuoteIndexes())
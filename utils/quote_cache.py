@@ -0,0 +1,114 @@
+"""
+Caché LRU de cálculos de precio.
+
+Las mismas piezas se cotizan una y otra vez con los mismos datos (pedidos
+repetidos, plantillas, recargas de la vista). `QuoteCache` guarda los
+resultados de `PricingEngine.price` por datos normalizados y versión de la
+configuración: cuando `SettingsManager` publica una versión nueva (cambio
+de precios) la caché se vacía sola.
+"""
+
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = 1024
+# Cada cuántas consultas se envían los contadores a `Analytics`
+REPORT_EVERY = 100
+
+_caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def normalize_inputs(weight_g, total_hours, filament_type, profit_margin_percent) -> Tuple[float, float, str, float]:
+    """Datos de cálculo como tupla comparable: números como float y filamento sin espacios.
+
+    Se usan los valores exactos (sin redondear) para que el resultado sea
+    idéntico al de `PricingEngine.price` con esos mismos datos.
+    """
+    return (
+        float(weight_g) + 0.0,
+        float(total_hours) + 0.0,
+        str(filament_type).strip(),
+        float(profit_margin_percent) + 0.0
+    )
+
+
+class QuoteCache:
+    """Caché LRU acotada delante de `PricingEngine.price`."""
+
+    def __init__(self, settings_manager, maxsize: int = DEFAULT_CACHE_SIZE, analytics=None):
+        self.settings_manager = settings_manager
+        self.maxsize = maxsize
+        self.analytics = analytics
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._reported = (0, 0)
+
+    def price(self, weight_g, total_hours, filament_type, profit_margin_percent,
+              piece_name: str = "Sin nombre") -> Dict[str, Any]:
+        """Igual que `PricingEngine.price`, pero reutiliza resultados ya calculados."""
+        snapshot = self.settings_manager.snapshot()
+        if snapshot.version != self._version:
+            self._entries.clear()
+            self._version = snapshot.version
+
+        inputs = normalize_inputs(weight_g, total_hours, filament_type, profit_margin_percent)
+        key = inputs + (snapshot.version,)
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            result = snapshot.pricing_engine.price(*inputs)
+            self._entries[key] = result
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        if self.analytics is not None and (self.hits + self.misses) % REPORT_EVERY == 0:
+            self.report()
+        return dict(result, piece_name=piece_name)
+
+    def price_quote(self, quote_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Calcula una cotización a partir de un diccionario (p. ej. de una plantilla)."""
+        return self.price(quote_data['weight_g'], quote_data['total_hours'], quote_data['filament_type'],
+                          quote_data['profit_margin_percent'], quote_data.get('piece_name') or "Sin nombre")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Vacía la caché (los contadores se conservan)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos, tasa de aciertos y ocupación."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize
+        }
+
+    def report(self, analytics=None):
+        """Envía a `Analytics` los aciertos y fallos acumulados desde el último envío."""
+        analytics = analytics or self.analytics
+        if analytics is None:
+            return
+        reported_hits, reported_misses = self._reported
+        analytics.track_cache_stats("quote_cache", self.hits - reported_hits, self.misses - reported_misses)
+        self._reported = (self.hits, self.misses)
+
+
+def get_quote_cache(settings_manager, analytics=None) -> QuoteCache:
+    """Devuelve la caché compartida del gestor de configuración, creándola si hace falta."""
+    cache = _caches.get(settings_manager)
+    if cache is None:
+        cache = _caches[settings_manager] = QuoteCache(settings_manager, analytics=analytics)
+    elif analytics is not None and cache.analytics is None:
+        cache.analytics = analytics
+    return cache
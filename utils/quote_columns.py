@@ -0,0 +1,330 @@
+from array import array
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usan arrays de la biblioteca estándar
+    np = None
+
+from utils.money import DEFAULT_DECIMALS, exact_sum, to_minor_array
+
+NUMERIC_FIELDS = (
+    'weight_g', 'total_hours', 'material_cost', 'print_time_cost',
+    'electricity_cost', 'profit_margin_percent', 'final_price'
+)
+# Columnas calculadas a partir de otras
+COST_FIELDS = ('material_cost', 'print_time_cost', 'electricity_cost')
+# Columnas de dinero: se suman en unidades menores enteras para que el total sea exacto
+MONEY_COLUMNS = COST_FIELDS + ('final_price', 'total_cost')
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+
+def to_epoch(value) -> Optional[int]:
+    """Convierte una fecha (datetime o texto ISO) en segundos desde 1970."""
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    return (value - _EPOCH) // _SECOND
+
+
+def month_label(code: int) -> str:
+    """Convierte un código de mes (año * 12 + mes - 1) en 'AAAA-MM'."""
+    return f"{code // 12:04d}-{code % 12 + 1:02d}"
+
+
+class QuoteColumns:
+    """Copia columnar de las cotizaciones para agregaciones vectorizadas.
+
+    Cada campo numérico es una columna float64, `created_at` se guarda como
+    segundos desde 1970 (int64) y `filament_type` como código categórico.
+    Se registra en el gestor de cotizaciones con `register_index`, que la
+    mantiene al día en cada alta, modificación y baja. Las bajas mueven la
+    última fila al hueco, así que el orden de las filas no es significativo.
+    """
+
+    def __init__(self, money_decimals: int = DEFAULT_DECIMALS):
+        self.money_decimals = money_decimals
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.categories: List[str] = []
+        self.category_codes: Dict[str, int] = {}
+        self._size = 0
+        self._capacity = 0
+        self._data: Dict[str, Any] = {}
+        self._allocate(0)
+
+    # ------------------------------------------------------------------
+    # Almacenamiento
+
+    def _allocate(self, capacity: int):
+        """Crea columnas vacías con la capacidad indicada."""
+        self._capacity = capacity
+        if np is not None:
+            self._data = {name: np.zeros(capacity, dtype=np.float64) for name in NUMERIC_FIELDS}
+            self._data['created_at'] = np.zeros(capacity, dtype=np.int64)
+            self._data['month'] = np.zeros(capacity, dtype=np.int32)
+            self._data['filament'] = np.zeros(capacity, dtype=np.int32)
+        else:
+            self._data = {name: array('d') for name in NUMERIC_FIELDS}
+            self._data['created_at'] = array('q')
+            self._data['month'] = array('i')
+            self._data['filament'] = array('i')
+
+    def _grow(self):
+        """Duplica la capacidad de las columnas NumPy."""
+        capacity = max(16, self._capacity * 2)
+        for name, column in self._data.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._data[name] = grown
+        self._capacity = capacity
+
+    def _category_code(self, filament_type: str) -> int:
+        """Devuelve el código del tipo de filamento, creándolo si es nuevo."""
+        code = self.category_codes.get(filament_type)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(filament_type)
+            self.category_codes[filament_type] = code
+        return code
+
+    @staticmethod
+    def _date_values(created_at) -> Tuple[int, int]:
+        """Devuelve (segundos desde 1970, código de mes); (0, -1) si la fecha no es válida."""
+        try:
+            created = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            return 0, -1
+        return (created - _EPOCH) // _SECOND, created.year * 12 + created.month - 1
+
+    def _row_values(self, quote) -> Dict[str, Any]:
+        """Extrae los valores de columna de una cotización."""
+        values = {name: getattr(quote, name) for name in NUMERIC_FIELDS}
+        values['created_at'], values['month'] = self._date_values(quote.created_at)
+        values['filament'] = self._category_code(quote.filament_type)
+        return values
+
+    # ------------------------------------------------------------------
+    # Mantenimiento (interfaz de `DatabaseManager.register_index`)
+
+    def rebuild(self, quotes: Iterable[Any]):
+        """Reconstruye la tabla desde cero."""
+        unique = list({quote.id: quote for quote in quotes}.values())
+        values = {name: list(map(attrgetter(name), unique)) for name in NUMERIC_FIELDS}
+        dates = [self._date_values(quote.created_at) for quote in unique]
+        values['created_at'] = [epoch for epoch, _ in dates]
+        values['month'] = [month for _, month in dates]
+        values['filament'] = [self._category_code(quote.filament_type) for quote in unique]
+
+        self.ids = [quote.id for quote in unique]
+        self.positions = {quote_id: row for row, quote_id in enumerate(self.ids)}
+        self._size = self._capacity = len(self.ids)
+        if np is not None:
+            self._data = {name: np.array(values[name], dtype=column.dtype)
+                          for name, column in self._data.items()}
+        else:
+            self._data = {name: array(column.typecode, values[name])
+                          for name, column in self._data.items()}
+
+    def add(self, quote):
+        """Añade (o reemplaza) la fila de una cotización."""
+        if quote.id in self.positions:
+            self.remove(quote)
+        values = self._row_values(quote)
+        row = self._size
+        if np is not None:
+            if row == self._capacity:
+                self._grow()
+            for name, value in values.items():
+                self._data[name][row] = value
+        else:
+            for name, value in values.items():
+                self._data[name].append(value)
+        self.ids.append(quote.id)
+        self.positions[quote.id] = row
+        self._size += 1
+
+    def remove(self, quote):
+        """Quita la fila de una cotización moviendo la última a su lugar."""
+        row = self.positions.pop(quote.id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            for column in self._data.values():
+                column[row] = column[last]
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.positions[moved_id] = row
+        self.ids.pop()
+        if np is None:
+            for column in self._data.values():
+                column.pop()
+        self._size -= 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ------------------------------------------------------------------
+    # Consultas
+
+    def column(self, name: str):
+        """Devuelve una columna (vista NumPy o array). 'total_cost' es calculada."""
+        if name == 'total_cost':
+            if np is not None:
+                return sum(self.column(field) for field in COST_FIELDS)
+            return array('d', map(sum, zip(*(self.column(field) for field in COST_FIELDS))))
+        column = self._data[name]
+        return column[:self._size] if np is not None else column
+
+    def select(self, start=None, end=None):
+        """Máscara de filas con `created_at` entre `start` y `end` (incluidos).
+
+        Devuelve None si no hay filtro, para que las agregaciones usen todo.
+        """
+        start, end = to_epoch(start), to_epoch(end)
+        if start is None and end is None:
+            return None
+        created = self.column('created_at')
+        if np is not None:
+            mask = np.ones(self._size, dtype=bool)
+            if start is not None:
+                mask &= created >= start
+            if end is not None:
+                mask &= created <= end
+            return mask
+        return [(start is None or value >= start) and (end is None or value <= end) for value in created]
+
+    def _masked(self, name: str, mask) -> Any:
+        """Valores de una columna filtrados por la máscara."""
+        column = self.column(name)
+        if mask is None:
+            return column
+        if np is not None:
+            return column[mask]
+        return [value for value, keep in zip(column, mask) if keep]
+
+    def count(self, mask=None) -> int:
+        """Número de filas seleccionadas."""
+        if mask is None:
+            return self._size
+        return int(mask.sum()) if np is not None else sum(mask)
+
+    def sum(self, name: str, mask=None) -> float:
+        """Suma de una columna; las de dinero se suman exactas en unidades menores."""
+        values = self._masked(name, mask)
+        if name in MONEY_COLUMNS:
+            return exact_sum(values, self.money_decimals)
+        return float(values.sum()) if np is not None else float(sum(values))
+
+    def sums(self, names: Iterable[str], mask=None) -> Dict[str, float]:
+        """Sumas de varias columnas."""
+        return {name: self.sum(name, mask) for name in names}
+
+    def selected_ids(self, mask=None) -> List[str]:
+        """IDs de las cotizaciones seleccionadas por la máscara."""
+        if mask is None:
+            return list(self.ids)
+        if np is not None:
+            return [self.ids[row] for row in np.flatnonzero(mask)]
+        return [quote_id for quote_id, keep in zip(self.ids, mask) if keep]
+
+    def extreme_id(self, name: str, mask=None, largest: bool = True) -> Optional[str]:
+        """ID de la cotización con el valor máximo (o mínimo) de una columna."""
+        values = self._masked(name, mask)
+        if not len(values):
+            return None
+        if np is not None:
+            position = int(values.argmax() if largest else values.argmin())
+            rows = np.flatnonzero(mask) if mask is not None else None
+            row = int(rows[position]) if rows is not None else position
+        else:
+            rows = [row for row, keep in enumerate(mask) if keep] if mask is not None else range(self._size)
+            best = max if largest else min
+            row = best(zip(values, rows), key=lambda pair: pair[0])[1]
+        return self.ids[row]
+
+    def group_sums(self, key: str, names: Iterable[str], mask=None) -> Dict[str, Dict[str, float]]:
+        """Agrupa por 'filament' o 'month' y suma las columnas indicadas.
+
+        Cada grupo incluye además 'count'. Las claves son el tipo de filamento
+        o el mes en formato 'AAAA-MM'. Las columnas de dinero se suman en
+        unidades menores enteras, igual que en `sum`.
+        """
+        names = list(names)
+        scale = 10 ** self.money_decimals
+        codes = self._masked(key, mask)
+        if np is not None:
+            codes = np.asarray(codes)
+            valid = codes >= 0
+            codes = codes[valid]
+            if not len(codes):
+                return {}
+            offset = int(codes.min())
+            shifted = codes - offset
+            counts = np.bincount(shifted)
+            # Los centavos enteros caben exactos en float64 hasta 2**53
+            totals = {name: np.bincount(shifted, weights=np.asarray(self._group_values(name, mask), dtype=np.float64)[valid])
+                      for name in names}
+            present = np.flatnonzero(counts)
+            groups = {}
+            for index in present:
+                groups[int(index) + offset] = dict(
+                    {name: float(totals[name][index]) for name in names}, count=int(counts[index])
+                )
+        else:
+            columns = [self._group_values(name, mask) for name in names]
+            groups = {}
+            for position, code in enumerate(codes):
+                if code < 0:
+                    continue
+                group = groups.get(code)
+                if group is None:
+                    group = groups[code] = dict({name: 0.0 for name in names}, count=0)
+                group['count'] += 1
+                for name, column in zip(names, columns):
+                    group[name] += column[position]
+
+        for group in groups.values():
+            for name in names:
+                if name in MONEY_COLUMNS:
+                    group[name] /= scale
+
+        if key == 'filament':
+            return {self.categories[code]: group for code, group in sorted(groups.items())}
+        return {month_label(code): group for code, group in sorted(groups.items())}
+
+    def _group_values(self, name: str, mask):
+        """Valores a agrupar: las columnas de dinero, en unidades menores."""
+        values = self._masked(name, mask)
+        if name in MONEY_COLUMNS:
+            return to_minor_array(values, self.money_decimals)
+        return values
+
+    def most_common_category(self) -> Optional[str]:
+        """Tipo de filamento más frecuente (en empate, el primero registrado)."""
+        if not self._size:
+            return None
+        if np is not None:
+            counts = np.bincount(self.column('filament'))
+            return self.categories[int(counts.argmax())]
+        counts = [0] * len(self.categories)
+        for code in self.column('filament'):
+            counts[code] += 1
+        return self.categories[counts.index(max(counts))]
+
+
+def get_quote_columns(db_manager) -> QuoteColumns:
+    """Devuelve la tabla columnar del gestor, creándola y registrándola si hace falta."""
+    for index in db_manager.indexes:
+        if isinstance(index, QuoteColumns):
+            return index
+    columns = QuoteColumns()
+    db_manager.register_index(columns)
+    return columns
@@ -0,0 +1,316 @@
+import sys
+from bisect import bisect_left, insort
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def intern_value(value):
+    """Interna cadenas de valores repetidos (estado, categoría, filamento)
+    para que todos los registros compartan el mismo objeto."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class RecordIndex:
+    """Índice en memoria por ID y, opcionalmente, por nombre sin distinguir mayúsculas.
+
+    Los gestores mantienen su lista de registros para conservar el orden y usan
+    este índice para que `get_*` y `get_*_by_name` sean de tiempo constante.
+    """
+
+    def __init__(self, name_attr: Optional[str] = None, id_attr: str = "id"):
+        self.id_attr = id_attr
+        self.name_attr = name_attr
+        self.by_id: Dict[Any, Any] = {}
+        self.by_name: Dict[str, List[Any]] = {}
+
+    @staticmethod
+    def normalize(name) -> str:
+        """Normaliza un nombre para compararlo sin distinguir mayúsculas."""
+        return name.casefold() if isinstance(name, str) else name
+
+    def rebuild(self, records: Iterable[Any]):
+        """Reconstruye el índice desde cero."""
+        self.by_id = {}
+        self.by_name = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Any):
+        """Añade un registro al índice."""
+        self.by_id[getattr(record, self.id_attr)] = record
+        if self.name_attr:
+            key = self.normalize(getattr(record, self.name_attr))
+            self.by_name.setdefault(key, []).append(record)
+
+    def remove(self, record: Any):
+        """Quita un registro del índice."""
+        self._remove_keys(record, getattr(record, self.id_attr),
+                          getattr(record, self.name_attr) if self.name_attr else None)
+
+    def reindex(self, record: Any, old_id: Any, old_name: Optional[str] = None):
+        """Actualiza las claves de un registro cuyo ID o nombre pudo cambiar."""
+        new_id = getattr(record, self.id_attr)
+        new_name = getattr(record, self.name_attr) if self.name_attr else None
+        if old_id == new_id and self.normalize(old_name) == self.normalize(new_name):
+            return
+        self._remove_keys(record, old_id, old_name)
+        self.add(record)
+
+    def _remove_keys(self, record: Any, record_id: Any, name: Optional[str]):
+        """Elimina las entradas de un registro bajo las claves indicadas."""
+        if self.by_id.get(record_id) is record:
+            del self.by_id[record_id]
+        if self.name_attr:
+            key = self.normalize(name)
+            bucket = self.by_name.get(key)
+            if bucket:
+                for position, candidate in enumerate(bucket):
+                    if candidate is record:
+                        del bucket[position]
+                        break
+                if not bucket:
+                    del self.by_name[key]
+
+    def get(self, record_id: Any):
+        """Obtiene un registro por ID."""
+        return self.by_id.get(record_id)
+
+    def get_by_name(self, name: str):
+        """Obtiene el primer registro con el nombre indicado."""
+        bucket = self.by_name.get(self.normalize(name))
+        return bucket[0] if bucket else None
+
+    def __contains__(self, record_id: Any) -> bool:
+        return record_id in self.by_id
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+
+class ReverseIndex:
+    """Índice inverso clave foránea -> registros hijos, en orden de inserción.
+
+    Con `multi=True` el atributo es una lista de claves (p. ej. las
+    cotizaciones de un proyecto) y el registro se indexa bajo cada una.
+    """
+
+    def __init__(self, key_attr: str, normalize=None, multi: bool = False, id_attr: str = "id"):
+        self.key_attr = key_attr
+        self.normalize = normalize
+        self.multi = multi
+        self.id_attr = id_attr
+        self.buckets: Dict[Any, Dict[Any, Any]] = {}
+
+    def keys_of(self, record: Any) -> List[Any]:
+        """Devuelve las claves bajo las que se indexa un registro."""
+        value = getattr(record, self.key_attr, None)
+        values = list(value or []) if self.multi else [value]
+        if self.normalize:
+            values = [self.normalize(v) for v in values]
+        return [v for v in values if v is not None]
+
+    def rebuild(self, records: Iterable[Any]):
+        """Reconstruye el índice desde cero."""
+        self.buckets = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Any):
+        """Añade un registro bajo sus claves actuales."""
+        record_id = getattr(record, self.id_attr)
+        for key in self.keys_of(record):
+            self.buckets.setdefault(key, {})[record_id] = record
+
+    def remove(self, record: Any, keys: Optional[List[Any]] = None, record_id: Any = None):
+        """Quita un registro de las claves indicadas (por defecto, las actuales)."""
+        if record_id is None:
+            record_id = getattr(record, self.id_attr)
+        for key in self.keys_of(record) if keys is None else keys:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.pop(record_id, None)
+                if not bucket:
+                    del self.buckets[key]
+
+    def reindex(self, record: Any, old_keys: List[Any], old_id: Any = None):
+        """Mueve un registro de sus claves anteriores a las actuales."""
+        if old_id is None:
+            old_id = getattr(record, self.id_attr)
+        if old_keys == self.keys_of(record) and old_id == getattr(record, self.id_attr):
+            return
+        self.remove(record, old_keys, old_id)
+        self.add(record)
+
+    def get(self, key: Any) -> List[Any]:
+        """Obtiene los registros asociados a una clave."""
+        if self.normalize:
+            key = self.normalize(key)
+        bucket = self.buckets.get(key)
+        return list(bucket.values()) if bucket else []
+
+    def first(self, key: Any):
+        """Obtiene el primer registro asociado a una clave."""
+        if self.normalize:
+            key = self.normalize(key)
+        bucket = self.buckets.get(key)
+        return next(iter(bucket.values())) if bucket else None
+
+
+class SortedIndex:
+    """Índice ordenado por un valor de los registros (fecha, precio, horas), con bisect.
+
+    Guarda una lista de (clave, orden, id) ordenada; `orden` (de inserción)
+    desempata, así que las tuplas nunca comparan IDs. Los gestores actualizan
+    quitando y volviendo a añadir el registro: el orden del último ID quitado
+    se recuerda para que una modificación no lo mueva dentro de su grupo de
+    empates, sin guardar el de todos los registros borrados. `value` es el nombre
+    de un atributo o una función registro -> valor, y `convert` transforma el
+    valor en la clave comparable (p. ej. texto ISO -> datetime). Los
+    registros sin valor no se indexan.
+    """
+
+    def __init__(self, value, convert=None, id_attr: str = "id"):
+        self.value = value if callable(value) else attrgetter(value)
+        self.convert = convert
+        self.id_attr = id_attr
+        self.entries: List[Tuple[Any, int, Any]] = []
+        self.records: Dict[Any, Any] = {}
+        self._keys: Dict[Any, Tuple[Any, int]] = {}
+        self._orders: Dict[Any, int] = {}
+        self._next_order = 0
+        self._last_removed: Optional[Tuple[Any, int]] = None
+
+    def key_of(self, record: Any):
+        """Clave de ordenación de un registro, o None si no tiene valor."""
+        value = self.value(record)
+        if value is None or self.convert is None:
+            return value
+        return self.convert(value)
+
+    def rebuild(self, records: Iterable[Any]):
+        """Reconstruye el índice desde cero (un solo sort)."""
+        self.entries = []
+        self.records = {}
+        self._keys = {}
+        self._orders = {}
+        self._next_order = 0
+        self._last_removed = None
+        for record in records:
+            record_id = getattr(record, self.id_attr)
+            order = self._orders[record_id] = self._next_order
+            self._next_order += 1
+            key = self.key_of(record)
+            if key is None:
+                continue
+            self.entries.append((key, order, record_id))
+            self._keys[record_id] = (key, order)
+            self.records[record_id] = record
+        self.entries.sort()
+
+    def add(self, record: Any):
+        """Añade un registro (si ya estaba, lo reubica según su valor actual)."""
+        record_id = getattr(record, self.id_attr)
+        self._discard(record_id)
+        order = self._orders.get(record_id)
+        if order is None:
+            if self._last_removed is not None and self._last_removed[0] == record_id:
+                order = self._last_removed[1]
+                self._last_removed = None
+            else:
+                order = self._next_order
+                self._next_order += 1
+            self._orders[record_id] = order
+        key = self.key_of(record)
+        if key is None:
+            return
+        insort(self.entries, (key, order, record_id))
+        self._keys[record_id] = (key, order)
+        self.records[record_id] = record
+
+    def remove(self, record: Any):
+        """Quita un registro del índice."""
+        record_id = getattr(record, self.id_attr)
+        self._discard(record_id)
+        order = self._orders.pop(record_id, None)
+        if order is not None:
+            self._last_removed = (record_id, order)
+
+    def reindex(self, record: Any, old_id: Any = None):
+        """Reubica un registro cuyo valor (o ID) pudo cambiar."""
+        record_id = getattr(record, self.id_attr)
+        if old_id is not None and old_id != record_id:
+            self._discard(old_id)
+            order = self._orders.pop(old_id, None)
+            if order is not None:
+                self._orders.setdefault(record_id, order)
+        self.add(record)
+
+    def _discard(self, record_id: Any):
+        """Elimina la entrada de un ID con la clave que tenía al indexarse."""
+        previous = self._keys.pop(record_id, None)
+        if previous is None:
+            return
+        position = bisect_left(self.entries, previous)
+        if position < len(self.entries) and self.entries[position][:2] == previous:
+            del self.entries[position]
+        self.records.pop(record_id, None)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _bounds(self, low=None, high=None) -> Tuple[int, int]:
+        """Posiciones [inicio, fin) de las claves entre `low` y `high` (ambos incluidos)."""
+        start = 0 if low is None else bisect_left(self.entries, (low,))
+        end = len(self.entries) if high is None else bisect_left(self.entries, (high, float("inf")))
+        return start, max(start, end)
+
+    def count_range(self, low=None, high=None) -> int:
+        """Cuántos registros tienen la clave entre `low` y `high`, en O(log n)."""
+        start, end = self._bounds(low, high)
+        return end - start
+
+    def range_ids(self, low=None, high=None) -> List[Any]:
+        """IDs con la clave entre `low` y `high`, de menor a mayor."""
+        start, end = self._bounds(low, high)
+        return [entry[2] for entry in self.entries[start:end]]
+
+    def range(self, low=None, high=None) -> List[Any]:
+        """Registros con la clave entre `low` y `high`, de menor a mayor."""
+        records = self.records
+        return [records[record_id] for record_id in self.range_ids(low, high)]
+
+    def smallest(self, count: int) -> List[Any]:
+        """Los `count` registros de menor clave, en orden ascendente."""
+        records = self.records
+        return [records[entry[2]] for entry in self.entries[:count]]
+
+    def largest(self, count: int) -> List[Any]:
+        """Los `count` registros de mayor clave, en orden descendente.
+
+        Los empates conservan el orden de inserción, igual que
+        `sorted(..., reverse=True)`.
+        """
+        if count <= 0:
+            return []
+        entries = self.entries
+        start = max(0, len(entries) - count)
+        if start:
+            # Incluir todo el grupo de empates del límite para elegir los primeros insertados
+            start = bisect_left(entries, (entries[start][0],))
+        tail = sorted(entries[start:], key=itemgetter(0), reverse=True)[:count]
+        records = self.records
+        return [records[entry[2]] for entry in tail]
+
+    def ordered(self, reverse: bool = False) -> List[Any]:
+        """Todos los registros indexados ordenados por clave (empates en orden de inserción)."""
+        entries = sorted(self.entries, key=itemgetter(0), reverse=True) if reverse else self.entries
+        records = self.records
+        return [records[entry[2]] for entry in entries]
+
+    def min_key(self):
+        """Menor clave indexada, o None si el índice está vacío."""
+        return self.entries[0][0] if self.entries else None
+
+    def max_key(self):
+        """Mayor clave indexada, o None si el índice está vacío."""
+        return self.entries[-1][0] if self.entries else None
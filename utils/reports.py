@@ -1,34 +1,39 @@
 import json
 from datetime import datetime, timedelta
+
+from utils.quote_columns import get_quote_columns
+
 class ReportGenerator:
     def __init__(self, db_manager):
         self.db_manager = db_manager
     
+    def _find_quote(self, quote_id):
+        """Busca una cotización por ID."""
+        return next((q for q in self.db_manager.get_all_quotes() if q.id == quote_id), None)
+    
     def generate_summary_report(self, start_date=None, end_date=None):
         """Genera un reporte resumido de cotizaciones."""
         try:
-            quotes = self.db_manager.get_all_quotes()
+            columns = get_quote_columns(self.db_manager)
             
             # Filtrar por fechas si se proporcionan
-            if start_date:
-                quotes = [q for q in quotes if q.created_at >= start_date]
-            if end_date:
-                quotes = [q for q in quotes if q.created_at <= end_date]
+            mask = columns.select(start_date, end_date)
+            total_quotes = columns.count(mask)
             
-            if not quotes:
+            if not total_quotes:
                 return {"error": "No hay datos para generar el reporte"}
             
-            total_quotes = len(quotes)
-            total_revenue = sum(q.final_price for q in quotes)
+            totals = columns.sums(("final_price", "material_cost", "print_time_cost"), mask)
+            total_revenue = totals["final_price"]
             avg_quote_value = total_revenue / total_quotes if total_quotes > 0 else 0
             
-            # Calcular totales por tipo de costo
-            total_material_cost = sum(q.material_cost for q in quotes)
-            total_labor_cost = sum(q.labor_cost for q in quotes)
+            # Calcular totales por tipo de costo (la mano de obra es el coste por hora de impresión)
+            total_material_cost = totals["material_cost"]
+            total_labor_cost = totals["print_time_cost"]
             
             # Encontrar cotización más cara y más barata
-            most_expensive = max(quotes, key=lambda x: x.final_price) if quotes else None
-            least_expensive = min(quotes, key=lambda x: x.final_price) if quotes else None
+            most_expensive = self._find_quote(columns.extreme_id("final_price", mask))
+            least_expensive = self._find_quote(columns.extreme_id("final_price", mask, largest=False))
             
             report = {
                 "report_date": datetime.now().isoformat(),
@@ -62,43 +67,39 @@ class ReportGenerator:
     def generate_detailed_report(self, start_date=None, end_date=None):
         """Genera un reporte detallado de cotizaciones."""
         try:
-            quotes = self.db_manager.get_all_quotes()
+            columns = get_quote_columns(self.db_manager)
             
             # Filtrar por fechas si se proporcionan
-            if start_date:
-                quotes = [q for q in quotes if q.created_at >= start_date]
-            if end_date:
-                quotes = [q for q in quotes if q.created_at <= end_date]
+            mask = columns.select(start_date, end_date)
+            total_quotes = columns.count(mask)
             
-            if not quotes:
+            if not total_quotes:
                 return {"error": "No hay datos para generar el reporte"}
             
             # Agrupar por mes
-            monthly_data = {}
-            for quote in quotes:
-                # Extraer mes y año
-                quote_date = datetime.fromisoformat(quote.created_at)
-                month_key = quote_date.strftime("%Y-%m")
-                
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = {
-                        "quote_count": 0,
-                        "total_revenue": 0,
-                        "total_material_cost": 0,
-                        "total_labor_cost": 0,
-                        "quotes": []
-                    }
-                
-                monthly_data[month_key]["quote_count"] += 1
-                monthly_data[month_key]["total_revenue"] += quote.final_price
-                monthly_data[month_key]["total_material_cost"] += quote.material_cost
-                monthly_data[month_key]["total_labor_cost"] += quote.labor_cost
-                monthly_data[month_key]["quotes"].append({
-                    "id": quote.id,
-                    "piece_name": quote.piece_name,
-                    "final_price": quote.final_price,
-                    "created_at": quote.created_at
-                })
+            monthly_data = {
+                month_key: {
+                    "quote_count": group["count"],
+                    "total_revenue": group["final_price"],
+                    "total_material_cost": group["material_cost"],
+                    "total_labor_cost": group["print_time_cost"],
+                    "quotes": []
+                }
+                for month_key, group in columns.group_sums(
+                    "month", ("final_price", "material_cost", "print_time_cost"), mask
+                ).items()
+            }
+            
+            selected = set(columns.selected_ids(mask))
+            for quote in self.db_manager.get_all_quotes():
+                month = monthly_data.get(quote.created_at[:7])
+                if quote.id in selected and month is not None:
+                    month["quotes"].append({
+                        "id": quote.id,
+                        "piece_name": quote.piece_name,
+                        "final_price": quote.final_price,
+                        "created_at": quote.created_at
+                    })
             
             report = {
                 "report_date": datetime.now().isoformat(),
@@ -107,8 +108,8 @@ class ReportGenerator:
                     "end": end_date.isoformat() if end_date else None
                 },
                 "monthly_data": monthly_data,
-                "total_quotes": len(quotes),
-                "total_revenue": sum(q.final_price for q in quotes)
+                "total_quotes": total_quotes,
+                "total_revenue": columns.sum("final_price", mask)
             }
             
             return report
@@ -118,24 +119,23 @@ class ReportGenerator:
     def generate_material_usage_report(self):
         """Genera un reporte de uso de materiales."""
         try:
-            quotes = self.db_manager.get_all_quotes()
+            columns = get_quote_columns(self.db_manager)
             
-            if not quotes:
+            if not len(columns):
                 return {"error": "No hay datos para generar el reporte"}
             
-            material_usage = {}
-            total_filament_used = 0
+            total_filament_used = columns.sum("weight_g")
             
-            for quote in quotes:
-                total_filament_used += quote.filament_used
-                
-                # Aquí podríamos agregar lógica para rastrear por tipo de filamento
-                # si se almacenara esa información
+            # Uso por tipo de filamento
+            material_usage = {
+                filament: {"quotes": group["count"], "filament_used": group["weight_g"]}
+                for filament, group in columns.group_sums("filament", ("weight_g",)).items()
+            }
             
             report = {
                 "report_date": datetime.now().isoformat(),
                 "total_filament_used": total_filament_used,
-                "average_filament_per_quote": total_filament_used / len(quotes) if quotes else 0,
+                "average_filament_per_quote": total_filament_used / len(columns),
                 "material_usage": material_usage
             }
             
@@ -146,17 +146,17 @@ class ReportGenerator:
     def generate_profitability_report(self):
         """Genera un reporte de rentabilidad."""
         try:
-            quotes = self.db_manager.get_all_quotes()
+            columns = get_quote_columns(self.db_manager)
             
-            if not quotes:
+            if not len(columns):
                 return {"error": "No hay datos para generar el reporte"}
             
-            total_revenue = sum(q.final_price for q in quotes)
-            total_costs = sum(q.total_cost for q in quotes)
+            total_revenue = columns.sum("final_price")
+            total_costs = columns.sum("total_cost")
             total_profit = total_revenue - total_costs
             profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
             
-            avg_profit_per_quote = total_profit / len(quotes) if quotes else 0
+            avg_profit_per_quote = total_profit / len(columns)
             
             report = {
                 "report_date": datetime.now().isoformat(),
@@ -186,28 +186,23 @@ class ReportGenerator:
     def get_report_statistics(self):
         """Obtiene estadísticas generales para reportes."""
         try:
-            quotes = self.db_manager.get_all_quotes()
+            columns = get_quote_columns(self.db_manager)
             
-            if not quotes:
+            if not len(columns):
                 return {"error": "No hay datos disponibles"}
             
             # Calcular estadísticas
-            total_quotes = len(quotes)
+            total_quotes = len(columns)
             
             # Cotizaciones por período
             today = datetime.now()
             last_7_days = today - timedelta(days=7)
             last_30_days = today - timedelta(days=30)
             
-            quotes_last_7_days = [q for q in quotes 
-                                if datetime.fromisoformat(q.created_at) >= last_7_days]
-            quotes_last_30_days = [q for q in quotes 
-                                 if datetime.fromisoformat(q.created_at) >= last_30_days]
-            
             stats = {
                 "total_quotes": total_quotes,
-                "quotes_last_7_days": len(quotes_last_7_days),
-                "quotes_last_30_days": len(quotes_last_30_days),
+                "quotes_last_7_days": columns.count(columns.select(start=last_7_days)),
+                "quotes_last_30_days": columns.count(columns.select(start=last_30_days)),
                 "average_quotes_per_day": total_quotes / 30 if total_quotes > 0 else 0
             }
             
@@ -0,0 +1,216 @@
+"""
+Recotización del historial con la configuración vigente.
+
+Recalcula los costos y el precio final de todas las cotizaciones guardadas
+en un solo lote (a partir de la tabla columnar `QuoteColumns`) y compara
+con los valores guardados. No modifica el historial salvo que se llame a
+`apply`, que escribe los precios nuevos con `DatabaseManager.update_many`.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.pricing_engine import PricingEngine, np
+from utils.quote_columns import get_quote_columns
+
+# Campos que cambian al recotizar (peso, horas, filamento y margen se conservan)
+REPRICED_FIELDS = ("material_cost", "print_time_cost", "electricity_cost", "final_price")
+
+
+def _take(column, rows):
+    """Valores de una columna en las filas indicadas (array de índices o lista)."""
+    if np is not None:
+        return column[rows]
+    return [column[row] for row in rows]
+
+
+def _total(values) -> float:
+    return float(values.sum()) if np is not None else float(sum(values))
+
+
+class RepricingReport:
+    """Resultado de una recotización: valores guardados, nuevos y diferencias.
+
+    `current` y `repriced` son columnas (arrays NumPy o listas) por campo de
+    `REPRICED_FIELDS`, alineadas con `ids`. Las cotizaciones cuyo filamento
+    ya no está configurado quedan en `skipped_ids` y no se recotizan.
+    """
+
+    def __init__(self, ids: List[str], filament_types: List[str], current: Dict[str, Any],
+                 repriced: Dict[str, Any], skipped_ids: List[str], settings_version: Optional[int] = None):
+        self.ids = ids
+        self.filament_types = filament_types
+        self.current = current
+        self.repriced = repriced
+        self.skipped_ids = skipped_ids
+        self.settings_version = settings_version
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def deltas(self, field: str = "final_price"):
+        """Diferencia (nuevo - guardado) de un campo por cotización."""
+        if np is not None:
+            return self.repriced[field] - self.current[field]
+        return [new - old for new, old in zip(self.repriced[field], self.current[field])]
+
+    def rows(self, tolerance: float = 0.005) -> Iterator[Dict[str, Any]]:
+        """Detalle por cotización, omitiendo las que no cambian más de `tolerance`."""
+        current = self._as_lists(self.current)
+        repriced = self._as_lists(self.repriced)
+        for row, quote_id in enumerate(self.ids):
+            old_price, new_price = current["final_price"][row], repriced["final_price"][row]
+            delta = new_price - old_price
+            if abs(delta) <= tolerance:
+                continue
+            detail = {"id": quote_id, "filament_type": self.filament_types[row]}
+            for field in REPRICED_FIELDS:
+                detail[f"current_{field}"] = current[field][row]
+                detail[f"repriced_{field}"] = repriced[field][row]
+            detail["delta"] = delta
+            detail["delta_percent"] = (delta / old_price * 100) if old_price else 0.0
+            yield detail
+
+    def summary(self, tolerance: float = 0.005) -> Dict[str, Any]:
+        """Totales guardados, recotizados y diferencias, en conjunto y por filamento."""
+        price_deltas = self.deltas()
+        current_total = _total(self.current["final_price"])
+        repriced_total = _total(self.repriced["final_price"])
+        if np is not None:
+            increased = int((price_deltas > tolerance).sum())
+            decreased = int((price_deltas < -tolerance).sum())
+        else:
+            increased = sum(1 for delta in price_deltas if delta > tolerance)
+            decreased = sum(1 for delta in price_deltas if delta < -tolerance)
+
+        by_filament: Dict[str, Dict[str, float]] = {}
+        current_prices = self._as_lists(self.current)["final_price"]
+        repriced_prices = self._as_lists(self.repriced)["final_price"]
+        for filament, old, new in zip(self.filament_types, current_prices, repriced_prices):
+            group = by_filament.setdefault(filament, {"count": 0, "current_total": 0.0, "repriced_total": 0.0})
+            group["count"] += 1
+            group["current_total"] += old
+            group["repriced_total"] += new
+        for group in by_filament.values():
+            group["delta_total"] = group["repriced_total"] - group["current_total"]
+
+        largest = None
+        if len(self.ids):
+            if np is not None:
+                position = int(np.abs(price_deltas).argmax())
+            else:
+                position = max(range(len(price_deltas)), key=lambda row: abs(price_deltas[row]))
+            largest = {"id": self.ids[position], "delta": float(price_deltas[position])}
+
+        return {
+            "count": len(self.ids),
+            "skipped": len(self.skipped_ids),
+            "current_total": current_total,
+            "repriced_total": repriced_total,
+            "delta_total": repriced_total - current_total,
+            "delta_percent": ((repriced_total - current_total) / current_total * 100) if current_total else 0.0,
+            "increased": increased,
+            "decreased": decreased,
+            "unchanged": len(self.ids) - increased - decreased,
+            "largest_change": largest,
+            "fields": {
+                field: {
+                    "current": _total(self.current[field]),
+                    "repriced": _total(self.repriced[field]),
+                    "delta": _total(self.repriced[field]) - _total(self.current[field]),
+                }
+                for field in REPRICED_FIELDS
+            },
+            "by_filament": dict(sorted(by_filament.items())),
+        }
+
+    def to_updates(self, tolerance: float = 0.0) -> Dict[str, Dict[str, float]]:
+        """Cambios para `DatabaseManager.update_many` (solo cotizaciones con diferencias)."""
+        current = self._as_lists(self.current)
+        repriced = self._as_lists(self.repriced)
+        updates = {}
+        for row, quote_id in enumerate(self.ids):
+            if any(abs(repriced[field][row] - current[field][row]) > tolerance for field in REPRICED_FIELDS):
+                updates[quote_id] = {field: repriced[field][row] for field in REPRICED_FIELDS}
+        return updates
+
+    @staticmethod
+    def _as_lists(columns: Dict[str, Any]) -> Dict[str, List[float]]:
+        """Columnas como listas de floats de Python."""
+        return {field: (values.tolist() if hasattr(values, "tolist") else list(values))
+                for field, values in columns.items()}
+
+
+class QuoteRepricer:
+    """Recotiza el historial de un gestor de cotizaciones con un `PricingEngine`.
+
+    Con `workers` distinto de 1 las filas se calculan por bloques en varios
+    procesos (`None`: uno por núcleo); el resultado es el mismo.
+    """
+
+    def __init__(self, db_manager, engine: PricingEngine, settings_version: Optional[int] = None,
+                 workers: int = 1):
+        self.db_manager = db_manager
+        self.engine = engine
+        self.settings_version = settings_version
+        self.workers = workers
+
+    @classmethod
+    def from_settings_manager(cls, db_manager, settings_manager, workers: int = 1) -> "QuoteRepricer":
+        """Crea el recotizador con la configuración vigente del `SettingsManager`."""
+        snapshot = settings_manager.snapshot()
+        return cls(db_manager, snapshot.pricing_engine, snapshot.version, workers)
+
+    def reprice(self, start=None, end=None) -> RepricingReport:
+        """Recotiza las cotizaciones (opcionalmente entre dos fechas) sin modificarlas."""
+        columns = get_quote_columns(self.db_manager)
+        mask = columns.select(start, end)
+        codes = columns.column('filament')
+
+        # Los códigos de la tabla se traducen a la lista de filamentos que
+        # conoce el motor; los que ya no están configurados se omiten
+        known = [name for name in columns.categories if name in self.engine.filament_prices]
+        remap = [known.index(name) if name in self.engine.filament_prices else -1
+                 for name in columns.categories]
+        if np is not None:
+            new_codes = np.array(remap, dtype=np.int64)[codes] if remap else np.zeros(0, dtype=np.int64)
+            selected = new_codes >= 0
+            if mask is not None:
+                skipped_rows = np.flatnonzero(mask & ~selected)
+                selected &= mask
+            else:
+                skipped_rows = np.flatnonzero(~selected)
+            rows = np.flatnonzero(selected)
+        else:
+            new_codes = [remap[code] for code in codes]
+            in_range = mask if mask is not None else [True] * len(columns)
+            rows = [row for row, code in enumerate(new_codes) if code >= 0 and in_range[row]]
+            skipped_rows = [row for row, code in enumerate(new_codes) if code < 0 and in_range[row]]
+
+        batch = (
+            _take(columns.column('weight_g'), rows),
+            _take(columns.column('total_hours'), rows),
+            _take(new_codes, rows),
+            _take(columns.column('profit_margin_percent'), rows)
+        )
+        if self.workers == 1:
+            result = self.engine.price_batch(*batch, filament_categories=known)
+        else:
+            from utils.parallel_pricing import price_batch_parallel
+            result = price_batch_parallel(self.engine, *batch, filament_categories=known, workers=self.workers)
+        current = {field: _take(columns.column(field), rows) for field in REPRICED_FIELDS}
+        repriced = {field: result[field] for field in REPRICED_FIELDS}
+        return RepricingReport(
+            ids=[columns.ids[row] for row in rows],
+            filament_types=[known[code] for code in _take(new_codes, rows)],
+            current=current,
+            repriced=repriced,
+            skipped_ids=[columns.ids[row] for row in skipped_rows],
+            settings_version=self.settings_version
+        )
+
+    def apply(self, report: RepricingReport, tolerance: float = 0.0) -> Tuple[int, List[str]]:
+        """Guarda los precios recotizados en el historial con una sola escritura."""
+        updates = report.to_updates(tolerance)
+        if not updates:
+            return 0, []
+        return self.db_manager.update_many(updates)
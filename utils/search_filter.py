@@ -1,73 +1,31 @@
 import re
-from datetime import datetime
+
+from utils.query_planner import QueryPlanner, parse_timestamp, quote_hours
+from utils.text_index import search_records
+from utils.trigram_index import fuzzy_filter
+
 class SearchFilter:
     @staticmethod
     def filter_quotes(quotes, filters):
-        """Filtra las cotizaciones según los criterios proporcionados."""
-        filtered_quotes = quotes
-        
-        # Filtrar por nombre de pieza
-        if "piece_name" in filters and filters["piece_name"]:
-            piece_name = filters["piece_name"].lower()
-            filtered_quotes = [q for q in filtered_quotes 
-                             if piece_name in q.piece_name.lower()]
-        
-        # Filtrar por rango de fechas
-        if "start_date" in filters and filters["start_date"]:
-            try:
-                start_date = datetime.fromisoformat(filters["start_date"])
-                filtered_quotes = [q for q in filtered_quotes 
-                                 if datetime.fromisoformat(q.created_at) >= start_date]
-            except ValueError:
-                pass  # Ignorar fechas inválidas
-        
-        if "end_date" in filters and filters["end_date"]:
-            try:
-                end_date = datetime.fromisoformat(filters["end_date"])
-                filtered_quotes = [q for q in filtered_quotes 
-                                 if datetime.fromisoformat(q.created_at) <= end_date]
-            except ValueError:
-                pass  # Ignorar fechas inválidas
-        
-        # Filtrar por rango de precios
-        if "min_price" in filters and filters["min_price"] is not None:
-            try:
-                min_price = float(filters["min_price"])
-                filtered_quotes = [q for q in filtered_quotes 
-                                 if q.final_price >= min_price]
-            except (ValueError, TypeError):
-                pass  # Ignorar valores inválidos
-        
-        if "max_price" in filters and filters["max_price"] is not None:
-            try:
-                max_price = float(filters["max_price"])
-                filtered_quotes = [q for q in filtered_quotes 
-                                 if q.final_price <= max_price]
-            except (ValueError, TypeError):
-                pass  # Ignorar valores inválidos
-        
-        # Filtrar por rango de tiempo de impresión
-        if "min_time" in filters and filters["min_time"] is not None:
-            try:
-                min_time = float(filters["min_time"])
-                filtered_quotes = [q for q in filtered_quotes 
-                                 if q.print_time >= min_time]
-            except (ValueError, TypeError):
-                pass  # Ignorar valores inválidos
-        
-        if "max_time" in filters and filters["max_time"] is not None:
-            try:
-                max_time = float(filters["max_time"])
-                filtered_quotes = [q for q in filtered_quotes 
-                                 if q.print_time <= max_time]
-            except (ValueError, TypeError):
-                pass  # Ignorar valores inválidos
-        
-        return filtered_quotes
+        """Filtra las cotizaciones según los criterios proporcionados.
+        
+        Los filtros se convierten una sola vez y se aplican del más barato al
+        más caro (ver utils.query_planner); los valores no válidos se ignoran.
+        """
+        planner = QueryPlanner()
+        plan = planner.compile(filters)
+        plan.query, plan.sort_by, plan.limit = None, None, None
+        return planner.execute(plan, quotes)
     
     @staticmethod
-    def search_quotes(quotes, query):
-        """Busca cotizaciones que coincidan con la consulta."""
+    def search_quotes(quotes, query, text_index=None):
+        """Busca cotizaciones que coincidan con la consulta, ordenadas por relevancia.
+        
+        Cada palabra de la consulta debe ser el comienzo de una palabra del
+        nombre de pieza o del filamento. Con `text_index` (un `TextIndex` de
+        utils.text_index, p. ej. el de `get_quote_text_index(db)`) se usa el
+        índice; sin él se obtiene el mismo resultado indexando al vuelo.
+        """
         if not query:
             return quotes
         
@@ -75,38 +33,33 @@ class SearchFilter:
         if not query:
             return quotes
         
-        # Buscar en nombre de pieza
-        matching_quotes = []
-        for quote in quotes:
-            if query in quote.piece_name.lower():
-                matching_quotes.append(quote)
+        if text_index is not None:
+            matches = text_index.search(query)
+            allowed = {quote.id for quote in quotes}
+            return [quote for quote in matches if quote.id in allowed]
         
-        return matching_quotes
+        return search_records(quotes, query)
     
     @staticmethod
-    def sort_quotes(quotes, sort_by="created_at", reverse=True):
-        """Ordena las cotizaciones según el criterio especificado."""
-        try:
-            if sort_by == "piece_name":
-                return sorted(quotes, key=lambda x: x.piece_name.lower(), reverse=reverse)
-            elif sort_by == "print_time":
-                return sorted(quotes, key=lambda x: x.print_time, reverse=reverse)
-            elif sort_by == "filament_used":
-                return sorted(quotes, key=lambda x: x.filament_used, reverse=reverse)
-            elif sort_by == "final_price":
-                return sorted(quotes, key=lambda x: x.final_price, reverse=reverse)
-            elif sort_by == "created_at":
-                return sorted(quotes, key=lambda x: x.created_at, reverse=reverse)
-            else:
-                # Orden por defecto (fecha de creación)
-                return sorted(quotes, key=lambda x: x.created_at, reverse=reverse)
-        except Exception as e:
-            print(f"Error al ordenar cotizaciones: {e}")
-            return quotes
+    def sort_quotes(quotes, sort_by="created_at", reverse=True, limit=None, indexes=None):
+        """Ordena las cotizaciones según el criterio especificado.
+        
+        Con `limit` devuelve solo las primeras sin ordenar la lista completa;
+        si además `indexes` (un `QuoteIndexes` sobre las mismas cotizaciones)
+        tiene índice para `sort_by`, las lee directamente de él.
+        """
+        planner = QueryPlanner(indexes)
+        plan = planner.compile({"sort_by": sort_by})
+        plan.reverse, plan.limit = reverse, limit
+        return planner.execute(plan, quotes)
     
     @staticmethod
-    def get_filter_options(quotes):
-        """Obtiene opciones de filtrado basadas en los datos existentes."""
+    def get_filter_options(quotes, indexes=None):
+        """Obtiene opciones de filtrado basadas en los datos existentes.
+        
+        Con `indexes` (un `QuoteIndexes` sobre las mismas cotizaciones) los
+        mínimos y máximos salen de los extremos de cada índice ordenado.
+        """
         if not quotes:
             return {
                 "date_range": {"min": None, "max": None},
@@ -114,20 +67,25 @@ class SearchFilter:
                 "time_range": {"min": 0, "max": 0}
             }
         
-        # Rango de fechas
-        dates = [datetime.fromisoformat(q.created_at) for q in quotes]
-        min_date = min(dates) if dates else None
-        max_date = max(dates) if dates else None
-        
-        # Rango de precios
-        prices = [q.final_price for q in quotes]
-        min_price = min(prices) if prices else 0
-        max_price = max(prices) if prices else 0
-        
-        # Rango de tiempos
-        times = [q.print_time for q in quotes]
-        min_time = min(times) if times else 0
-        max_time = max(times) if times else 0
+        if indexes is not None and all(len(index) == len(quotes) for index in indexes.sorted_indexes.values()):
+            min_date, max_date = indexes.by_date.min_key(), indexes.by_date.max_key()
+            min_price, max_price = indexes.by_price.min_key(), indexes.by_price.max_key()
+            min_time, max_time = indexes.by_hours.min_key(), indexes.by_hours.max_key()
+        else:
+            # Rango de fechas
+            dates = [date for date in (parse_timestamp(q.created_at) for q in quotes) if date is not None]
+            min_date = min(dates) if dates else None
+            max_date = max(dates) if dates else None
+            
+            # Rango de precios
+            prices = [q.final_price for q in quotes]
+            min_price = min(prices) if prices else 0
+            max_price = max(prices) if prices else 0
+            
+            # Rango de tiempos
+            times = [quote_hours(q) for q in quotes]
+            min_time = min(times) if times else 0
+            max_time = max(times) if times else 0
         
         return {
             "date_range": {
@@ -145,28 +103,26 @@ class SearchFilter:
         }
     
     @staticmethod
-    def advanced_search(quotes, search_params):
-        """Realiza una búsqueda avanzada con múltiples criterios."""
-        # Esta función combina búsqueda y filtrado
-        # Primero aplicamos filtros
-        filtered_quotes = SearchFilter.filter_quotes(quotes, search_params)
-        
-        # Luego aplicamos búsqueda textual si se proporciona
-        if "query" in search_params and search_params["query"]:
-            filtered_quotes = SearchFilter.search_quotes(filtered_quotes, search_params["query"])
-        
-        # Finalmente aplicamos ordenamiento si se especifica
-        if "sort_by" in search_params:
-            reverse = search_params.get("sort_order", "desc") == "desc"
-            filtered_quotes = SearchFilter.sort_quotes(filtered_quotes, 
-                                                     search_params["sort_by"], 
-                                                     reverse)
-        
-        return filtered_quotes
+    def advanced_search(quotes, search_params, text_index=None, indexes=None):
+        """Realiza una búsqueda avanzada con múltiples criterios.
+        
+        Compila `search_params` en un plan (utils.query_planner): con
+        `indexes` (un `QuoteIndexes` sobre las mismas cotizaciones) empieza por
+        el índice más selectivo e interseca candidatos; con `limit` en los
+        parámetros devuelve solo las primeras sin ordenar la lista completa.
+        """
+        return QueryPlanner(indexes, text_index).search(quotes, search_params)
     
     @staticmethod
-    def fuzzy_search(quotes, query, threshold=0.6):
-        """Realiza una búsqueda difusa (aproximada) en los nombres de piezas."""
+    def fuzzy_search(quotes, query, threshold=0.6, trigram_index=None):
+        """Realiza una búsqueda difusa (aproximada) en los nombres de piezas.
+        
+        Compara trigramas de caracteres (ver utils.trigram_index): devuelve las
+        cotizaciones cuyo nombre contiene al menos `threshold` de los trigramas
+        de la consulta, de la más a la menos parecida. Con `trigram_index`
+        (p. ej. `get_quote_trigram_index(db)`) los candidatos salen del índice
+        en lugar de recorrer todas las cotizaciones.
+        """
         if not query:
             return quotes
         
@@ -174,13 +130,9 @@ class SearchFilter:
         if not query:
             return quotes
         
-        matching_quotes = []
-        for quote in quotes:
-            piece_name = quote.piece_name.lower()
-            # Calcular similitud simple (esto es una implementación básica)
-            if query in piece_name:
-                matching_quotes.append(quote)
-            elif any(word in piece_name for word in query.split()):
-                matching_quotes.append(quote)
+        if trigram_index is not None:
+            matches = trigram_index.search(query, threshold)
+            allowed = {quote.id for quote in quotes}
+            return [quote for quote in matches if quote.id in allowed]
         
-        return matching_quotes
+        return fuzzy_filter(quotes, query, "piece_name", threshold)
@@ -0,0 +1,176 @@
+"""
+Análisis de sensibilidad del precio final.
+
+Evalúa la fórmula de `PricingEngine` sobre el producto cartesiano de varios
+parámetros (margen, precio del kWh, precio del filamento, ...) para una
+pieza. Con NumPy cada eje es una dimensión del array y el cálculo se hace
+por broadcasting; sin NumPy se recorre la grilla punto a punto.
+"""
+
+from itertools import product
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from utils.pricing_engine import PricingEngine, np
+
+# Parámetros que pueden variar en la grilla
+PARAMETERS = (
+    "weight_g", "total_hours", "filament_price_per_kg", "machine_cost_per_hour",
+    "electricity_kwh_price", "printer_power_watts", "profit_margin_percent"
+)
+
+
+class SensitivityResult:
+    """Precios finales de una grilla de parámetros.
+
+    `values` tiene una dimensión por eje, en el orden de `axes` (array
+    NumPy, o lista plana en orden de filas sin NumPy). `base` son los
+    parámetros de la pieza sin variar y `base_price` su precio.
+    """
+
+    def __init__(self, axes: Dict[str, List[float]], values, base: Dict[str, float], base_price: float):
+        self.axes = axes
+        self.values = values
+        self.base = base
+        self.base_price = base_price
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(values) for values in self.axes.values())
+
+    def __len__(self) -> int:
+        size = 1
+        for length in self.shape:
+            size *= length
+        return size
+
+    def _flat(self):
+        return self.values.ravel() if np is not None else self.values
+
+    def point(self, flat_index: int) -> Dict[str, float]:
+        """Valores de los ejes en una posición de la grilla (índice plano)."""
+        point = {}
+        for name, length in reversed(list(zip(self.axes, self.shape))):
+            flat_index, position = divmod(flat_index, length)
+            point[name] = self.axes[name][position]
+        return dict(reversed(list(point.items())))
+
+    def summary(self) -> Dict[str, Any]:
+        """Mínimo, máximo y media del precio final, con los puntos donde se dan."""
+        flat = self._flat()
+        if not len(flat):
+            return {"points": 0, "base_price": self.base_price}
+        if np is not None:
+            low, high = int(flat.argmin()), int(flat.argmax())
+            mean = float(flat.mean())
+        else:
+            low = min(range(len(flat)), key=flat.__getitem__)
+            high = max(range(len(flat)), key=flat.__getitem__)
+            mean = sum(flat) / len(flat)
+        return {
+            "points": len(flat),
+            "base_price": self.base_price,
+            "min_price": float(flat[low]),
+            "max_price": float(flat[high]),
+            "mean_price": mean,
+            "min_point": self.point(low),
+            "max_point": self.point(high),
+        }
+
+    def table(self, axis: str) -> List[Dict[str, float]]:
+        """Resumen por valor de un eje: precio mínimo, máximo y medio sobre el resto."""
+        names = list(self.axes)
+        position = names.index(axis)
+        if np is not None:
+            others = tuple(index for index in range(len(names)) if index != position)
+            lows = self.values.min(axis=others) if others else self.values
+            highs = self.values.max(axis=others) if others else self.values
+            means = self.values.mean(axis=others) if others else self.values
+            return [
+                {axis: value, "min_price": float(low), "max_price": float(high), "mean_price": float(mean)}
+                for value, low, high, mean in zip(self.axes[axis], lows, highs, means)
+            ]
+
+        inner = 1
+        for length in self.shape[position + 1:]:
+            inner *= length
+        groups = [[] for _ in self.axes[axis]]
+        for flat_index, price in enumerate(self.values):
+            groups[(flat_index // inner) % self.shape[position]].append(price)
+        return [
+            {axis: value, "min_price": min(prices), "max_price": max(prices),
+             "mean_price": sum(prices) / len(prices)}
+            for value, prices in zip(self.axes[axis], groups) if prices
+        ]
+
+    def rows(self) -> Iterator[Dict[str, float]]:
+        """Recorre la grilla punto a punto como diccionarios (eje -> valor, final_price)."""
+        names = list(self.axes)
+        flat = self._flat()
+        for flat_index, combination in enumerate(product(*self.axes.values())):
+            row = dict(zip(names, combination))
+            row["final_price"] = float(flat[flat_index])
+            yield row
+
+    def to_dict(self, include_values: bool = False) -> Dict[str, Any]:
+        """Ejes, resumen y tablas por eje; opcionalmente la grilla completa."""
+        data = {
+            "base": self.base,
+            "axes": self.axes,
+            "shape": list(self.shape),
+            "summary": self.summary(),
+            "tables": {axis: self.table(axis) for axis in self.axes},
+        }
+        if include_values:
+            data["values"] = self.values.tolist() if np is not None else self.values
+        return data
+
+
+def sensitivity_grid(engine: PricingEngine, weight_g: float, total_hours: float, filament_type: str,
+                     profit_margin_percent: float, axes: Dict[str, Iterable[float]],
+                     dtype: Optional[str] = None) -> SensitivityResult:
+    """Evalúa el precio final de una pieza sobre una grilla de parámetros.
+
+    `axes` asocia nombres de `PARAMETERS` a los valores a probar; el resto de
+    parámetros toman los de la pieza y la configuración del motor. `dtype`
+    permite guardar la grilla en 'float32' para ocupar la mitad (NumPy).
+
+        sensitivity_grid(engine, 120, 5, "PLA", 30, {
+            "profit_margin_percent": range(10, 80, 5),
+            "electricity_kwh_price": [0.10, 0.15, 0.20],
+            "filament_price_per_kg": [20, 25, 30],
+        })
+    """
+    unknown = [name for name in axes if name not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"Parámetros no válidos: {', '.join(unknown)}")
+
+    base = {
+        "weight_g": float(weight_g),
+        "total_hours": float(total_hours),
+        "filament_price_per_kg": engine.filament_prices[filament_type],
+        "machine_cost_per_hour": engine.machine_cost_per_hour,
+        "electricity_kwh_price": engine.electricity_kwh_price,
+        "printer_power_watts": engine.printer_power_watts,
+        "profit_margin_percent": float(profit_margin_percent),
+    }
+    axes = {name: [float(value) for value in values] for name, values in axes.items()}
+    base_price = PricingEngine.final_price(**base)
+
+    if np is not None:
+        params = dict(base)
+        for position, (name, values) in enumerate(axes.items()):
+            shape = [1] * len(axes)
+            shape[position] = len(values)
+            params[name] = np.asarray(values, dtype=np.float64).reshape(shape)
+        grid_shape = tuple(len(values) for values in axes.values())
+        values = np.broadcast_to(PricingEngine.final_price(**params), grid_shape)
+        values = np.ascontiguousarray(values, dtype=dtype or np.float64)
+    else:
+        names = list(axes)
+        values = []
+        for combination in product(*axes.values()):
+            params = dict(base)
+            params.update(zip(names, combination))
+            values.append(PricingEngine.final_price(**params))
+
+    return SensitivityResult(axes, values, base, base_price)
@@ -3,7 +3,18 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
+from utils.bulk_operations import BulkOperationsMixin
+from utils.persistence import WriteBehindMixin, atomic_write_json, mutator
+from utils.record_index import RecordIndex, ReverseIndex, intern_value
+from utils.text_index import TextIndex
+
 class Task:
+    __slots__ = (
+        "id", "title", "description", "created_at", "updated_at", "due_date",
+        "priority", "status", "assigned_to", "project_id", "client_id",
+        "related_quote_id", "tags", "notes", "reminder_date", "completed_at"
+    )
+    
     def __init__(self, title: str, description: str = ""):
         self.id = self._generate_id()
         self.title = title
@@ -50,14 +61,16 @@ class Task:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        """Crea una tarea desde un diccionario."""
-        task = cls(data["title"], data.get("description", ""))
+        """Crea una tarea desde un diccionario sin pasar por el constructor."""
+        task = cls.__new__(cls)
         task.id = data["id"]
+        task.title = data["title"]
+        task.description = data.get("description", "")
         task.created_at = data["created_at"]
         task.updated_at = data["updated_at"]
         task.due_date = data.get("due_date")
-        task.priority = data.get("priority", "medium")
-        task.status = data.get("status", "pending")
+        task.priority = intern_value(data.get("priority", "medium"))
+        task.status = intern_value(data.get("status", "pending"))
         task.assigned_to = data.get("assigned_to", "")
         task.project_id = data.get("project_id", "")
         task.client_id = data.get("client_id", "")
@@ -102,10 +115,36 @@ class Task:
         except Exception:
             return False
 
-class TaskManager:
+class TaskManager(WriteBehindMixin, BulkOperationsMixin):
+    _bulk_records_attr = "tasks"
+    
     def __init__(self, tasks_file="tasks.json"):
         self.tasks_file = tasks_file
         self.tasks = self.load_tasks()
+        self.index = RecordIndex()
+        self.project_index = ReverseIndex("project_id")
+        self.client_index = ReverseIndex("client_id")
+        self.text_index = TextIndex(("title", "description", "tags"))
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Reconstruye los índices a partir de los tareas en memoria."""
+        self.index.rebuild(self.tasks)
+        self.project_index.rebuild(self.tasks)
+        self.client_index.rebuild(self.tasks)
+        self.text_index.rebuild(self.tasks)
+    
+    def _bulk_build(self, data: Dict[str, Any]):
+        """Crea una tarea a partir de un diccionario del lote."""
+        task = Task(data["title"], data.get("description", ""))
+        self._apply_fields(task, data)
+        return task
+    
+    def _bulk_save(self):
+        return self.save_tasks()
+    
+    def _bulk_indexes(self):
+        return [self.index, self.project_index, self.client_index, self.text_index]
     
     def load_tasks(self):
         """Carga las tareas desde el archivo."""
@@ -120,28 +159,37 @@ class TaskManager:
         return []
     
     def save_tasks(self):
-        """Guarda las tareas en el archivo."""
+        """Guarda las tareas en el archivo (o los deja pendientes en modo diferido)."""
+        return self._persist(self._write_tasks)
+    
+    def _write_tasks(self):
+        """Escribe las tareas en el archivo."""
         try:
-            with open(self.tasks_file, 'w') as f:
-                json.dump([task.to_dict() for task in self.tasks], f, indent=2)
+            atomic_write_json(self.tasks_file, [task.to_dict() for task in self.tasks])
             return True
         except IOError as e:
             print(f"Error al guardar tareas: {e}")
             return False
     
+    @mutator
     def create_task(self, title: str, description: str = ""):
         """Crea una nueva tarea."""
         task = Task(title, description)
         self.tasks.append(task)
+        self._index_task(task)
         self.save_tasks()
         return task
     
+    def _index_task(self, task: Task):
+        """Registra una tarea en los índices del gestor."""
+        self.index.add(task)
+        self.project_index.add(task)
+        self.client_index.add(task)
+        self.text_index.add(task)
+    
     def get_task(self, task_id: str):
         """Obtiene una tarea por ID."""
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self.index.get(task_id)
     
     def get_tasks(self, status=None, priority=None, assigned_to=None):
         """Obtiene todas las tareas, opcionalmente filtradas."""
@@ -158,16 +206,25 @@ class TaskManager:
         
         return filtered_tasks
     
+    @mutator
     def update_task(self, task_id: str, **kwargs):
         """Actualiza una tarea con los valores proporcionados."""
         task = self.get_task(task_id)
         if not task:
             return False, "Tarea no encontrada"
         
+        old_id = task.id
+        old_project_keys = self.project_index.keys_of(task)
+        old_client_keys = self.client_index.keys_of(task)
+        
         # Actualizar campos proporcionados
         for key, value in kwargs.items():
             if hasattr(task, key):
                 setattr(task, key, value)
+        self.index.reindex(task, old_id)
+        self.project_index.reindex(task, old_project_keys, old_id)
+        self.client_index.reindex(task, old_client_keys, old_id)
+        self.text_index.reindex(task, old_id)
         
         # Actualizar fecha de modificación
         task.updated_at = datetime.now().isoformat()
@@ -175,6 +232,7 @@ class TaskManager:
         self.save_tasks()
         return True, "Tarea actualizada"
     
+    @mutator
     def delete_task(self, task_id: str):
         """Elimina una tarea."""
         task = self.get_task(task_id)
@@ -182,21 +240,18 @@ class TaskManager:
             return False, "Tarea no encontrada"
         
         self.tasks.remove(task)
+        self.index.remove(task)
+        self.project_index.remove(task)
+        self.client_index.remove(task)
+        self.text_index.remove(task)
         self.save_tasks()
         return True, "Tarea eliminada"
     
-    def search_tasks(self, query: str):
-        """Busca tareas por título, descripción o etiquetas."""
-        query = query.lower()
-        results = []
-        
-        for task in self.tasks:
-            if (query in task.title.lower() or 
-                query in task.description.lower() or
-                any(query in tag.lower() for tag in task.tags)):
-                results.append(task)
-        
-        return results
+    def search_tasks(self, query: str, mode: str = "and"):
+        """Busca tareas por título, descripción o etiquetas, de la más a la menos relevante."""
+        if not query.strip():
+            return list(self.tasks)
+        return self.text_index.search(query, mode)
     
     def get_overdue_tasks(self):
         """Obtiene tareas vencidas."""
@@ -210,6 +265,7 @@ class TaskManager:
         """Obtiene tareas con recordatorios pendientes."""
         return [t for t in self.tasks if t.has_reminder()]
     
+    @mutator
     def complete_task(self, task_id: str):
         """Marca una tarea como completada."""
         task = self.get_task(task_id)
@@ -223,6 +279,7 @@ class TaskManager:
         self.save_tasks()
         return True, "Tarea completada"
     
+    @mutator
     def cancel_task(self, task_id: str):
         """Cancela una tarea."""
         task = self.get_task(task_id)
@@ -295,6 +352,7 @@ class TaskManager:
         
         return self.update_task(task_id, status=status)
     
+    @mutator
     def add_task_tag(self, task_id: str, tag: str):
         """Añade una etiqueta a una tarea."""
         task = self.get_task(task_id)
@@ -303,12 +361,14 @@ class TaskManager:
         
         if tag not in task.tags:
             task.tags.append(tag)
+            self.text_index.reindex(task)
             task.updated_at = datetime.now().isoformat()
             self.save_tasks()
             return True, "Etiqueta añadida"
         
         return False, "La etiqueta ya existe"
     
+    @mutator
     def remove_task_tag(self, task_id: str, tag: str):
         """Elimina una etiqueta de una tarea."""
         task = self.get_task(task_id)
@@ -317,6 +377,7 @@ class TaskManager:
         
         if tag in task.tags:
             task.tags.remove(tag)
+            self.text_index.reindex(task)
             task.updated_at = datetime.now().isoformat()
             self.save_tasks()
             return True, "Etiqueta eliminada"
@@ -329,11 +390,11 @@ class TaskManager:
     
     def get_tasks_by_project(self, project_id: str):
         """Obtiene tareas asociadas a un proyecto."""
-        return [t for t in self.tasks if t.project_id == project_id]
+        return self.project_index.get(project_id)
     
     def get_tasks_by_client(self, client_id: str):
         """Obtiene tareas asociadas a un cliente."""
-        return [t for t in self.tasks if t.client_id == client_id]
+        return self.client_index.get(client_id)
     
     def set_due_date(self, task_id: str, due_date: str):
         """Establece la fecha de vencimiento de una tarea."""
@@ -406,27 +467,27 @@ class TaskManager:
         try:
             with open(filename, 'r', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
-                imported_count = 0
+                rows = []
                 
                 for row in reader:
-                    title = row.get('title', '')
-                    description = row.get('description', '')
-                    
-                    task = Task(title, description)
-                    task.status = row.get('status', 'pending')
-                    task.priority = row.get('priority', 'medium')
-                    task.due_date = row.get('due_date')
-                    task.assigned_to = row.get('assigned_to', '')
+                    data = {
+                        "title": row.get('title', ''),
+                        "description": row.get('description', ''),
+                        "status": row.get('status', 'pending'),
+                        "priority": row.get('priority', 'medium'),
+                        "due_date": row.get('due_date'),
+                        "assigned_to": row.get('assigned_to', '')
+                    }
                     
                     # Procesar etiquetas
                     tags_str = row.get('tags', '')
                     if tags_str:
-                        task.tags = [tag.strip() for tag in tags_str.split(',')]
+                        data["tags"] = [tag.strip() for tag in tags_str.split(',')]
                     
-                    self.tasks.append(task)
-                    imported_count += 1
+                    rows.append(data)
                 
-                self.save_tasks()
+                created, _ = self.create_many(rows)
+                imported_count = len(created)
                 return True, f"{imported_count} tareas importadas exitosamente"
         except Exception as e:
             return False, f"Error al importar tareas: {str(e)}"
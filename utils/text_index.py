@@ -0,0 +1,330 @@
+"""
+Índice invertido de texto para las búsquedas de los gestores.
+
+Los `search_*` recorrían todos los registros pasando cada campo a
+minúsculas en cada consulta. `TextIndex` tokeniza los campos de búsqueda
+una sola vez (sin acentos ni mayúsculas: "Diseño" y "diseno" son el mismo
+término) y guarda, por término, los IDs que lo contienen. Se mantiene con
+la misma interfaz que el resto de índices (`rebuild`, `add`, `remove`,
+`reindex`), así que sirve tanto para los gestores JSON como para
+`DatabaseManager.register_index`.
+
+Cada término de la consulta coincide con las palabras que empiezan por él
+("imp" encuentra "impresora"), y los resultados se ordenan por relevancia
+(frecuencia del término ponderada por su rareza, con más peso para las
+palabras completas).
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Campos de las cotizaciones en los que se busca
+QUOTE_SEARCH_FIELDS = ("piece_name", "filament_type")
+
+# Peso de una coincidencia por prefijo frente a una palabra completa
+PREFIX_WEIGHT = 0.5
+
+_TOKEN_RE = re.compile(r"\w+")
+# Separa los textos de varios registros al normalizarlos juntos
+_RECORD_SEPARATOR = "\x1e"
+
+
+class _CombiningTable(dict):
+    """Tabla de `str.translate` que borra las marcas combinantes (acentos).
+
+    Se rellena a medida que aparecen caracteres nuevos.
+    """
+
+    def __missing__(self, code: int):
+        value = None if unicodedata.combining(chr(code)) else code
+        self[code] = value
+        return value
+
+
+_STRIP_COMBINING = _CombiningTable()
+
+
+def fold(text) -> str:
+    """Texto sin acentos y sin distinguir mayúsculas ("Ñandú" -> "nandu")."""
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize("NFKD", text).translate(_STRIP_COMBINING).casefold()
+
+
+def tokenize(text) -> List[str]:
+    """Palabras normalizadas de un texto."""
+    return _TOKEN_RE.findall(fold(text)) if text else []
+
+
+def record_terms(record: Any, fields: Sequence[str]) -> Dict[str, int]:
+    """Términos de los campos de un registro con su frecuencia.
+
+    Los campos pueden ser cadenas o listas de cadenas (p. ej. etiquetas).
+    """
+    counts: Dict[str, int] = {}
+    for field in fields:
+        value = getattr(record, field, None)
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        for text in values:
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+class TextIndex:
+    """Índice invertido término -> {id: frecuencia} sobre varios campos de texto.
+
+    Los campos pueden ser cadenas o listas de cadenas (p. ej. etiquetas). El
+    índice guarda los términos de cada registro para poder quitarlo aunque
+    sus campos ya hayan cambiado.
+    """
+
+    def __init__(self, fields: Sequence[str], id_attr: str = "id"):
+        self.fields = tuple(fields)
+        self.id_attr = id_attr
+        self.postings: Dict[str, Dict[Any, int]] = {}
+        self.records: Dict[Any, Any] = {}
+        self._terms: Dict[Any, Dict[str, int]] = {}
+        self._order: Dict[Any, int] = {}
+        self._next_order = 0
+        self._vocabulary: Optional[List[str]] = None
+        # Registros sobre los que se mide la rareza de un término (None: los indexados)
+        self.corpus_size: Optional[int] = None
+
+    @classmethod
+    def from_postings(cls, fields: Sequence[str], postings: Dict[str, Dict[Any, int]],
+                      order: Dict[Any, int], corpus_size: Optional[int] = None) -> "TextIndex":
+        """Índice de solo consulta sobre postings ya calculados (p. ej. leídos de SQLite).
+
+        `postings` debe traer completos los términos que puedan coincidir con
+        la consulta y `order` la posición de cada ID para desempatar. Solo
+        sirve para `search_ids`: no guarda los registros.
+        """
+        index = cls(fields)
+        index.postings = postings
+        index.records = dict.fromkeys(order)
+        index._order = order
+        index.corpus_size = corpus_size
+        return index
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+
+    def terms_of(self, record: Any) -> Dict[str, int]:
+        """Términos de un registro con su frecuencia."""
+        return record_terms(record, self.fields)
+
+    def rebuild(self, records: Iterable[Any]):
+        """Reconstruye el índice desde cero."""
+        self.postings = {}
+        self.records = {}
+        self._terms = {}
+        self._order = {}
+        self._next_order = 0
+        self._vocabulary = None
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Any):
+        """Añade un registro (si ya estaba, lo vuelve a indexar con sus campos actuales)."""
+        record_id = getattr(record, self.id_attr)
+        order = self._order.get(record_id)
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        else:
+            self._discard(record_id)
+        terms = self.terms_of(record)
+        for token, count in terms.items():
+            bucket = self.postings.get(token)
+            if bucket is None:
+                bucket = self.postings[token] = {}
+                self._vocabulary = None
+            bucket[record_id] = count
+        self._terms[record_id] = terms
+        self.records[record_id] = record
+        self._order[record_id] = order
+
+    def remove(self, record: Any):
+        """Quita un registro del índice."""
+        self._discard(getattr(record, self.id_attr))
+
+    def reindex(self, record: Any, old_id: Any = None):
+        """Actualiza un registro cuyos campos de texto (o ID) pudieron cambiar."""
+        if old_id is not None and old_id != getattr(record, self.id_attr):
+            self._discard(old_id)
+        self.add(record)
+
+    def _discard(self, record_id: Any):
+        """Elimina las entradas de un ID con los términos que tenía al indexarse."""
+        terms = self._terms.pop(record_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            bucket = self.postings.get(token)
+            if bucket is not None:
+                bucket.pop(record_id, None)
+                if not bucket:
+                    del self.postings[token]
+                    self._vocabulary = None
+        self.records.pop(record_id, None)
+        self._order.pop(record_id, None)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, record_id: Any) -> bool:
+        return record_id in self.records
+
+    # ------------------------------------------------------------------
+    # Consultas
+
+    def expand(self, term: str, prefix: bool = True) -> List[str]:
+        """Términos del índice que coinciden con `term` (exacto o, con `prefix`, que empiezan por él)."""
+        if not prefix:
+            return [term] if term in self.postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        matches = []
+        position = bisect_left(vocabulary, term)
+        while position < len(vocabulary) and vocabulary[position].startswith(term):
+            matches.append(vocabulary[position])
+            position += 1
+        return matches
+
+    def _term_scores(self, term: str, tokens: List[str], candidates=None) -> Dict[Any, float]:
+        """Puntuación de cada ID para un término de la consulta.
+
+        Con `candidates` solo se puntúan esos IDs (la intersección de un AND).
+        """
+        total = len(self.records) if self.corpus_size is None else self.corpus_size
+        scores: Dict[Any, float] = {}
+        for token in tokens:
+            bucket = self.postings[token]
+            weight = math.log(1 + total / len(bucket)) * (1.0 if token == term else PREFIX_WEIGHT)
+            if candidates is None or len(bucket) <= len(candidates):
+                for record_id, count in bucket.items():
+                    if candidates is None or record_id in candidates:
+                        scores[record_id] = scores.get(record_id, 0.0) + count * weight
+            else:
+                for record_id in candidates:
+                    count = bucket.get(record_id)
+                    if count:
+                        scores[record_id] = scores.get(record_id, 0.0) + count * weight
+        return scores
+
+    def _ids(self, tokens: List[str]):
+        """IDs que contienen alguno de los términos."""
+        if len(tokens) == 1:
+            return self.postings[tokens[0]].keys()
+        return set().union(*(self.postings[token] for token in tokens))
+
+    def search_ids(self, query: str, mode: str = "and", prefix: bool = True,
+                   limit: Optional[int] = None) -> List[Any]:
+        """IDs que coinciden con la consulta, del más al menos relevante.
+
+        Con `mode="and"` deben aparecer todos los términos y con `mode="or"`
+        basta con uno. Una consulta sin términos devuelve todos los IDs en
+        orden de inserción.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            ids = list(self.records)
+            return ids[:limit] if limit is not None else ids
+
+        expanded = [(term, self.expand(term, prefix)) for term in terms]
+        candidates = None
+        if mode != "or" and len(expanded) > 1:
+            # Intersección de conjuntos de IDs, empezando por el término más selectivo
+            expanded.sort(key=lambda item: sum(len(self.postings[token]) for token in item[1]))
+            for term, tokens in expanded:
+                ids = self._ids(tokens)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+
+        scores: Dict[Any, float] = {}
+        for term, tokens in expanded:
+            for record_id, score in self._term_scores(term, tokens, candidates).items():
+                scores[record_id] = scores.get(record_id, 0.0) + score
+
+        order = self._order
+        key = lambda record_id: (-scores[record_id], order[record_id])
+        if limit is not None:
+            return heapq.nsmallest(limit, scores, key=key)
+        return sorted(scores, key=key)
+
+    def search(self, query: str, mode: str = "and", prefix: bool = True,
+               limit: Optional[int] = None) -> List[Any]:
+        """Registros que coinciden con la consulta, del más al menos relevante."""
+        records = self.records
+        return [records[record_id] for record_id in self.search_ids(query, mode, prefix, limit)]
+
+
+def search_records(records: Iterable[Any], query: str, fields: Sequence[str] = QUOTE_SEARCH_FIELDS,
+                   mode: str = "and") -> List[Any]:
+    """Busca en una lista sin índice con el mismo significado que `TextIndex.search`.
+
+    Devuelve las mismas filas, en el mismo orden, que un `TextIndex` sobre
+    `records`: indexa al vuelo solo los registros cuyo texto contiene algún
+    término (los demás no pueden coincidir) y puntúa la rareza de cada
+    término sobre la lista completa.
+    """
+    records = list(records)
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return records
+    index = TextIndex(fields)
+    index.rebuild(record for record, text in zip(records, _folded_texts(records, fields))
+                  if any(term in text for term in terms))
+    index.corpus_size = len(records)
+    return index.search(query, mode)
+
+
+def _folded_texts(records: List[Any], fields: Sequence[str]) -> List[str]:
+    """Texto normalizado de los campos de búsqueda de cada registro.
+
+    Normaliza todos los textos de una sola vez; si algún campo no es una
+    cadena (listas, None), los reúne registro a registro.
+    """
+    try:
+        if len(fields) < 2:
+            raise TypeError
+        get = attrgetter(*fields)
+        texts = [" ".join(get(record)) for record in records]
+    except (TypeError, AttributeError):
+        texts = [" ".join(_field_texts(record, fields)) for record in records]
+    folded = fold(_RECORD_SEPARATOR.join(texts)).split(_RECORD_SEPARATOR)
+    if len(folded) != len(records):
+        # Algún campo contenía el separador: normalizar uno a uno
+        folded = [fold(text) for text in texts]
+    return folded
+
+
+def _field_texts(record: Any, fields: Sequence[str]) -> List[str]:
+    """Textos de los campos de búsqueda de un registro (los campos lista se aplanan)."""
+    texts = []
+    for field in fields:
+        value = getattr(record, field, None)
+        if isinstance(value, str):
+            texts.append(value)
+        elif isinstance(value, (list, tuple, set)):
+            texts.extend(str(text) for text in value if text)
+        elif value:
+            texts.append(str(value))
+    return texts
+
+
+def get_quote_text_index(db_manager) -> TextIndex:
+    """Devuelve el índice de texto de cotizaciones del gestor, creándolo y registrándolo si hace falta."""
+    for index in db_manager.indexes:
+        if isinstance(index, TextIndex) and index.fields == QUOTE_SEARCH_FIELDS:
+            return index
+    return db_manager.register_index(TextIndex(QUOTE_SEARCH_FIELDS))
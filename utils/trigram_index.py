@@ -0,0 +1,217 @@
+"""
+Búsqueda difusa por trigramas.
+
+`TrigramIndex` descompone un campo de texto (nombre de pieza, de cliente,
+de material) en trigramas de caracteres, sin acentos ni mayúsculas, y
+guarda qué registros contienen cada trigrama. Una consulta con errores de
+tipeo ("engrnaje") comparte la mayoría de sus trigramas con el texto
+correcto ("Engranaje grande"), así que:
+
+1. los candidatos salen del índice: solo hace falta mirar los trigramas
+   más raros de la consulta, porque un registro que no contenga ninguno
+   no puede llegar al umbral;
+2. cada candidato se puntúa con `similarity` y se descarta si queda por
+   debajo de `threshold`.
+
+Un texto que contiene la consulta tal cual ("port" en "Soporte") puntúa
+siempre 1.0, aunque la coincidencia empiece a mitad de palabra y no
+comparta los trigramas con relleno del comienzo.
+"""
+
+import heapq
+import math
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from utils.text_index import tokenize
+
+# Umbral de similitud por defecto (igual que SearchFilter.fuzzy_search)
+DEFAULT_THRESHOLD = 0.6
+
+
+def _word_trigrams(words: Iterable[str], padded: bool = True) -> FrozenSet[str]:
+    """Trigramas de una lista de palabras normalizadas."""
+    grams = set()
+    for word in words:
+        if padded:
+            word = f"  {word} "
+        grams.update(word[position:position + 3] for position in range(len(word) - 2))
+    return frozenset(grams)
+
+
+def trigrams(text) -> FrozenSet[str]:
+    """Trigramas de las palabras de un texto, con relleno en los bordes ("  e", " en", ..., "je ")."""
+    return _word_trigrams(tokenize(text))
+
+
+def score(query_text: str, query_grams: FrozenSet[str], text: str,
+          text_grams: FrozenSet[str]) -> Tuple[float, float]:
+    """`similarity`, con cobertura 1.0 si el texto normalizado contiene la consulta."""
+    coverage, jaccard = similarity(query_grams, text_grams)
+    if query_text and query_text in text:
+        coverage = 1.0
+    return coverage, jaccard
+
+
+def similarity(query_grams: FrozenSet[str], text_grams: FrozenSet[str]) -> Tuple[float, float]:
+    """Similitud entre una consulta y un texto a partir de sus trigramas.
+
+    Devuelve (cobertura, jaccard): la fracción de trigramas de la consulta
+    que aparecen en el texto (1.0 si la consulta está contenida en él) y el
+    índice de Jaccard, que desempata a favor de los textos más parecidos en
+    conjunto.
+    """
+    if not query_grams or not text_grams:
+        return 0.0, 0.0
+    shared = len(query_grams & text_grams)
+    return shared / len(query_grams), shared / (len(query_grams) + len(text_grams) - shared)
+
+
+class TrigramIndex:
+    """Índice trigrama -> IDs sobre un campo de texto, con la interfaz de los demás índices."""
+
+    def __init__(self, field: str, id_attr: str = "id"):
+        self.field = field
+        self.id_attr = id_attr
+        self.postings: Dict[str, Set[Any]] = {}
+        self.records: Dict[Any, Any] = {}
+        self._grams: Dict[Any, FrozenSet[str]] = {}
+        self._texts: Dict[Any, str] = {}
+        self._order: Dict[Any, int] = {}
+        self._next_order = 0
+
+    def rebuild(self, records: Iterable[Any]):
+        """Reconstruye el índice desde cero."""
+        self.postings = {}
+        self.records = {}
+        self._grams = {}
+        self._texts = {}
+        self._order = {}
+        self._next_order = 0
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Any):
+        """Añade un registro (si ya estaba, lo vuelve a indexar con su texto actual)."""
+        record_id = getattr(record, self.id_attr)
+        order = self._order.get(record_id)
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        else:
+            self._discard(record_id)
+        words = tokenize(getattr(record, self.field, None))
+        grams = _word_trigrams(words)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(record_id)
+        self._grams[record_id] = grams
+        self._texts[record_id] = " ".join(words)
+        self.records[record_id] = record
+        self._order[record_id] = order
+
+    def remove(self, record: Any):
+        """Quita un registro del índice."""
+        self._discard(getattr(record, self.id_attr))
+
+    def reindex(self, record: Any, old_id: Any = None):
+        """Actualiza un registro cuyo texto (o ID) pudo cambiar."""
+        if old_id is not None and old_id != getattr(record, self.id_attr):
+            self._discard(old_id)
+        self.add(record)
+
+    def _discard(self, record_id: Any):
+        """Elimina las entradas de un ID con los trigramas que tenía al indexarse."""
+        grams = self._grams.pop(record_id, None)
+        if grams is None:
+            return
+        for gram in grams:
+            bucket = self.postings.get(gram)
+            if bucket is not None:
+                bucket.discard(record_id)
+                if not bucket:
+                    del self.postings[gram]
+        self.records.pop(record_id, None)
+        self._texts.pop(record_id, None)
+        self._order.pop(record_id, None)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def candidates(self, query_grams: FrozenSet[str], threshold: float) -> Set[Any]:
+        """IDs que pueden alcanzar `threshold` de cobertura.
+
+        Hacen falta al menos ceil(threshold * n) de los n trigramas de la
+        consulta, así que todo registro válido contiene alguno de los
+        n - ceil(threshold * n) + 1 trigramas más raros.
+        """
+        required = max(1, math.ceil(threshold * len(query_grams) - 1e-9))
+        rarest = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))
+        result: Set[Any] = set()
+        for gram in rarest[:len(query_grams) - required + 1]:
+            result.update(self.postings.get(gram, ()))
+        return result
+
+    def containing(self, words: List[str]) -> Iterable[Any]:
+        """IDs que pueden contener la consulta: los que tienen todos sus trigramas interiores.
+
+        Si ninguna palabra llega a tres letras no hay trigramas que exigir y
+        se devuelven todos los IDs.
+        """
+        inner = _word_trigrams(words, padded=False)
+        if not inner:
+            return self.records.keys()
+        buckets = sorted((self.postings.get(gram, set()) for gram in inner), key=len)
+        result = set(buckets[0])
+        for bucket in buckets[1:]:
+            if not result:
+                break
+            result &= bucket
+        return result
+
+    def search_ids(self, query: str, threshold: float = DEFAULT_THRESHOLD,
+                   limit: Optional[int] = None) -> List[Any]:
+        """IDs con similitud >= `threshold`, del más al menos parecido."""
+        words = tokenize(query)
+        query_grams = _word_trigrams(words)
+        if not query_grams:
+            return []
+        query_text = " ".join(words)
+        grams, texts = self._grams, self._texts
+        scored = []
+        for record_id in self.candidates(query_grams, threshold).union(self.containing(words)):
+            coverage, jaccard = score(query_text, query_grams, texts[record_id], grams[record_id])
+            if coverage >= threshold:
+                scored.append((-coverage, -jaccard, self._order[record_id], record_id))
+        scored = heapq.nsmallest(limit, scored) if limit is not None else sorted(scored)
+        return [item[-1] for item in scored]
+
+    def search(self, query: str, threshold: float = DEFAULT_THRESHOLD,
+               limit: Optional[int] = None) -> List[Any]:
+        """Registros con similitud >= `threshold`, del más al menos parecido."""
+        records = self.records
+        return [records[record_id] for record_id in self.search_ids(query, threshold, limit)]
+
+
+def fuzzy_filter(records: Iterable[Any], query: str, field: str,
+                 threshold: float = DEFAULT_THRESHOLD) -> List[Any]:
+    """Búsqueda difusa sin índice: puntúa cada registro de la lista."""
+    words = tokenize(query)
+    query_grams = _word_trigrams(words)
+    if not query_grams:
+        return []
+    query_text = " ".join(words)
+    scored = []
+    for position, record in enumerate(records):
+        text_words = tokenize(getattr(record, field, None))
+        coverage, jaccard = score(query_text, query_grams, " ".join(text_words), _word_trigrams(text_words))
+        if coverage and coverage >= threshold:
+            scored.append((-coverage, -jaccard, position, record))
+    scored.sort(key=lambda item: item[:3])
+    return [item[-1] for item in scored]
+
+
+def get_quote_trigram_index(db_manager) -> TrigramIndex:
+    """Devuelve el índice de trigramas de nombres de pieza del gestor, creándolo si hace falta."""
+    for index in db_manager.indexes:
+        if isinstance(index, TrigramIndex) and index.field == "piece_name":
+            return index
+    return db_manager.register_index(TrigramIndex("piece_name"))
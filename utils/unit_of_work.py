@@ -0,0 +1,126 @@
+import copy
+from typing import Any, Callable, Dict, Tuple
+
+from utils.persistence import WriteBehindMixin, commit_files, group_commit, staged_writes
+
+
+class UnitOfWork:
+    """Agrupa las modificaciones de varios gestores en una sola confirmación.
+
+    Dentro del bloque `with` los `save_*` de los gestores participantes no
+    escriben: se anotan y, al salir sin errores, cada archivo afectado se
+    escribe una sola vez y todos se confirman juntos. Si el bloque lanza una
+    excepción o la escritura falla, se restaura el estado en memoria de los
+    gestores y sus índices, y los archivos quedan como estaban.
+
+    Al empezar se escribe lo pendiente de la escritura diferida y se suspende
+    hasta el final, así que el disco refleja el estado inicial: para deshacer
+    basta con volver a cargar las listas afectadas de sus archivos. Solo se
+    copian en memoria las listas sin cargador o cuyo último guardado falló.
+
+        with UnitOfWork(client_manager, project_manager, budget_manager):
+            client_manager.update_client_spending(client_id, amount)
+            project_manager.add_quote_to_project(project_id, quote_id)
+            budget_manager.add_transaction(amount, "Cotización", budget_id)
+    """
+
+    def __init__(self, *managers):
+        for manager in managers:
+            if not isinstance(manager, WriteBehindMixin):
+                raise TypeError(f"{type(manager).__name__} no guarda mediante WriteBehindMixin "
+                                "y no puede participar en una unidad de trabajo")
+        self.managers = managers
+        self.committed = False
+        self._snapshots: Dict[int, Dict[str, Tuple[list, Any, Any]]] = {}
+        self._pending: Dict[Tuple[int, str], Callable[[], bool]] = {}
+
+    def __enter__(self):
+        for manager in self.managers:
+            if manager._unit_of_work is not None:
+                raise RuntimeError(f"{type(manager).__name__} ya participa en otra unidad de trabajo")
+        for manager in self.managers:
+            pause = getattr(manager, "pause_write_behind", None)
+            if pause:
+                pause()
+            self._snapshots[id(manager)] = self._snapshot(manager)
+            manager._unit_of_work = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def defer(self, manager, write_func: Callable[[], bool]):
+        """Anota un guardado para escribirlo al confirmar."""
+        self._pending[(id(manager), write_func.__name__)] = write_func
+
+    @staticmethod
+    def _snapshot(manager) -> Dict[str, Tuple[list, Any, Any]]:
+        """Anota cómo restaurar cada lista de registros del gestor.
+
+        Una lista `X` con cargador `load_X` cuyo archivo está al día se
+        restaura recargándola (sin coste al empezar); el resto se copia.
+        """
+        snapshot = {}
+        is_persisted = getattr(manager, "is_persisted", None)
+        for attr, value in vars(manager).items():
+            if not isinstance(value, list):
+                continue
+            loader = getattr(manager, f"load_{attr}", None)
+            if loader is not None and is_persisted is not None and is_persisted(f"_write_{attr}"):
+                snapshot[attr] = (value, loader, None)
+            elif value and all(hasattr(record, "to_dict") for record in value):
+                model = type(value[0])
+                snapshot[attr] = (value, model, copy.deepcopy([record.to_dict() for record in value]))
+            else:
+                snapshot[attr] = (value, None, copy.deepcopy(value))
+        return snapshot
+
+    def commit(self) -> bool:
+        """Escribe todos los archivos afectados; si algo falla, deshace el lote."""
+        if self.committed:
+            return True
+        try:
+            with staged_writes() as payloads:
+                for write_func in self._pending.values():
+                    if write_func() is False:
+                        raise IOError(f"no se pudo preparar {write_func.__name__}")
+            commit_files(payloads, fsync=group_commit.fsync)
+        except (IOError, OSError) as e:
+            print(f"Error al confirmar la unidad de trabajo: {e}")
+            self.rollback()
+            return False
+
+        self.committed = True
+        self._release()
+        return True
+
+    def rollback(self):
+        """Restaura el estado en memoria que tenían los gestores al empezar."""
+        for manager in self.managers:
+            for attr, (original, source, data) in self._snapshots.get(id(manager), {}).items():
+                if data is None:
+                    original[:] = source()
+                else:
+                    original[:] = [source.from_dict(item) for item in data] if source else data
+                setattr(manager, attr, original)
+            rebuild = getattr(manager, "_rebuild_indexes", None)
+            if rebuild:
+                rebuild()
+            manager.data_version += 1
+        self._release()
+
+    def _release(self):
+        """Devuelve a los gestores su modo de guardado habitual."""
+        for manager in self.managers:
+            if manager._unit_of_work is self:
+                manager._unit_of_work = None
+                resume = getattr(manager, "resume_write_behind", None)
+                if resume:
+                    resume()
+        self._snapshots.clear()
+        self._pending.clear()
+
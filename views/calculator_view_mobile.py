@@ -1,14 +1,18 @@
 import flet as ft
 from models.settings_manager import SettingsManager
 from models.database_simple import DatabaseManager
+from utils.pricing_engine import QUOTE_DATA_FIELDS
+from utils.quote_cache import get_quote_cache
 
 class CalculatorViewMobile(ft.View):
-    def __init__(self, page: ft.Page, settings_manager: SettingsManager, db_manager: DatabaseManager):
+    def __init__(self, page: ft.Page, settings_manager: SettingsManager, db_manager: DatabaseManager,
+                 analytics=None):
         super().__init__()
         self.route = "/calculator"
         self.page = page
         self.settings_manager = settings_manager
         self.db_manager = db_manager
+        self.analytics = analytics
         self.current_quote_data = None
         
         self.appbar = ft.AppBar(
@@ -148,11 +152,7 @@ class CalculatorViewMobile(ft.View):
     def calculate_price(self, e):
         try:
             # --- Cargar valores desde el gestor de configuración ---
-            settings = self.settings_manager.load_settings()
-            machine_cost_per_hour = float(settings['machine_cost_per_hour'])
-            electricity_kwh_price = float(settings['electricity_kwh_price'])
-            printer_power_watts = int(settings['printer_power_watts'])
-            filament_prices = settings['filaments']
+            quote_cache = get_quote_cache(self.settings_manager, self.analytics)
 
             # --- Obtener valores del formulario ---
             weight = float(self.weight_g.value)
@@ -169,14 +169,14 @@ class CalculatorViewMobile(ft.View):
                 return
 
             # --- Cálculos ---
-            filament_price_per_kg = float(filament_prices[selected_filament]['price_per_kg'])
-            material_cost = (weight / 1000) * filament_price_per_kg
-            print_time_cost = total_hours * machine_cost_per_hour
-            electricity_cost = (printer_power_watts / 1000) * total_hours * electricity_kwh_price
-            
-            subtotal = material_cost + print_time_cost + electricity_cost
-            margin_amount = subtotal * (profit_margin_percent / 100)
-            final_price = subtotal + margin_amount
+            result = quote_cache.price(weight, total_hours, selected_filament, profit_margin_percent,
+                                       piece_name=self.piece_name.value or "Sin nombre")
+            material_cost = result["material_cost"]
+            print_time_cost = result["print_time_cost"]
+            electricity_cost = result["electricity_cost"]
+            subtotal = result["subtotal"]
+            margin_amount = result["margin_amount"]
+            final_price = result["final_price"]
 
             # --- Actualizar la tarjeta de resultados ---
             currency_symbol = self.settings_manager.get('currency_symbol', '$')
@@ -188,17 +188,7 @@ class CalculatorViewMobile(ft.View):
             self.final_price_text.value = f"PRECIO FINAL: {currency_symbol}{final_price:.2f}"
 
             # Almacenar datos para guardado
-            self.current_quote_data = {
-                "piece_name": self.piece_name.value or "Sin nombre",
-                "weight_g": weight,
-                "total_hours": total_hours,
-                "filament_type": selected_filament,
-                "material_cost": material_cost,
-                "print_time_cost": print_time_cost,
-                "electricity_cost": electricity_cost,
-                "profit_margin_percent": profit_margin_percent,
-                "final_price": final_price
-            }
+            self.current_quote_data = {field: result[field] for field in QUOTE_DATA_FIELDS}
 
             self.result_card.visible = True
             self.page.update()
@@ -1,7 +1,11 @@
 import flet as ft
 from utils.client_manager import ClientManager, Client
+from utils.debounce import Debouncer
 from datetime import datetime
 
+# Máximo de clientes que muestra una búsqueda
+SEARCH_LIMIT = 50
+
 class ClientsView(ft.View):
     def __init__(self, page: ft.Page):
         super().__init__()
@@ -29,6 +33,14 @@ class ClientsView(ft.View):
             color="onprimary",
         )
         
+        # Búsqueda por nombre mientras se escribe (como mucho un redibujado por intervalo)
+        self.search_debouncer = Debouncer(self.load_clients)
+        self.search_field = ft.TextField(
+            label="Buscar cliente",
+            prefix_icon="search",
+            on_change=lambda _: self.search_debouncer.call()
+        )
+        
         # Lista de clientes
         self.clients_list = ft.Column(
             controls=[],
@@ -45,6 +57,7 @@ class ClientsView(ft.View):
                 controls=[
                     ft.Text("Base de Datos de Clientes", style=ft.TextThemeStyle.HEADLINE_MEDIUM, weight=ft.FontWeight.BOLD),
                     ft.Divider(),
+                    self.search_field,
                     self.clients_list
                 ],
                 spacing=20,
@@ -57,12 +70,20 @@ class ClientsView(ft.View):
         self.controls = [main_container]
     
     def load_clients(self):
-        """Carga la lista de clientes"""
+        """Carga la lista de clientes (solo los que coinciden con la búsqueda, si la hay)"""
         self.clients_list.controls.clear()
         
-        clients = self.client_manager.get_clients()
+        query = (self.search_field.value or "").strip()
+        if query:
+            clients = self.client_manager.complete_clients(query, SEARCH_LIMIT)
+        else:
+            clients = self.client_manager.get_clients()
         
-        if not clients:
+        if not clients and query:
+            self.clients_list.controls.append(
+                ft.Text(f"No hay clientes que coincidan con '{query}'", color="outline")
+            )
+        elif not clients:
             self.clients_list.controls.append(
                 ft.Container(
                     content=ft.Column([
@@ -142,7 +163,10 @@ class ClientsView(ft.View):
                 result = self.client_manager.create_client(
                     name=name_field.value,
                     email=email_field.value or "",
-                    phone=phone_field.value or ""
+                    phone=phone_field.value or "",
+                    company=company_field.value or "",
+                    address=address_field.value or "",
+                    preferred_filament=preferred_filament_field.value or ""
                 )
                 
                 if isinstance(result, tuple) and not result[0]:
@@ -152,10 +176,6 @@ class ClientsView(ft.View):
                     return
                 
                 client = result[0] if isinstance(result, tuple) else result
-                client.company = company_field.value or ""
-                client.address = address_field.value or ""
-                client.preferred_filament = preferred_filament_field.value or ""
-                self.client_manager.save_clients()
                 self.close_dialog()
                 self.load_clients()
                 
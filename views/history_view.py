@@ -1,8 +1,22 @@
 import flet as ft
 from models.database_mobile import DatabaseManager
+from utils.debounce import Debouncer
+from datetime import datetime
 import csv
 import io
 
+# Máximo de cotizaciones que muestra una búsqueda
+SEARCH_LIMIT = 50
+
+def format_date(value, date_format='%d/%m/%Y %H:%M'):
+    """Fecha de una cotización (datetime o texto ISO) como dd/mm/aaaa hh:mm."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value.strftime(date_format)
+
 class HistoryView(ft.View):
     def __init__(self, page: ft.Page, db_manager: DatabaseManager, file_picker: ft.FilePicker):
         super().__init__()
@@ -37,6 +51,14 @@ class HistoryView(ft.View):
             shadow_color="black38",
         )
         
+        # Búsqueda por nombre de pieza mientras se escribe (como mucho un redibujado por intervalo)
+        self.search_debouncer = Debouncer(self.load_history)
+        self.search_field = ft.TextField(
+            label="Buscar pieza",
+            prefix_icon="search",
+            on_change=lambda _: self.search_debouncer.call()
+        )
+        
         # Crear un contenedor con mejor diseño
         self.history_list = ft.ListView(
             expand=True, 
@@ -58,6 +80,10 @@ class HistoryView(ft.View):
                         animate_opacity=ft.Animation(duration=500, curve="easeIn"),
                         opacity=1,
                     ),
+                    ft.Container(
+                        content=self.search_field,
+                        padding=ft.padding.symmetric(horizontal=20),
+                    ),
                     self.history_list
                 ],
                 expand=True,
@@ -69,14 +95,23 @@ class HistoryView(ft.View):
         """Se llama cuando la vista se muestra."""
         self.load_history()
 
+    def get_history(self):
+        """Todas las cotizaciones guardadas, de la más reciente a la más antigua."""
+        return sorted(self.db_manager.get_all_quotes(), key=lambda q: str(q.created_at), reverse=True)
+
     def load_history(self):
         self.history_list.controls.clear()
-        quotes = self.db_manager.get_history()
+        query = (self.search_field.value or "").strip()
+        if query:
+            quotes = self.db_manager.complete_quotes(query, SEARCH_LIMIT)
+        else:
+            quotes = self.get_history()
         
         if not quotes:
+            message = f"No hay cotizaciones que coincidan con '{query}'." if query else "No hay cotizaciones guardadas."
             self.history_list.controls.append(
                 ft.Container(
-                    content=ft.Text("No hay cotizaciones guardadas.", style=ft.TextThemeStyle.BODY_LARGE, text_align=ft.TextAlign.CENTER),
+                    content=ft.Text(message, style=ft.TextThemeStyle.BODY_LARGE, text_align=ft.TextAlign.CENTER),
                     alignment=ft.alignment.center,
                     expand=True
                 )
@@ -107,7 +142,7 @@ class HistoryView(ft.View):
                                             color="primary",
                                         ),
                                         ft.Text(
-                                            f"Fecha: {quote.created_at.strftime('%d/%m/%Y %H:%M')}", 
+                                            f"Fecha: {format_date(quote.created_at)}", 
                                             size=15,
                                             color="onsurfacevariant"
                                         ),
@@ -148,7 +183,7 @@ class HistoryView(ft.View):
             self.page.update()
             return
 
-        quotes = self.db_manager.get_history()
+        quotes = self.get_history()
         try:
             with open(e.path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
@@ -161,7 +196,7 @@ class HistoryView(ft.View):
                 # Escribir datos
                 for quote in quotes:
                     writer.writerow([
-                        quote.id, quote.piece_name, quote.created_at.strftime('%Y-%m-%d %H:%M'),
+                        quote.id, quote.piece_name, format_date(quote.created_at, '%Y-%m-%d %H:%M'),
                         f"{quote.weight_g:.2f}", f"{quote.total_hours:.2f}", quote.filament_type,
                         f"{quote.material_cost:.2f}", f"{quote.print_time_cost:.2f}",
                         f"{quote.electricity_cost:.2f}", f"{quote.profit_margin_percent:.2f}",
@@ -1,8 +1,12 @@
 import flet as ft
 from utils.project_manager import ProjectManager, Project
 from utils.client_manager import ClientManager, Client
+from utils.debounce import Debouncer
 from datetime import datetime
 
+# Máximo de proyectos que muestra una búsqueda
+SEARCH_LIMIT = 50
+
 class ProjectsView(ft.View):
     def __init__(self, page: ft.Page):
         super().__init__()
@@ -30,6 +34,14 @@ class ProjectsView(ft.View):
             color="onprimary",
         )
         
+        # Búsqueda por nombre mientras se escribe (como mucho un redibujado por intervalo)
+        self.search_debouncer = Debouncer(self.load_projects)
+        self.search_field = ft.TextField(
+            label="Buscar proyecto",
+            prefix_icon="search",
+            on_change=lambda _: self.search_debouncer.call()
+        )
+        
         # Lista de proyectos
         self.projects_list = ft.Column(
             controls=[],
@@ -46,6 +58,7 @@ class ProjectsView(ft.View):
                 controls=[
                     ft.Text("Proyectos Activos", style=ft.TextThemeStyle.HEADLINE_MEDIUM, weight=ft.FontWeight.BOLD),
                     ft.Divider(),
+                    self.search_field,
                     self.projects_list
                 ],
                 spacing=20,
@@ -58,12 +71,20 @@ class ProjectsView(ft.View):
         self.controls = [main_container]
     
     def load_projects(self):
-        """Carga la lista de proyectos"""
+        """Carga la lista de proyectos (solo los que coinciden con la búsqueda, si la hay)"""
         self.projects_list.controls.clear()
         
-        projects = self.project_manager.get_projects()
+        query = (self.search_field.value or "").strip()
+        if query:
+            projects = self.project_manager.complete_projects(query, SEARCH_LIMIT)
+        else:
+            projects = self.project_manager.get_projects()
         
-        if not projects:
+        if not projects and query:
+            self.projects_list.controls.append(
+                ft.Text(f"No hay proyectos que coincidan con '{query}'", color="outline")
+            )
+        elif not projects:
             self.projects_list.controls.append(
                 ft.Container(
                     content=ft.Column([
@@ -166,12 +187,11 @@ class ProjectsView(ft.View):
                 
                 project = self.project_manager.create_project(
                     name=name_field.value,
-                    description=description_field.value or ""
+                    description=description_field.value or "",
+                    client=client_name_field.value,
+                    budget=budget,
+                    status="pending"
                 )
-                project.client = client_name_field.value
-                project.budget = budget
-                project.status = "pending"
-                self.project_manager.save_projects()
                 self.close_dialog()
                 self.load_projects()
                 
@@ -282,7 +282,7 @@ class SettingsView(ft.View):
     def save_settings(self, e):
         try:
             # Guardar configuración general
-            new_settings = self.settings_manager.load_settings()
+            new_settings = self.settings_manager.snapshot().to_dict()
             new_settings['machine_cost_per_hour'] = float(self.machine_cost.value)
             new_settings['electricity_kwh_price'] = float(self.electricity_price.value)
             new_settings['printer_power_watts'] = int(self.printer_power.value)